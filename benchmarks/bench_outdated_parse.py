@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""pub outdated --json 解析基准：对比 json.loads 整体解析与逐行流式解析的耗时和峰值内存
+
+    python3 benchmarks/bench_outdated_parse.py --packages 900 5000 50000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flutter"))
+
+import _pub_outdated  # noqa: E402
+
+ACCEPT = _pub_outdated.package_filter(["ap_*"], ["ap_recaptcha*"])
+
+
+def generate_output(count, ap_every=50):
+    packages = []
+    for i in range(count):
+        name = f"ap_module_{i}" if i % ap_every == 0 else f"transitive_{i}"
+        version = {"version": f"1.{i % 20}.{i % 7}"}
+        packages.append({"package": name, "kind": "transitive", "isDiscontinued": False,
+                         "current": version, "upgradable": version, "resolvable": version,
+                         "latest": {"version": f"1.{i % 20 + 1}.0"}})
+    return json.dumps({"packages": packages}, indent=2).splitlines(keepends=True)
+
+
+def parse_whole(lines):
+    data = json.loads("".join(lines))
+    return [pkg for pkg in data["packages"] if ACCEPT(pkg["package"])]
+
+
+def parse_stream(lines):
+    return list(_pub_outdated.iter_packages(iter(lines), ACCEPT))
+
+
+def measure(parse, lines):
+    # 耗时和峰值内存分开测，tracemalloc 会显著拖慢小对象分配
+    start = time.perf_counter()
+    matched = parse(lines)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    parse(lines)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(matched), elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pub outdated --json 解析基准")
+    parser.add_argument("--packages", type=int, nargs="+", default=[900, 5000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'包数量':>8} {'输出大小':>10} {'方式':<10} {'匹配':>6} {'耗时':>10} {'峰值内存':>12}")
+    for count in args.packages:
+        lines = generate_output(count)
+        size = sum(len(line) for line in lines)
+        for label, parse in (("json.loads", parse_whole), ("stream", parse_stream)):
+            matched, elapsed, peak = measure(parse, lines)
+            print(f"{count:>8} {size / 1024 / 1024:>8.1f}MB {label:<10} {matched:>6} "
+                  f"{elapsed * 1000:>8.1f}ms {peak / 1024:>10.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
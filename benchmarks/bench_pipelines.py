@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""端到端基准测试：在 PATH 中放入 benchmarks/fake_bin 下的 flutter / git 替身，
+对生成的不同规模仓库运行 pub_upgrade / pub_publish / pub_version_upgrade，
+通过各脚本的 --trace 输出统计每个阶段的耗时，并与本机保存的基线比较。
+
+    python3 benchmarks/bench_pipelines.py
+    python3 benchmarks/bench_pipelines.py --sizes 10 200 --repeat 5 --latency flutter.outdated=0.5 git.push=0.2
+    python3 benchmarks/bench_pipelines.py --save-baseline
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FAKE_BIN = Path(__file__).resolve().parent / "fake_bin"
+BASELINE_FILE = Path.home() / ".script_tool" / "bench_baselines.json"
+GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "bench", "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "bench", "GIT_COMMITTER_EMAIL": "bench@example.com",
+}
+
+SCENARIOS = {
+    "pub_upgrade": ["bench: up deps"],
+    "pub_publish": ["--msg", "bench", "release"],
+    "pub_version_upgrade": ["2"],
+}
+
+
+def git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, env={**os.environ, **GIT_IDENTITY})
+
+
+def generate_repository(workdir, size):
+    """生成包含 size 个 ap_* 依赖的包，以及一个本地 bare 仓库作为 origin"""
+    remote = workdir / "remote.git"
+    package = workdir / "package"
+    git(workdir, "init", "-q", "--bare", str(remote))
+    git(workdir, "clone", "-q", str(remote), str(package))
+
+    lines = ["name: bench_package", "description: benchmark package", "version: 1.0.0", "",
+             "environment:", "  sdk: '>=3.0.0 <4.0.0'", "", "dependencies:", "  flutter:", "    sdk: flutter"]
+    for i in range(size):
+        lines += [f"  ap_module_{i}:", "    hosted: https://dart.cloudsmith.io/org/app/", f"    version: ^1.{i % 10}.0"]
+    lines += ["", "flutter:", "  uses-material-design: true", ""]
+    (package / "pubspec.yaml").write_text("\n".join(lines), encoding="utf-8")
+    (package / "CHANGELOG.md").write_text("## 1.0.0\n\n- init\n", encoding="utf-8")
+    (package / "lib").mkdir()
+    for i in range(size):
+        (package / "lib" / f"module_{i}.dart").write_text(f"const module{i} = {i};\n", encoding="utf-8")
+
+    subprocess.run(["flutter", "pub", "get"], cwd=package, check=True, capture_output=True,
+                   env={**os.environ, "PATH": f"{FAKE_BIN}{os.pathsep}{os.environ['PATH']}"})
+    git(package, "add", "-A")
+    git(package, "commit", "-q", "-m", "init")
+    git(package, "push", "-q", "origin", "HEAD")
+    return package
+
+
+def run_scenario(script, size, env, workdir):
+    package = generate_repository(workdir, size)
+    trace_path = workdir / "trace.json"
+    command = [sys.executable, str(ROOT / "flutter" / f"{script}.py"), *SCENARIOS[script], "--trace", str(trace_path)]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=package, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise SystemExit(f"❌ {script} 失败（{size}）：\n{result.stdout}\n{result.stderr}")
+
+    stages = {}
+    for event in json.loads(trace_path.read_text(encoding="utf-8"))["traceEvents"]:
+        stages[event["name"]] = stages.get(event["name"], 0) + event["dur"] / 1e6
+    stages["(wall)"] = wall
+    return stages
+
+
+def benchmark_env(workdir, latency):
+    env = dict(os.environ)
+    env.update({
+        "PATH": f"{FAKE_BIN}{os.pathsep}{env['PATH']}",
+        "BENCH_REAL_GIT": shutil.which("git"),
+        "SCRIPT_TOOL_CACHE_DIR": str(workdir / "cache"),
+        "SCRIPT_TOOL_TRACE_HISTORY": str(workdir / "history.jsonl"),
+        **GIT_IDENTITY,
+    })
+    for item in latency:
+        tool, _, rest = item.partition(".")
+        subcommand, _, seconds = rest.partition("=")
+        env[f"BENCH_LATENCY_{tool.upper()}_{subcommand.upper().replace('-', '_')}"] = seconds
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pub 脚本端到端基准测试（使用 flutter / git 替身）")
+    parser.add_argument("--scripts", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="生成仓库的 ap_* 依赖数量")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", nargs="*", default=[], metavar="TOOL.SUB=SECONDS",
+                        help="注入延迟，如 flutter.outdated=0.5 git.push=0.2")
+    parser.add_argument("--threshold", type=float, default=0.2, help="相对基线变慢超过该比例视为回归（默认 0.2）")
+    parser.add_argument("--save-baseline", action="store_true", help=f"把本次结果保存为基线（{BASELINE_FILE}）")
+    args = parser.parse_args()
+
+    baselines = json.loads(BASELINE_FILE.read_text(encoding="utf-8")) if BASELINE_FILE.exists() else {}
+    results = {}
+    regressions = []
+
+    for script in args.scripts:
+        for size in args.sizes:
+            scenario = f"{script}@{size}"
+            samples = []
+            for _ in range(args.repeat):
+                with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+                    workdir = Path(tmp)
+                    samples.append(run_scenario(script, size, benchmark_env(workdir, args.latency), workdir))
+
+            stages = {name: statistics.median(s.get(name, 0.0) for s in samples)
+                      for name in sorted({name for s in samples for name in s})}
+            results[scenario] = stages
+            wall = stages["(wall)"]
+            print(f"\n▶ {scenario}: wall p50 {wall * 1000:.0f} ms，吞吐 {1 / wall:.2f} 次/秒")
+            for name, seconds in sorted(stages.items(), key=lambda item: -item[1]):
+                baseline = baselines.get(scenario, {}).get(name)
+                delta = ""
+                if baseline:
+                    change = (seconds - baseline) / baseline
+                    delta = f"{change:+.0%}"
+                    if change > args.threshold and seconds - baseline > 0.01:
+                        regressions.append(f"{scenario} {name}: {baseline * 1000:.0f} → {seconds * 1000:.0f} ms")
+                        delta += " ⚠️"
+                print(f"    {name:<32} {seconds * 1000:>9.1f} ms  {delta}")
+
+    if args.save_baseline:
+        baselines.update(results)
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_FILE.write_text(json.dumps(baselines, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n💾 基线已保存到 {BASELINE_FILE}")
+
+    if regressions:
+        print("\n❌ 相对基线的回归：")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
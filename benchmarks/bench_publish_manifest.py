@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""发布内容哈希基准：生成 N 个文件的包，比较首次计算与 mtime+size 命中缓存后的耗时
+
+    python3 benchmarks/bench_publish_manifest.py --files 5000 --size 16384
+"""
+import argparse
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+CACHE_DIR = tempfile.mkdtemp(prefix="bench_publish_manifest_")
+os.environ["SCRIPT_TOOL_CACHE_DIR"] = CACHE_DIR  # 不污染 ~/.script_tool/cache
+atexit.register(shutil.rmtree, CACHE_DIR, True)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flutter"))
+
+import _publish_manifest  # noqa: E402
+
+
+def generate_package(root, files, size):
+    os.makedirs(os.path.join(root, "build"))
+    with open(os.path.join(root, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write("build/\n*.g.dart\n")
+    with open(os.path.join(root, "pubspec.yaml"), "w", encoding="utf-8") as f:
+        f.write("name: bench_package\nversion: 1.0.0\n")
+    payload = os.urandom(size)
+    for i in range(files):
+        directory = os.path.join(root, "lib", f"src_{i % 50}")
+        os.makedirs(directory, exist_ok=True)
+        suffix = ".g.dart" if i % 10 == 0 else ".dart"
+        with open(os.path.join(directory, f"file_{i}{suffix}"), "wb") as f:
+            f.write(payload)
+    # 让 mtime 落在“刚修改”的窗口之外，缓存才会生效
+    old = time.time() - 3600
+    for directory, _, names in os.walk(root):
+        for name in names:
+            os.utime(os.path.join(directory, name), (old, old))
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"  {label:<28} {time.perf_counter() - start:>8.3f}s  {result[1:]}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="发布内容哈希基准")
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--size", type=int, default=16384, help="每个文件的字节数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        generate_package(root, args.files, args.size)
+        print(f"files: {args.files} × {args.size} bytes（括号内为 可发布文件数, 重新读取的文件数）")
+        timed("首次计算", lambda: _publish_manifest.content_hash(root))
+        timed("未修改（mtime+size 命中）", lambda: _publish_manifest.content_hash(root))
+        with open(os.path.join(root, "lib", "src_1", "file_1.dart"), "ab") as f:
+            f.write(b"// changed\n")
+        timed("修改 1 个文件", lambda: _publish_manifest.content_hash(root))
+
+
+if __name__ == "__main__":
+    main()
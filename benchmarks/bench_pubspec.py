@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""pubspec 编辑器基准测试：合成包含上千依赖和深层 dependency_overrides 的 pubspec.yaml，
+对比旧的逐行正则实现与 flutter/_pubspec.py 的单次扫描实现。
+
+    python3 benchmarks/bench_pubspec.py
+    python3 benchmarks/bench_pubspec.py --sizes 1000 10000 --repeat 5
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "flutter"))
+
+from _pubspec import PubspecDocument  # noqa: E402
+
+
+def generate_pubspec(size, newline="\n"):
+    lines = ["name: bench_app", "description: synthetic pubspec", "version: 1.2.3+45", "",
+             "environment:", "  sdk: '>=3.0.0 <4.0.0'", "", "dependencies:",
+             "  flutter:", "    sdk: flutter"]
+    for i in range(size):
+        kind = i % 4
+        if kind == 0:
+            lines += [f"  ap_pkg_{i}:", "    hosted: https://dart.cloudsmith.io/org/app/",
+                      f"    version: ^1.{i % 50}.0"]
+        elif kind == 1:
+            lines.append(f"  pkg_{i}: ^2.{i % 30}.1  # inline")
+        elif kind == 2:
+            lines += [f"  local_{i}:", f"    path: ../local_{i}"]
+        else:
+            lines += [f"  git_{i}:", "    git:", f"      url: https://example.com/git_{i}.git",
+                      "      ref: main"]
+        if i % 100 == 99:
+            lines.append("")
+    lines += ["", "dev_dependencies:", "  flutter_test:", "    sdk: flutter", "", "dependency_overrides:"]
+    for i in range(0, size, 2):
+        lines += [f"  ap_pkg_{i}:", "    hosted:", f"      name: ap_pkg_{i}",
+                  "      url: https://dart.cloudsmith.io/org/app/", "      # pinned for release",
+                  f"    version: '1.{i % 50}.0'"]
+    lines += ["", "flutter:", "  uses-material-design: true", ""]
+    return newline.join(lines)
+
+
+def legacy_update(lines, latest_versions):
+    """baseline：重构前 pub_upgrade.update_pubspec 的逐行正则 + 复制依赖块实现"""
+    def compare_versions(v1, v2):
+        parts1, parts2 = [list(map(int, v.replace('^', '').strip("'\"").split('.'))) for v in (v1, v2)]
+        while len(parts1) < len(parts2):
+            parts1.append(0)
+        while len(parts2) < len(parts1):
+            parts2.append(0)
+        return (parts1 > parts2) - (parts1 < parts2)
+
+    def process(dep_block):
+        dep_name = None
+        for line in dep_block:
+            match = re.match(r'^\s{2}(\S+):', line)
+            if match:
+                dep_name = match.group(1)
+                break
+        if dep_name not in latest_versions:
+            return dep_block
+        for idx, line in enumerate(dep_block):
+            match = re.match(r'(\s*version:\s*)(\S+)', line)
+            if match:
+                if compare_versions(match.group(2), latest_versions[dep_name]) == -1:
+                    dep_block[idx] = f"{match.group(1)}{latest_versions[dep_name]}\n"
+                break
+        return dep_block
+
+    new_lines, dep_block, in_dependencies = [], [], False
+    for line in lines:
+        if re.match(r'^(dependencies|dependency_overrides):\s*$', line):
+            in_dependencies = True
+            new_lines.append(line)
+            continue
+        if not in_dependencies:
+            new_lines.append(line)
+            continue
+        if line.strip() == "" or not re.match(r'^ {2}', line) or re.match(r'^ {2}\S+:', line):
+            if dep_block:
+                new_lines.extend(process(dep_block))
+                dep_block = []
+            if line.strip() == "":
+                new_lines.append(line)
+            elif not re.match(r'^ {2}', line):
+                in_dependencies = False
+                new_lines.append(line)
+            else:
+                dep_block.append(line)
+        elif dep_block:
+            dep_block.append(line)
+        else:
+            new_lines.append(line)
+    if dep_block:
+        new_lines.extend(process(dep_block))
+    return "".join(new_lines)
+
+
+def shared_update(text, latest_versions):
+    doc = PubspecDocument(text)
+    for dep in doc.dependencies(("dependencies", "dependency_overrides")):
+        if dep.name in latest_versions and doc.dependency_version(dep) is not None:
+            doc.set_dependency_version(dep, latest_versions[dep.name])
+    return doc.dump()
+
+
+def best_of(repeat, fn, *args):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pubspec 编辑器基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'deps':>7} {'lines':>8} {'legacy(ms)':>11} {'shared(ms)':>11} {'speedup':>8}  round-trip")
+    for size in args.sizes:
+        for newline in ("\n", "\r\n"):
+            text = generate_pubspec(size, newline)
+            if PubspecDocument(text).dump() != text:
+                raise SystemExit(f"❌ round-trip 不一致（{size} deps, {newline!r}）")
+        text = generate_pubspec(size)
+        latest = {f"ap_pkg_{i}": f"9.{i % 50}.1" for i in range(0, size, 4)}
+
+        legacy_time, legacy_text = best_of(args.repeat, legacy_update, text.splitlines(keepends=True), latest)
+        shared_time, shared_text = best_of(args.repeat, shared_update, text, latest)
+        legacy_versions = [v.strip("'") for v in re.findall(r'version: (\S+)', legacy_text)]
+        shared_versions = [v.strip("'") for v in re.findall(r'version: (\S+)', shared_text)]
+        if legacy_versions != shared_versions:
+            raise SystemExit(f"❌ 两种实现的修改结果不一致（{size} deps）")
+
+        print(f"{size:>7} {text.count(chr(10)):>8} {legacy_time * 1000:>11.2f} {shared_time * 1000:>11.2f} "
+              f"{legacy_time / shared_time:>7.1f}x  ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""保留策略引擎基准：生成 N 行包清单，计算全部规则的耗时
+
+    python3 benchmarks/bench_retention.py --rows 500000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+
+from _retention import Policy, PackageTable  # noqa: E402
+
+
+def generate_rows(count, names=400):
+    random.seed(42)
+    start = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        uploaded = start + timedelta(seconds=i * 120)
+        yield (f"perm{i:08d}", f"ap_module_{i % names}",
+               f"{random.randint(1, 4)}.{random.randint(0, 30)}.{random.randint(0, 20)}",
+               uploaded.strftime("%Y-%m-%dT%H:%M:%S.%fZ"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="保留策略引擎基准")
+    parser.add_argument("--rows", type=int, default=500000)
+    args = parser.parse_args()
+
+    rows = list(generate_rows(args.rows))
+    start = time.perf_counter()
+    table = PackageTable.from_rows(rows)
+    load = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lock_path = os.path.join(tmp, "pubspec.lock")
+        with open(lock_path, "w", encoding="utf-8") as f:
+            f.write("packages:\n")
+            for i in range(400):
+                f.write(f"  ap_module_{i}:\n    dependency: direct main\n    version: \"2.{i % 30}.0\"\n")
+
+        policy = Policy(keep_last=10, keep_release_heads=True, keep_locked=[lock_path])
+        policy.add_age_rule("ap_module_1*", days=365)
+        policy.add_age_rule("*", cutoff="2023-06-06T00:00:00Z")
+        start = time.perf_counter()
+        delete, report = policy.evaluate(table)
+        evaluate = time.perf_counter() - start
+
+    print(f"rows: {len(table)}  load: {load:.2f}s  evaluate: {evaluate:.2f}s")
+    for label, count, note in report:
+        print(f"  {label:<40} {count:>8}  {note}")
+    print(f"  删除 {sum(delete)}，保留 {len(table) - sum(delete)}")
+
+
+if __name__ == "__main__":
+    main()
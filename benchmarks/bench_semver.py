@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""语义化版本库基准：解析 / 排序 / VersionIndex 查询，对比逐个扫描的旧写法
+
+    python3 benchmarks/bench_semver.py --versions 1000000 --queries 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flutter"))
+
+import _semver  # noqa: E402
+
+
+def generate_versions(count):
+    random.seed(42)
+    versions = []
+    for _ in range(count):
+        version = f"{random.randint(0, 5)}.{random.randint(0, 40)}.{random.randint(0, 60)}"
+        roll = random.random()
+        if roll < 0.15:
+            version += f"-{random.choice(('dev', 'beta', 'rc'))}.{random.randint(0, 12)}"
+        if roll > 0.9:
+            version += f"+{random.randint(1, 500)}"
+        versions.append(version)
+    return versions
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"  {label:<36} {time.perf_counter() - start:>8.3f}s")
+    return result
+
+
+def scan_latest(versions, prefix):
+    """旧写法：每次查询都过滤 + 逐个比较"""
+    candidates = [v for v in versions if _semver.is_valid(v, allow_prerelease=False)]
+    if prefix:
+        candidates = [v for v in candidates if v.startswith(prefix + ".")]
+    return max(candidates, key=_semver.sort_key) if candidates else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语义化版本库基准")
+    parser.add_argument("--versions", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--scan-queries", type=int, default=20, help="逐个扫描对照组的查询次数")
+    args = parser.parse_args()
+
+    texts = generate_versions(args.versions)
+    unique = len(set(texts))
+    print(f"versions: {len(texts)}（不同版本 {unique}）")
+
+    timed("parse（首次）", lambda: [_semver.parse(text) for text in texts])
+    timed("parse（已驻留）", lambda: [_semver.parse(text) for text in texts])
+
+    # 内存单独测：tracemalloc 会明显拖慢解析
+    _semver._interned.clear()
+    tracemalloc.start()
+    parsed = [_semver.parse(text) for text in texts]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    print(f"  {'parse 内存峰值':<36} {peak / 1024 / 1024:>7.1f}M")
+    timed("sorted(key=sort_key)", lambda: sorted(texts, key=_semver.sort_key))
+    index = timed("VersionIndex 构建", lambda: _semver.VersionIndex(texts))
+
+    random.seed(7)
+    prefixes = [f"{random.randint(0, 5)}.{random.randint(0, 40)}" for _ in range(args.queries)]
+    constraints = [f"^{random.randint(0, 5)}.{random.randint(0, 40)}.0" for _ in range(args.queries)]
+    indexed = timed(f"latest(prefix) × {args.queries}", lambda: [index.latest(prefix=p) for p in prefixes])
+    timed(f"latest(constraint) × {args.queries}", lambda: [index.latest(c) for c in constraints])
+    timed(f"latest(prereleases) × {args.queries}",
+          lambda: [index.latest(prefix=p, prereleases=True) for p in prefixes])
+
+    count = min(args.scan_queries, len(prefixes))
+    start = time.perf_counter()
+    scanned = [scan_latest(texts, prefix) for prefix in prefixes[:count]]
+    per_query = (time.perf_counter() - start) / max(1, count)
+    print(f"  {f'逐个扫描 × {count}':<36} {per_query * count:>8.3f}s（约 {per_query * args.queries:.0f}s / {args.queries} 次）")
+
+    mismatches = sum(str(a) != str(b) for a, b in zip(indexed, scanned) if a or b)
+    print(f"  结果一致：{'✅' if not mismatches else f'❌ {mismatches} 处不同'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""启动耗时基准：对比直接运行脚本、flutter_scripts 入口和 zipapp 的冷 / 热启动延迟
+
+冷启动：每次使用新的空 PYTHONPYCACHEPREFIX（没有字节码缓存）；
+热启动：复用同一个已写好字节码的 PYTHONPYCACHEPREFIX。
+
+    python3 benchmarks/bench_startup.py --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+FLUTTER_DIR = Path(__file__).resolve().parent.parent / "flutter"
+SUBCOMMANDS = ["pub_upgrade", "pub_publish", "pub_version_upgrade"]
+
+
+def measure(command, runs, cold):
+    samples = []
+    with tempfile.TemporaryDirectory(prefix="bench_pycache_") as warm_prefix:
+        for _ in range(runs + (0 if cold else 1)):
+            with tempfile.TemporaryDirectory(prefix="bench_pycache_") as cold_prefix:
+                env = dict(os.environ, PYTHONPYCACHEPREFIX=cold_prefix if cold else warm_prefix)
+                start = time.perf_counter()
+                subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+                samples.append(time.perf_counter() - start)
+    return samples if cold else samples[1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="脚本启动耗时基准（冷 / 热）")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_zipapp_") as tmp:
+        pyz = os.path.join(tmp, "flutter_scripts.pyz")
+        subprocess.run([sys.executable, str(FLUTTER_DIR / "flutter_scripts.py"), "--build-zipapp", pyz],
+                       stdout=subprocess.DEVNULL, check=True)
+
+        print(f"{'命令':<44} {'冷启动 p50':>12} {'热启动 p50':>12}")
+        cases = [("flutter_scripts --help", [sys.executable, str(FLUTTER_DIR / "flutter_scripts.py"), "--help"])]
+        for name in SUBCOMMANDS:
+            cases += [
+                (f"{name}.py --help", [sys.executable, str(FLUTTER_DIR / f"{name}.py"), "--help"]),
+                (f"flutter_scripts {name} --help",
+                 [sys.executable, str(FLUTTER_DIR / "flutter_scripts.py"), name, "--help"]),
+                (f"flutter_scripts.pyz {name} --help", [sys.executable, pyz, name, "--help"]),
+            ]
+        for label, command in cases:
+            cold = statistics.median(measure(command, args.runs, cold=True))
+            warm = statistics.median(measure(command, args.runs, cold=False))
+            print(f"{label:<44} {cold * 1000:>10.1f}ms {warm * 1000:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
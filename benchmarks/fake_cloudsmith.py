@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""本地 Cloudsmith API 替身，用于测试 tools/cloudsmith_*.py
+
+    python3 benchmarks/fake_cloudsmith.py --packages 20000 --port 8765 --rate-limit 50
+    python3 tools/cloudsmith_clean.py org/app --cutoff 2024-06-06T00:00:00Z --api-host http://127.0.0.1:8765
+
+实现 GET /v1/packages/{owner}/{repo}/（page / page_size / sort=-date，X-Pagination-* 头）
+和 DELETE /v1/packages/{owner}/{repo}/{slug_perm}/；--rate-limit N 表示每秒超过 N 个请求时返回 429，
+--protected N 表示最早的 N 个包删除时返回 403。
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def generate_packages(count, names=50):
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    packages = []
+    for i in range(count):
+        uploaded = start + timedelta(minutes=37 * i)
+        packages.append({
+            "name": f"ap_module_{i % names}",
+            "slug": f"ap_module_{i % names}-{i}",
+            "slug_perm": f"perm{i:08d}",
+            "version": f"{1 + i // (names * 100)}.{(i // names) % 100}.{i % 7}",
+            "format": "dart",
+            "size": 1024 + i % 4096,
+            "uploaded_at": uploaded.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        })
+    return packages
+
+
+class FakeCloudsmith:
+    def __init__(self, packages, rate_limit=0, latency=0.0, protected=0):
+        self.packages = {package["slug_perm"]: package for package in packages}
+        self.protected = {package["slug_perm"] for package in packages[:protected]}
+        self.lock = threading.Lock()
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.window = (0, 0)
+        self.requests = 0
+        self.throttled = 0
+
+    def throttle(self):
+        """返回需要等待的秒数（0 表示放行）"""
+        if not self.rate_limit:
+            return 0
+        with self.lock:
+            second = int(time.time())
+            window_second, count = self.window
+            count = count + 1 if window_second == second else 1
+            self.window = (second, count)
+            if count > self.rate_limit:
+                self.throttled += 1
+                return 1
+        return 0
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=None, headers=None):
+            data = json.dumps(body).encode("utf-8") if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, str(value))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _prepare(self):
+            with state.lock:
+                state.requests += 1
+            if state.latency:
+                time.sleep(state.latency)
+            retry = state.throttle()
+            if retry:
+                self._send(429, {"detail": "Request was throttled."}, {"Retry-After": retry})
+                return None
+            parts = [part for part in urlparse(self.path).path.split("/") if part]
+            if len(parts) < 4 or parts[:2] != ["v1", "packages"]:
+                self._send(404, {"detail": "Not found."})
+                return None
+            return parts
+
+        def do_GET(self):
+            parts = self._prepare()
+            if parts is None:
+                return
+            query = parse_qs(urlparse(self.path).query)
+            page = int(query.get("page", ["1"])[0])
+            page_size = int(query.get("page_size", ["30"])[0])
+            with state.lock:
+                packages = list(state.packages.values())
+            if query.get("sort", [""])[0] == "-date":
+                packages.sort(key=lambda package: package["uploaded_at"], reverse=True)
+            page_total = max(1, -(-len(packages) // page_size))
+            if page > page_total:
+                self._send(404, {"detail": "Invalid page."})
+                return
+            self._send(200, packages[(page - 1) * page_size:page * page_size], {
+                "X-Pagination-Count": len(packages),
+                "X-Pagination-Page": page,
+                "X-Pagination-PageSize": page_size,
+                "X-Pagination-PageTotal": page_total,
+            })
+
+        def do_DELETE(self):
+            parts = self._prepare()
+            if parts is None:
+                return
+            if len(parts) > 4 and parts[4] in state.protected:
+                self._send(403, {"detail": "You do not have permission to perform this action."})
+                return
+            with state.lock:
+                removed = state.packages.pop(parts[4], None) if len(parts) > 4 else None
+            self._send(204 if removed else 404)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 Cloudsmith API 替身")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--packages", type=int, default=1000)
+    parser.add_argument("--rate-limit", type=int, default=0, help="每秒最大请求数，超过返回 429（0 表示不限）")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟（秒）")
+    parser.add_argument("--protected", type=int, default=0, help="最早上传的 N 个包删除时返回 403")
+    args = parser.parse_args()
+
+    state = FakeCloudsmith(generate_packages(args.packages), args.rate_limit, args.latency, args.protected)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(state))
+    print(f"🧪 fake cloudsmith: http://127.0.0.1:{args.port}（{args.packages} 个包）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"请求 {state.requests} 次，限流 {state.throttled} 次，剩余 {len(state.packages)} 个包")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""本地 pub 仓库 API 替身，用于测试 --resolver hosted（flutter/_pub_hosted.py）
+
+    python3 benchmarks/fake_pub_hosted.py --port 8766 --versions 40 --fail ap_module_3
+    python3 flutter/pub_upgrade.py --resolver hosted --hosted-url http://127.0.0.1:8766 --no-commit
+
+实现 GET /api/packages/{name}（pub v2 API，带 ETag，If-None-Match 命中时返回 304）；
+任意 ap_* 包名都有 1.0.0 ~ 1.{N-1}.0 的正式版、每个次版本一个 -dev 预发布版本，最新的正式版被撤回；
+--fail NAME 表示查询该包时返回 500，--missing NAME 表示返回 404。
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+def generate_versions(name, count):
+    versions = []
+    for minor in range(count):
+        versions.append({"version": f"1.{minor}.0-dev.1"})
+        versions.append({"version": f"1.{minor}.0"})
+    versions.append({"version": f"1.{count}.0", "retracted": True})
+    return {"name": name, "latest": versions[-2], "versions": versions}
+
+
+class FakePubHosted:
+    def __init__(self, versions=40, latency=0.0, fail=(), missing=()):
+        self.versions = versions
+        self.latency = latency
+        self.fail = set(fail)
+        self.missing = set(missing)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=None, headers=None):
+            data = json.dumps(body).encode("utf-8") if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/vnd.pub.v2+json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, str(value))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            with state.lock:
+                state.requests += 1
+            if state.latency:
+                time.sleep(state.latency)
+            parts = [part for part in urlparse(self.path).path.split("/") if part]
+            if len(parts) != 3 or parts[:2] != ["api", "packages"]:
+                self._send(404, {"error": {"code": "NotFound", "message": "Not found."}})
+                return
+            name = parts[2]
+            if name in state.fail:
+                self._send(500, {"error": {"code": "InternalError", "message": "Internal server error."}})
+                return
+            if name in state.missing or not name.startswith("ap_"):
+                self._send(404, {"error": {"code": "NotFound", "message": f"Package \"{name}\" was not found"}})
+                return
+            body = generate_versions(name, state.versions)
+            etag = '"' + hashlib.sha1(json.dumps(body).encode("utf-8")).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                with state.lock:
+                    state.not_modified += 1
+                self._send(304, headers={"ETag": etag})
+                return
+            self._send(200, body, {"ETag": etag})
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 pub 仓库 API 替身")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--versions", type=int, default=40, help="每个包的次版本数量")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的延迟（秒）")
+    parser.add_argument("--fail", nargs="*", default=[], metavar="NAME", help="查询时返回 500 的包")
+    parser.add_argument("--missing", nargs="*", default=[], metavar="NAME", help="查询时返回 404 的包")
+    args = parser.parse_args()
+
+    state = FakePubHosted(args.versions, args.latency, args.fail, args.missing)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(state))
+    print(f"🧪 fake pub hosted: http://127.0.0.1:{args.port}（每个包 {args.versions} 个次版本）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"请求 {state.requests} 次，304 命中 {state.not_modified} 次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""脚本共享的磁盘结果缓存（~/.script_tool/cache）"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+CACHE_ROOT = Path(os.environ.get("SCRIPT_TOOL_CACHE_DIR", Path.home() / ".script_tool" / "cache"))
+
+
+def hash_key(*parts) -> str:
+    """把若干 bytes/str/None 片段组合成稳定的缓存 key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b"\0none"
+        elif isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def hash_files(*paths) -> str:
+    """按文件内容计算 key，不存在的文件也参与计算"""
+    contents = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                contents.append(f.read())
+        except FileNotFoundError:
+            contents.append(None)
+    return hash_key(*contents)
+
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0
+
+
+class ResultCache:
+    """带 TTL 和条目上限的 JSON 结果缓存，超出上限时按最近使用时间淘汰"""
+
+    def __init__(self, namespace, ttl=None, max_entries=128):
+        self.directory = CACHE_ROOT / namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def _path(self, key):
+        return self.directory / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if self.ttl is not None and time.time() - entry.get("created", 0) > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return entry.get("value")
+
+    def put(self, key, value):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created": time.time(), "value": value}, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        entries = list(self.directory.glob("*.json"))
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=_mtime)
+        for path in entries[:len(entries) - self.max_entries]:
+            path.unlink(missing_ok=True)
@@ -0,0 +1,333 @@
+"""共享的子进程执行器：流式读取输出、固定内存上限、超时后终止整个进程组
+
+- run(command, ...) 分块读取 stdout/stderr，按行回调 on_line 或实时回显；
+  捕获的输出保存在环形缓冲区中，超过 max_output 字节时只保留末尾；
+- 每个命令都有超时（按命令类型取默认值，SCRIPT_TOOL_TIMEOUT 统一覆盖，0 表示不限制），
+  超时后先 SIGTERM 再 SIGKILL；
+- 默认继承终端（git push / pull 仍可提示输入 HTTPS 凭据或 SSH 密码），超时只终止命令本身；
+  isolate=True 时子进程在独立会话中运行、stdin 为空，需要交互输入时直接失败而不是一直挂起，
+  超时后终止整个进程组（flutter 会再启动 dart 子进程）；run_many 默认隔离；
+- run_many(commands, jobs) 在 asyncio 上并发执行互不依赖的命令（asyncio 按需导入，不拖慢脚本启动）。
+"""
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+MAX_OUTPUT = 4 * 1024 * 1024  # 每个流最多保留的字节数
+MAX_LINE = 1024 * 1024        # on_line 回调时单行的最大长度，超过时强制切分
+CHUNK_SIZE = 64 * 1024
+KILL_GRACE = 5.0
+DEFAULT_TIMEOUT = 300
+TIMEOUTS = {
+    "flutter pub get": 900,
+    "flutter pub outdated": 900,
+    "flutter pub publish": 1800,
+    "git clone": 900,
+    "git fetch": 600,
+    "git pull": 600,
+    "git push": 600,
+}
+
+DEFAULT = object()
+
+if os.name == "nt":
+    GROUP_OPTIONS = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    GROUP_OPTIONS = {"start_new_session": True}
+
+
+def _popen_options(isolate):
+    return {"stdin": subprocess.DEVNULL, **GROUP_OPTIONS} if isolate else {}
+
+
+def command_label(command):
+    """['git', 'commit', '-m', msg] -> 'git commit'，用作阶段名和超时类型"""
+    label = []
+    for part in command[:3]:
+        part = str(part)
+        if part.startswith("-") or "/" in part or "." in part or " " in part:
+            break
+        label.append(part)
+    return " ".join(label) or str(command[0])
+
+
+def default_timeout(command):
+    override = os.environ.get("SCRIPT_TOOL_TIMEOUT")
+    if override:
+        return float(override) or None
+    return TIMEOUTS.get(command_label(command), DEFAULT_TIMEOUT)
+
+
+class RingBuffer:
+    """只保留最后 limit 字节（limit=None 时不限制）"""
+    __slots__ = ("limit", "chunks", "size", "total")
+
+    def __init__(self, limit=MAX_OUTPUT):
+        self.limit = limit
+        self.chunks = deque()
+        self.size = 0
+        self.total = 0
+
+    def append(self, data):
+        self.chunks.append(data)
+        self.size += len(data)
+        self.total += len(data)
+        if self.limit is None:
+            return
+        while self.size > self.limit:
+            excess = self.size - self.limit
+            first = self.chunks[0]
+            if len(first) <= excess:
+                self.chunks.popleft()
+                self.size -= len(first)
+            else:
+                self.chunks[0] = first[excess:]
+                self.size -= excess
+
+    @property
+    def dropped(self):
+        return self.total - self.size
+
+    def getvalue(self):
+        return b"".join(self.chunks)
+
+
+class OutputStream:
+    """一个输出流：写入环形缓冲区，并把完整的行交给 on_line(流名, 行)"""
+
+    def __init__(self, name, limit, on_line):
+        self.name = name
+        self.buffer = RingBuffer(limit)
+        self.on_line = on_line
+        self.partial = b""
+
+    def feed(self, data):
+        self.buffer.append(data)
+        if self.on_line is None:
+            return
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        if len(self.partial) > MAX_LINE:
+            lines.append(self.partial)
+            self.partial = b""
+        for line in lines:
+            self.on_line(self.name, line.rstrip(b"\r").decode("utf-8", "replace"))
+
+    def close(self):
+        if self.partial and self.on_line is not None:
+            self.on_line(self.name, self.partial.rstrip(b"\r").decode("utf-8", "replace"))
+        self.partial = b""
+
+    def value(self, text):
+        data = self.buffer.getvalue()
+        if not text:
+            return data
+        return data.decode("utf-8", "replace").replace("\r\n", "\n")
+
+
+class CommandResult(subprocess.CompletedProcess):
+    """subprocess.CompletedProcess 加上耗时、是否超时和输出统计"""
+
+    def __init__(self, args, returncode, stdout, stderr, started, duration, timed_out, output_bytes, dropped_bytes):
+        super().__init__(args, returncode, stdout, stderr)
+        self.started = started
+        self.duration = duration
+        self.timed_out = timed_out
+        self.output_bytes = output_bytes
+        self.dropped_bytes = dropped_bytes
+
+
+def _line_handler(on_line, echo, prefix):
+    """组合 on_line 和回显；两个读取方同时回调时加锁保证行不交错"""
+    if on_line is None and not echo:
+        return None
+    lock = threading.Lock()
+
+    def handle(name, line):
+        with lock:
+            if echo:
+                print(f"{prefix}{line}", file=sys.stderr if name == "stderr" else sys.stdout, flush=True)
+            if on_line is not None:
+                on_line(name, line)
+    return handle
+
+
+def _open_streams(max_output, on_line, echo, prefix):
+    handler = _line_handler(on_line, echo, prefix)
+    return OutputStream("stdout", max_output, handler), OutputStream("stderr", max_output, handler)
+
+
+def _signal(process, sig, group):
+    """group=True 时发给整个进程组（仅 isolate 的子进程有自己的进程组），否则只发给命令本身"""
+    try:
+        if group:
+            os.killpg(process.pid, sig)
+        else:
+            os.kill(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _taskkill(process, group):
+    command = ["taskkill", "/F", "/PID", str(process.pid)]
+    if group:
+        command.insert(2, "/T")
+    subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def kill_group(process, group=True):
+    """终止命令（group=True 时为整个进程组）：先 SIGTERM，KILL_GRACE 秒后 SIGKILL"""
+    if os.name == "nt":
+        _taskkill(process, group)
+        process.wait()
+        return
+    _signal(process, signal.SIGTERM, group)
+    try:
+        process.wait(KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        pass
+    _signal(process, signal.SIGKILL, group)
+    process.wait()
+
+
+def _finish(command, returncode, streams, started, timeout, timed_out, text, check):
+    stdout, stderr = (stream.value(text) for stream in streams)
+    if timed_out:
+        note = f"⏰ 命令超时（{timeout:g} 秒），已终止进程组: {' '.join(map(str, command))}\n"
+        stderr = stderr + (note if text else note.encode("utf-8"))
+        if not returncode:
+            returncode = -signal.SIGKILL if os.name != "nt" else 1
+    result = CommandResult(command, returncode, stdout, stderr, started, time.perf_counter() - started, timed_out,
+                           sum(stream.buffer.total for stream in streams),
+                           sum(stream.buffer.dropped for stream in streams))
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command, stdout, stderr)
+    return result
+
+
+def _pump(pipe, stream):
+    try:
+        while True:
+            data = pipe.read1(CHUNK_SIZE)
+            if not data:
+                break
+            stream.feed(data)
+    finally:
+        stream.close()
+        pipe.close()
+
+
+def run(command, cwd=None, env=None, timeout=DEFAULT, check=False, text=True, max_output=MAX_OUTPUT,
+        on_line=None, echo=False, prefix="", isolate=False):
+    """执行命令并流式读取输出，返回 CommandResult
+
+    timeout 默认按命令类型取值（None 表示不限制）；超时时返回非 0 退出码并在 stderr 末尾注明。
+    max_output=None 时完整保留输出（如 git archive 的二进制内容）。
+    isolate=True 时不继承终端，超时后终止整个进程组。
+    """
+    if timeout is DEFAULT:
+        timeout = default_timeout(command)
+    streams = _open_streams(max_output, on_line, echo, prefix)
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               **_popen_options(isolate))
+    readers = [threading.Thread(target=_pump, args=(pipe, stream), daemon=True)
+               for pipe, stream in zip((process.stdout, process.stderr), streams)]
+    for reader in readers:
+        reader.start()
+
+    deadline = None if timeout is None else started + timeout
+    timed_out = False
+    try:
+        process.wait(timeout)
+        # 后台孙进程可能仍持有管道，读取同样受超时限制
+        for reader in readers:
+            reader.join(None if deadline is None else max(0.0, deadline - time.perf_counter()))
+        timed_out = any(reader.is_alive() for reader in readers)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+    except BaseException:
+        kill_group(process, isolate)
+        raise
+    if timed_out:
+        kill_group(process, isolate)
+        # 未隔离时孙进程不会被终止，可能仍持有管道：所有读取线程共用一个等待期限
+        grace = time.perf_counter() + KILL_GRACE
+        for reader in readers:
+            reader.join(max(0.0, grace - time.perf_counter()))
+    return _finish(command, process.returncode, streams, started, timeout, timed_out, text, check)
+
+
+async def run_async(command, cwd=None, env=None, timeout=DEFAULT, check=False, text=True, max_output=MAX_OUTPUT,
+                    on_line=None, echo=False, prefix="", isolate=False):
+    """run() 的 asyncio 版本"""
+    import asyncio
+
+    if timeout is DEFAULT:
+        timeout = default_timeout(command)
+    streams = _open_streams(max_output, on_line, echo, prefix)
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(*map(str, command), cwd=cwd, env=env, stdout=subprocess.PIPE,
+                                                   stderr=subprocess.PIPE, **_popen_options(isolate))
+
+    async def pump(reader, stream):
+        try:
+            while True:
+                data = await reader.read(CHUNK_SIZE)
+                if not data:
+                    break
+                stream.feed(data)
+        finally:
+            stream.close()
+
+    timed_out = False
+    try:
+        await asyncio.wait_for(asyncio.gather(pump(process.stdout, streams[0]), pump(process.stderr, streams[1]),
+                                              process.wait()), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+    finally:
+        if process.returncode is None or timed_out:
+            await _kill_group_async(process, isolate)
+    return _finish(command, process.returncode, streams, started, timeout, timed_out, text, check)
+
+
+async def _kill_group_async(process, group=True):
+    import asyncio
+
+    if os.name == "nt":
+        _taskkill(process, group)
+        await process.wait()
+        return
+    _signal(process, signal.SIGTERM, group)
+    try:
+        await asyncio.wait_for(process.wait(), KILL_GRACE)
+    except asyncio.TimeoutError:
+        pass
+    _signal(process, signal.SIGKILL, group)
+    await process.wait()
+
+
+def run_many(commands, jobs=8, isolate=True, **kwargs):
+    """在 asyncio 上并发执行互不依赖的命令，最多 jobs 个同时运行，按输入顺序返回结果
+
+    commands 的元素是命令列表，或 (命令列表, 单独的参数 dict)，如 (["git", "pull"], {"cwd": repo})。
+    并发的命令无法共用终端交互，默认 isolate=True。
+    """
+    import asyncio
+
+    kwargs["isolate"] = isolate
+    async def execute():
+        semaphore = asyncio.Semaphore(max(1, jobs))
+
+        async def one(item):
+            command, options = item if isinstance(item, tuple) else (item, {})
+            async with semaphore:
+                return await run_async(command, **{**kwargs, **options})
+        return await asyncio.gather(*(one(item) for item in commands))
+
+    return asyncio.run(execute())
@@ -0,0 +1,165 @@
+"""脚本共享的 git 层
+
+- 每个仓库只执行一次 `git ls-remote --heads`，远程分支结果在本次运行内复用；
+- push 后解析 HEAD 走常驻的 `git cat-file --batch-check` 进程，不再每次启动 git；
+- interactive=False 时网络命令（ls-remote / pull / push）不继承终端并设置 GIT_TERMINAL_PROMPT=0，
+  需要凭据时直接失败，供多个仓库并发操作时使用；
+- 所有 git 调用都记录耗时，设置 SCRIPT_TOOL_GIT_TIMING=1 时在退出前打印汇总。
+"""
+import atexit
+import os
+import subprocess
+import threading
+import time
+
+import _trace
+
+TIMING_ENABLED = os.environ.get("SCRIPT_TOOL_GIT_TIMING") == "1"
+# 非交互模式下凭据 / 密码缺失时 git 和 ssh 的报错
+AUTH_ERRORS = ("terminal prompts disabled", "could not read Username", "could not read Password",
+               "Permission denied", "Host key verification failed", "Authentication failed")
+
+timings = []
+_repos = {}
+_repos_lock = threading.Lock()
+
+
+class GitRepo:
+    def __init__(self, cwd=None, remote="origin"):
+        self.cwd = os.path.abspath(cwd or ".")
+        self.remote = remote
+        self._lock = threading.Lock()
+        self._branch = None
+        self._remote_heads = None
+        self.remote_error = None
+        self._batch = None
+        self.interactive = True
+
+    # ---------- 基础调用 ----------
+    def run(self, *args, check=False, network=False):
+        """执行 git 子命令并记录耗时；check=True 时失败抛出 CalledProcessError"""
+        command = ["git", *args]
+        options = {}
+        if network and not self.interactive:
+            options = {"isolate": True, "env": {**os.environ, "GIT_TERMINAL_PROMPT": "0"}}
+        start = time.perf_counter()
+        result = _trace.run(command, cwd=self.cwd, **options)
+        label = " ".join([args[0], *(arg for arg in args[1:2] if arg.startswith("-"))])
+        timings.append((label, time.perf_counter() - start, result.returncode))
+        if check and result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, command, result.stdout, result.stderr)
+        return result
+
+    def _batch_process(self):
+        if self._batch is None or self._batch.poll() is not None:
+            self._batch = subprocess.Popen(["git", "cat-file", "--batch-check"], cwd=self.cwd,
+                                           stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return self._batch
+
+    def close(self):
+        if self._batch is not None and self._batch.poll() is None:
+            self._batch.stdin.close()
+            self._batch.wait()
+        self._batch = None
+
+    # ---------- 读取 ----------
+    def rev_parse(self, rev="HEAD"):
+        """解析为对象 sha，不存在时返回 None"""
+        with self._lock, _trace.span("git cat-file --batch-check", "subprocess", object=rev):
+            start = time.perf_counter()
+            process = self._batch_process()
+            process.stdin.write(rev.encode("utf-8") + b"\n")
+            process.stdin.flush()
+            header = process.stdout.readline().decode("utf-8").split()
+            timings.append(("cat-file --batch-check", time.perf_counter() - start, 0))
+        return header[0] if len(header) == 3 else None
+
+    def current_branch(self):
+        if self._branch is None:
+            self._branch = self.run("rev-parse", "--abbrev-ref", "HEAD").stdout.strip()
+        return self._branch
+
+    def toplevel(self):
+        return self.run("rev-parse", "--show-toplevel").stdout.strip() or self.cwd
+
+    def remote_heads(self):
+        """{branch: sha}，每次运行只访问一次远程；访问失败时为空，错误保存在 remote_error"""
+        with self._lock:
+            if self._remote_heads is None:
+                result = self.run("ls-remote", "--heads", self.remote, network=True)
+                if result.returncode != 0:
+                    self.remote_error = result.stderr.strip()
+                heads = {}
+                for line in result.stdout.splitlines():
+                    sha, _, ref = line.partition("\t")
+                    heads[ref.removeprefix("refs/heads/")] = sha
+                self._remote_heads = heads
+        return self._remote_heads
+
+    def has_remote_branch(self, branch):
+        return branch in self.remote_heads()
+
+    def check_ignore(self, paths):
+        if not paths:
+            return set()
+        return set(self.run("check-ignore", *paths).stdout.splitlines())
+
+    # ---------- 写入 ----------
+    def pull(self, check=False):
+        return self.run("pull", check=check, network=True)
+
+    def add(self, *paths, check=True):
+        return self.run("add", *paths, check=check)
+
+    def commit(self, message, check=True):
+        return self.run("commit", "-m", message, check=check)
+
+    def push(self, check=True):
+        result = self.run("push", check=check, network=True)
+        if result.returncode == 0 and self._remote_heads is not None:
+            self._remote_heads[self.current_branch()] = self.rev_parse("HEAD")
+        return result
+
+    def commit_and_push(self, paths, message, push=True):
+        """add + commit（+ push），返回是否已推送"""
+        self.add(*paths)
+        self.commit(message)
+        if push:
+            self.push()
+        return push
+
+
+def repo(cwd=None):
+    """按目录复用 GitRepo，让同一次运行中的所有调用共享缓存和常驻进程"""
+    key = os.path.abspath(cwd or ".")
+    with _repos_lock:
+        if key not in _repos:
+            _repos[key] = GitRepo(key)
+        return _repos[key]
+
+
+def is_auth_error(stderr):
+    return any(pattern in (stderr or "") for pattern in AUTH_ERRORS)
+
+
+def report_timings():
+    if not timings:
+        return
+    totals = {}
+    for name, seconds, _ in timings:
+        count, total = totals.get(name, (0, 0.0))
+        totals[name] = (count + 1, total + seconds)
+    print("\n⏱ git 调用耗时：")
+    for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        print(f"  {name:<28} {count:>4} 次  {total * 1000:>9.1f} ms")
+    print(f"  {'合计':<28} {len(timings):>4} 次  {sum(t for _, t, _ in timings) * 1000:>9.1f} ms")
+
+
+def _shutdown():
+    for git_repo in list(_repos.values()):
+        git_repo.close()
+    if TIMING_ENABLED:
+        report_timings()
+
+
+atexit.register(_shutdown)
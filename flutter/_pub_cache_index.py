@@ -0,0 +1,108 @@
+"""基于本地 ~/.pub-cache 的离线版本索引，按目录 mtime 增量重建"""
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+import _semver
+from _cache import ResultCache, hash_key
+from _pub_hosted import filter_outdated, read_hosted_dependencies
+
+PACKAGE_DIR_PATTERN = re.compile(r'^([a-z0-9_]+)-(\d+\.\d+\.\d+\S*)$')
+VERSIONS_FILE_SUFFIX = "-versions.json"
+
+
+def default_pub_cache():
+    if os.environ.get("PUB_CACHE"):
+        return Path(os.environ["PUB_CACHE"])
+    if sys.platform == "win32":
+        return Path(os.environ.get("LOCALAPPDATA", Path.home())) / "Pub" / "Cache"
+    return Path.home() / ".pub-cache"
+
+
+def _mtime(path):
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def scan_host_dir(host_dir):
+    """扫描一个 hosted/<host> 目录：已下载的包目录 + .cache 中的版本列表"""
+    packages = {}
+    with os.scandir(host_dir) as entries:
+        for entry in entries:
+            match = PACKAGE_DIR_PATTERN.match(entry.name)
+            if match and entry.is_dir():
+                packages.setdefault(match.group(1), set()).add(match.group(2))
+
+    listing_dir = host_dir / ".cache"
+    if listing_dir.is_dir():
+        for listing in listing_dir.glob(f"*{VERSIONS_FILE_SUFFIX}"):
+            name = listing.name[:-len(VERSIONS_FILE_SUFFIX)]
+            try:
+                with open(listing, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            packages.setdefault(name, set()).update(
+                v["version"] for v in data.get("versions", []) if not v.get("retracted"))
+
+    return {name: sorted(versions, key=_semver.sort_key) for name, versions in packages.items()}
+
+
+class PubCacheIndex:
+    """{package: VersionIndex}，各 host 的升序版本列表持久化到结果缓存，下次只重扫 mtime 变化的 host 目录"""
+
+    def __init__(self, pub_cache=None):
+        self.pub_cache = Path(pub_cache or default_pub_cache())
+        self.store = ResultCache("pub_cache_index", max_entries=8)
+        self.store_key = hash_key(str(self.pub_cache.resolve()))
+        self.hosts = {}
+        self.packages = {}
+
+    def load(self):
+        hosted_root = self.pub_cache / "hosted"
+        previous = self.store.get(self.store_key) or {}
+        rescanned = 0
+
+        if hosted_root.is_dir():
+            for host_dir in sorted(p for p in hosted_root.iterdir() if p.is_dir()):
+                stamp = [_mtime(host_dir), _mtime(host_dir / ".cache")]
+                cached = previous.get(host_dir.name)
+                if cached and cached["stamp"] == stamp:
+                    self.hosts[host_dir.name] = cached
+                else:
+                    self.hosts[host_dir.name] = {"stamp": stamp, "packages": scan_host_dir(host_dir)}
+                    rescanned += 1
+
+        if rescanned or set(previous) != set(self.hosts):
+            self.store.put(self.store_key, self.hosts)
+
+        merged = {}
+        for host in self.hosts.values():
+            for name, versions in host["packages"].items():
+                merged.setdefault(name, []).extend(versions)
+        self.packages = {name: _semver.VersionIndex(versions) for name, versions in merged.items()}
+        return rescanned
+
+    def latest(self, name, version_prefix=None):
+        index = self.packages.get(name)
+        latest = index.latest(prefix=version_prefix) if index else None
+        return str(latest) if latest else None
+
+    def latest_versions(self, names, version_prefix=None):
+        latest = {name: self.latest(name, version_prefix) for name in names}
+        return {name: version for name, version in latest.items() if version}
+
+
+def get_latest_packages(pubspec_file, accept, version_prefix=None, only_outdated=True, index=None):
+    """与 flutter pub outdated 结果格式一致的 {name: latest}，完全离线"""
+    if index is None:
+        index = PubCacheIndex()
+        index.load()
+
+    dependencies = read_hosted_dependencies(pubspec_file, accept)
+    latest = index.latest_versions(dependencies, version_prefix)
+    return filter_outdated(pubspec_file, dependencies, latest) if only_outdated else latest
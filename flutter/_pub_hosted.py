@@ -0,0 +1,177 @@
+"""直接查询 pub 仓库 API 获取私有依赖最新版本（替代 flutter pub outdated）"""
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import _semver
+from _cache import ResultCache, hash_key
+from _pub_lock import locked_versions
+from _pubspec import PubspecDocument
+
+DEFAULT_HOSTED_URL = os.environ.get("PUB_HOSTED_URL", "https://pub.dev")
+PUB_API_ACCEPT = "application/vnd.pub.v2+json"
+DEPENDENCY_SECTIONS = ("dependencies", "dependency_overrides")
+
+
+class HostedError(Exception):
+    """查询 pub 仓库 API 失败；errors 为 [(包名, hosted 地址, 错误信息)]"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("\n".join(f"❌ 查询 {name} 的版本失败（{url}）：{error}" for name, url, error in errors))
+
+def read_hosted_dependencies(pubspec_file, accept):
+    """读取 pubspec.yaml 中满足 accept(name) 的依赖，返回 {name: (hosted_url, constraint)}"""
+    doc = PubspecDocument.load(pubspec_file)
+    dependencies = {}
+    for dep in doc.dependencies(DEPENDENCY_SECTIONS):
+        if not accept(dep.name):
+            continue
+        hosted = None
+        if "hosted" in dep.fields:
+            hosted = doc.value(doc.span(dep.fields["hosted"]))
+        if not hosted and "url" in dep.fields and "git" not in dep.fields:
+            hosted = doc.value(doc.span(dep.fields["url"]))
+        dependencies[dep.name] = (hosted, doc.constraint(dep))
+    return dependencies
+
+
+def select_latest(versions, version_prefix=None):
+    """在版本列表中挑出最新的正式版本，可选限定 X.Y.* 前缀"""
+    latest = _semver.VersionIndex(versions).latest(prefix=version_prefix)
+    return str(latest) if latest else None
+
+
+def load_pub_tokens():
+    """读取 dart pub token add 保存的 token，返回 [(url, token)]"""
+    if sys.platform == "darwin":
+        config_dir = Path.home() / "Library" / "Application Support"
+    elif sys.platform == "win32":
+        config_dir = Path(os.environ.get("APPDATA", Path.home()))
+    else:
+        config_dir = Path(os.environ.get("XDG_CONFIG_HOME", Path.home() / ".config"))
+    try:
+        with open(config_dir / "dart" / "pub-tokens.json", 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return []
+
+    tokens = []
+    for entry in data.get("hosted", []):
+        token = entry.get("token") or os.environ.get(entry.get("env", ""), "")
+        if entry.get("url") and token:
+            tokens.append((entry["url"].rstrip("/"), token))
+    return tokens
+
+
+def filter_outdated(pubspec_file, dependencies, latest):
+    """只保留比 pubspec.lock（或 pubspec.yaml 约束下限）更新的版本；没有下限（如 any）时保留"""
+    locked = locked_versions(os.path.dirname(pubspec_file) or ".")
+    outdated = {}
+    for name, version in latest.items():
+        current = _semver.parse(locked.get(name))
+        if current is None:
+            constraint = (dependencies[name][1] or "any").strip("'\"")
+            current = _semver.VersionConstraint.parse(constraint).min
+        if current is None or current.is_prerelease or _semver.parse(version) > current:
+            outdated[name] = version
+    return outdated
+
+
+class HostedClient:
+    """基于连接池 requests.Session 的并发版本查询，支持 ETag 条件请求；同一个包在本次运行内只查询一次"""
+
+    def __init__(self, workers=8, timeout=30):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.workers = workers
+        self.timeout = timeout
+        self.tokens = load_pub_tokens()
+        self.etag_cache = ResultCache("pub_hosted", max_entries=4096)
+        self.fetched = {}  # {(hosted_url, name): versions}
+        self._fetched_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = PUB_API_ACCEPT
+
+    def _headers(self, hosted_url):
+        for url, token in self.tokens:
+            if hosted_url.startswith(url):
+                return {"Authorization": f"Bearer {token}"}
+        return {}
+
+    def fetch_versions(self, hosted_url, name):
+        """返回 name 在 hosted_url 上所有未撤回的版本号"""
+        hosted_url = hosted_url.rstrip("/")
+        with self._fetched_lock:
+            fetched = self.fetched.get((hosted_url, name))
+        if fetched is not None:
+            return fetched
+        versions = self._request_versions(hosted_url, name)
+        with self._fetched_lock:
+            self.fetched[(hosted_url, name)] = versions
+        return versions
+
+    def _request_versions(self, hosted_url, name):
+        cache_key = hash_key(hosted_url, name)
+        cached = self.etag_cache.get(cache_key)
+        headers = self._headers(hosted_url)
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+
+        response = self.session.get(f"{hosted_url}/api/packages/{name}",
+                                    headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and cached:
+            return cached["versions"]
+        response.raise_for_status()
+
+        versions = [v["version"] for v in response.json().get("versions", [])
+                    if not v.get("retracted")]
+        if response.headers.get("ETag"):
+            self.etag_cache.put(cache_key, {"etag": response.headers["ETag"], "versions": versions})
+        return versions
+
+    def _fetch(self, hosted_url, name):
+        """返回 (版本列表, 错误信息)，HTTP / 连接错误不抛出，由调用方统一报告"""
+        import requests
+
+        try:
+            return self.fetch_versions(hosted_url, name), None
+        except requests.RequestException as e:
+            return None, str(e)
+
+    def prefetch(self, dependencies):
+        """预先并发查询 {name: hosted_url}，失败的包忽略（正式解析时会重新查询并报告）"""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(lambda n: self._fetch(dependencies[n], n), list(dependencies)))
+
+    def latest_versions(self, dependencies, version_prefix=None):
+        """dependencies: {name: hosted_url}，返回 {name: latest}；任一依赖查询失败时抛出 HostedError"""
+        names = list(dependencies)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(lambda n: self._fetch(dependencies[n], n), names))
+        errors = [(name, dependencies[name], error) for name, (_, error) in zip(names, results) if error]
+        if errors:
+            raise HostedError(errors)
+        latest = {name: select_latest(versions, version_prefix) for name, (versions, _) in zip(names, results)}
+        return {name: version for name, version in latest.items() if version}
+
+
+def query_urls(dependencies, hosted_url=None):
+    """read_hosted_dependencies 的结果 -> {name: 实际查询的 hosted 地址}"""
+    return {name: hosted_url or hosted or DEFAULT_HOSTED_URL for name, (hosted, _) in dependencies.items()}
+
+
+def get_latest_packages(pubspec_file, accept, version_prefix=None, hosted_url=None,
+                        only_outdated=True, workers=8, client=None):
+    """与 flutter pub outdated 结果格式一致的 {name: latest}；client 用于复用已预取的结果"""
+    dependencies = read_hosted_dependencies(pubspec_file, accept)
+    client = client or HostedClient(workers=workers)
+    latest = client.latest_versions(query_urls(dependencies, hosted_url), version_prefix)
+    return filter_outdated(pubspec_file, dependencies, latest) if only_outdated else latest
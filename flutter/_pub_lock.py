@@ -0,0 +1,163 @@
+"""pubspec.lock 快速解析与约束校验：判断 flutter pub get 是否可以跳过"""
+import os
+import re
+
+import _semver
+from _cache import ResultCache, hash_key
+from _pubspec import DEPENDENCY_SECTIONS, PubspecDocument
+
+LOCK_PACKAGE_PATTERN = re.compile(r'^ {2}(\S+):\s*$')
+LOCK_FIELD_PATTERN = re.compile(r'^ {4}(dependency|source|version):\s*"?([^"\n]*)"?\s*$')
+LOCK_DESCRIPTION_PATTERN = re.compile(r'^ {4}description:\s*$')
+LOCK_DESCRIPTION_FIELD_PATTERN = re.compile(r'^ {6}(\S+):\s*"?([^"\n]*)"?\s*$')
+LOCK_FORMAT = "2"  # 解析结果的格式版本，变化时旧缓存自动失效
+
+lock_cache = ResultCache("pub_lock", max_entries=512)
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return hash_key(os.path.abspath(path), str(stat.st_mtime_ns), str(stat.st_size), LOCK_FORMAT)
+
+
+def parse_lock(lock_path):
+    """返回 {name: {"dependency", "source", "version", "description"}}；结果按文件 mtime+size 缓存
+
+    description 是 {url, ref, path, ...}（hosted / git 依赖），sdk 依赖的标量 description 不保存。
+    """
+    try:
+        cache_key = _stat_key(lock_path)
+    except FileNotFoundError:
+        return None
+    cached = lock_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    packages = {}
+    current = None
+    in_packages = False
+    with open(lock_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.startswith(" "):
+                in_packages = line.startswith("packages:")
+                continue
+            if not in_packages:
+                continue
+            match = LOCK_PACKAGE_PATTERN.match(line)
+            if match:
+                current = packages.setdefault(match.group(1), {})
+                description = None
+                continue
+            if current is None:
+                continue
+            if LOCK_DESCRIPTION_PATTERN.match(line):
+                description = current["description"] = {}
+                continue
+            match = LOCK_DESCRIPTION_FIELD_PATTERN.match(line)
+            if match and description is not None:
+                description[match.group(1)] = match.group(2)
+                continue
+            description = None
+            match = LOCK_FIELD_PATTERN.match(line)
+            if match:
+                current[match.group(1)] = match.group(2)
+
+    lock_cache.put(cache_key, packages)
+    return packages
+
+
+def locked_versions(package_dir):
+    packages = parse_lock(os.path.join(package_dir, "pubspec.lock")) or {}
+    return {name: info.get("version") for name, info in packages.items()}
+
+
+def dependency_source(dep):
+    # git 依赖可以有 path: 子字段，必须先判断 git
+    for source in ("git", "path", "sdk"):
+        if source in dep.fields:
+            return source
+    return "hosted"
+
+
+def _field(doc, dep, key):
+    return doc.value(doc.span(dep.fields.get(key)))
+
+
+def _normalize_url(url):
+    return (url or "").rstrip("/")
+
+
+def description_changed(doc, dep, source, description):
+    """pubspec 中 git 的 url / ref / path、hosted 的地址与 lock 的 description 不一致时返回变化的字段"""
+    if source == "git":
+        # 简写 `git: URL` 时 url 就是 git 的值；lock 中缺省的 ref 为 HEAD、path 为 "."
+        expected = {
+            "url": _normalize_url(_field(doc, dep, "git") or _field(doc, dep, "url")),
+            "ref": _field(doc, dep, "ref") or "HEAD",
+            "path": _field(doc, dep, "path") or ".",
+        }
+        actual = {
+            "url": _normalize_url(description.get("url")),
+            "ref": description.get("ref") or "HEAD",
+            "path": description.get("path") or ".",
+        }
+        return [key for key in expected if expected[key] != actual[key]]
+    if source == "hosted":
+        # 只比较 pubspec 中显式写出的地址（hosted: URL 或 hosted: {url: URL}）；默认地址由环境决定
+        url = _field(doc, dep, "hosted") or _field(doc, dep, "url")
+        if url and _normalize_url(url) != _normalize_url(description.get("url")):
+            return ["url"]
+    return []
+
+
+def check_lock(package_dir):
+    """证明现有 pubspec.lock 仍满足 pubspec.yaml，返回 (是否满足, 原因)"""
+    lock_path = os.path.join(package_dir, "pubspec.lock")
+    packages = parse_lock(lock_path)
+    if packages is None:
+        return False, "没有 pubspec.lock"
+    if not os.path.exists(os.path.join(package_dir, ".dart_tool", "package_config.json")):
+        return False, "没有 .dart_tool/package_config.json"
+
+    doc = PubspecDocument.load(os.path.join(package_dir, "pubspec.yaml"))
+    lock_mtime = os.stat(lock_path).st_mtime_ns
+    direct = set()
+    for dep in doc.dependencies(DEPENDENCY_SECTIONS):
+        direct.add(dep.name)
+        locked = packages.get(dep.name)
+        if locked is None:
+            return False, f"{dep.name} 不在 pubspec.lock 中"
+        source = dependency_source(dep)
+        if locked.get("source") != source:
+            return False, f"{dep.name} 的来源变为 {source}"
+        changed = description_changed(doc, dep, source, locked.get("description") or {})
+        if changed:
+            return False, f"{dep.name} 的 {source} {'/'.join(changed)} 已变化"
+        if source == "hosted" and not _semver.allows(doc.constraint(dep), locked.get("version", "")):
+            return False, f"{dep.name} {locked.get('version')} 不满足 {doc.constraint(dep)}"
+        if source == "path":
+            path = doc.value(doc.span(dep.fields["path"])) or ""
+            dep_pubspec = os.path.join(package_dir, path, "pubspec.yaml")
+            if not os.path.exists(dep_pubspec) or os.stat(dep_pubspec).st_mtime_ns > lock_mtime:
+                return False, f"path 依赖 {dep.name} 已变化"
+
+    for name, info in packages.items():
+        if info.get("dependency", "").startswith("direct") and name not in direct:
+            return False, f"{name} 已从 pubspec.yaml 移除"
+    return True, "pubspec.lock 仍满足所有依赖约束"
+
+
+def diff_versions(before, after):
+    """比较两份 {name: version}，返回可读的变更列表"""
+    changes = []
+    for name in sorted(set(before) | set(after)):
+        old, new = before.get(name), after.get(name)
+        if old == new:
+            continue
+        if old is None:
+            changes.append(f"+ {name} {new}")
+        elif new is None:
+            changes.append(f"- {name} {old}")
+        else:
+            changes.append(f"~ {name} {old} → {new}")
+    return changes
@@ -0,0 +1,119 @@
+"""流式解析 `flutter pub outdated --json`
+
+输出按行喂给 OutdatedStream，"packages" 数组中的每个包对象一读完整就解码，
+不匹配的包立即丢弃，匹配的包交给 on_package 处理；
+缓冲区只保存当前未读完的一个对象，内存占用与输出大小无关。
+"""
+import fnmatch
+import json
+import re
+
+PACKAGES_PATTERN = re.compile(r'"packages"\s*:\s*\[')
+# 字符串整体作为一个 token 跳过，其中的括号不参与计数；JSON 字符串不会跨行
+TOKEN_PATTERN = re.compile(r'"(?:[^"\\\n]|\\.)*"|[{}\[\]]')
+NAME_PATTERN = re.compile(r'"package"\s*:\s*"((?:[^"\\]|\\.)*)"')
+BATCH_SIZE = 64 * 1024  # 攒够这么多未扫描的输出再解析一次，减少逐行调用的开销
+
+
+def package_filter(include, exclude=()):
+    """把 include / exclude 通配符（如 ap_*、ap_recaptcha*）编译为一个判断函数"""
+    include_regex = re.compile("|".join(fnmatch.translate(pattern) for pattern in include) or "(?!)")
+    exclude_regex = re.compile("|".join(fnmatch.translate(pattern) for pattern in exclude) or "(?!)")
+
+    def accept(name):
+        return bool(name) and include_regex.match(name) is not None and exclude_regex.match(name) is None
+    return accept
+
+
+class OutdatedStream:
+    def __init__(self, accept, on_package):
+        self.accept = accept
+        self.on_package = on_package
+        self.buffer = ""
+        self.pending = []  # 还没并入 buffer 的输出片段
+        self.pending_size = 0
+        self.position = 0  # buffer 中已扫描到的位置
+        self.depth = 0
+        self.started = False
+        self.done = False
+        self.scanned = 0
+        self.matched = 0
+
+    def feed(self, text):
+        """喂入一段输出；每攒够 BATCH_SIZE 解析一次，只处理到最后一个换行为止"""
+        if self.done:
+            return
+        self.pending.append(text)
+        self.pending_size += len(text)
+        if self.pending_size >= BATCH_SIZE:
+            self._drain()
+
+    def _drain(self):
+        buffer = self.buffer = self.buffer + "".join(self.pending)
+        self.pending.clear()
+        self.pending_size = 0
+        limit = buffer.rfind("\n") + 1
+        position = self.position
+        if not self.started:
+            match = PACKAGES_PATTERN.search(buffer, 0, limit)
+            if not match:
+                self.buffer = buffer[max(0, limit - 64):]
+                return
+            self.started = True
+            position = match.end()
+
+        # depth == 0 时位于 packages 数组中、两个对象之间
+        object_start = 0 if self.depth else None
+        for token in TOKEN_PATTERN.finditer(buffer, position, limit):
+            char = token.group()
+            if char[0] == '"':
+                continue
+            if char in "{[":
+                if self.depth == 0:
+                    object_start = token.start()
+                self.depth += 1
+            elif self.depth == 0:
+                self.done = True  # packages 数组结束
+                self.buffer = ""
+                return
+            else:
+                self.depth -= 1
+                if self.depth == 0:
+                    self._emit(buffer[object_start:token.end()])
+                    object_start = None
+
+        # 只保留未读完的对象（以及最后一个换行之后的内容）
+        keep = object_start if object_start is not None else limit
+        self.buffer = buffer[keep:]
+        self.position = limit - keep
+
+    def _emit(self, text):
+        """先用正则取包名，匹配时才完整解码"""
+        self.scanned += 1
+        match = NAME_PATTERN.search(text)
+        if match is None or not self.accept(json.loads(f'"{match.group(1)}"')):
+            return
+        package = json.loads(text)
+        if isinstance(package, dict) and self.accept(package.get("package")):
+            self.matched += 1
+            self.on_package(package)
+
+    def close(self):
+        """输出结束时调用；packages 数组不完整时抛出 ValueError"""
+        if not self.done:
+            self.pending.append("\n")
+            self._drain()
+        if not self.done:
+            raise ValueError(f"flutter pub outdated 输出不完整（已解析 {self.scanned} 个包）")
+
+
+def iter_packages(lines, accept):
+    """逐行读取（如文件对象），产出匹配的包对象"""
+    matched = []
+    stream = OutdatedStream(accept, matched.append)
+    for line in lines:
+        stream.feed(line)
+        yield from matched
+        matched.clear()
+    stream.close()
+    yield from matched
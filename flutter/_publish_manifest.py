@@ -0,0 +1,188 @@
+"""发布内容清单：按 pub 的规则收集可发布文件，计算整个文件集合的内容哈希
+
+- 与 pub 一致：跳过以 . 开头的文件和目录；目录中有 .pubignore 时用它代替 .gitignore，
+  上级目录（直到 git 仓库根目录）的 .gitignore 同样生效；
+- 每个文件的 sha256 按 (mtime, size) 缓存，未变化的文件不重新读取；
+- 内容哈希 = 所有（相对路径, 文件哈希）的哈希，发布成功后记录“该内容已发布为某版本”，
+  下次内容完全相同时可以跳过整个发布流程。
+"""
+import hashlib
+import os
+import re
+import time
+
+from _cache import ResultCache, hash_key
+
+IGNORE_FILES = (".pubignore", ".gitignore")
+HASH_CHUNK = 1024 * 1024
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+file_cache = ResultCache("publish_files", max_entries=256)
+published_cache = ResultCache("published_contents", max_entries=4096)
+
+
+def _translate(pattern):
+    """gitignore 通配符 -> 正则（不含锚定部分）"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                parts.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+def parse_ignore(text, base):
+    """解析一个忽略文件，返回 [(正则, 是否取反, 只匹配目录)]；base 为该文件所在目录（相对路径，根目录为 ""）"""
+    rules = []
+    prefix = re.escape(base + "/") if base else ""
+    for line in text.splitlines():
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # 中间含 / 的模式相对于忽略文件所在目录，否则匹配任意层级
+        anchored = "/" in line
+        body = _translate(line.lstrip("/"))
+        regex = prefix + body if anchored else prefix + "(?:.*/)?" + body
+        rules.append((re.compile(regex + "$"), negate, dir_only))
+    return rules
+
+
+def _read_rules(directory, base, names=IGNORE_FILES):
+    for name in names:
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return parse_ignore(f.read(), base)
+    return []
+
+
+def _ignored(rules, path, is_dir):
+    ignored = False
+    for regex, negate, dir_only in rules:
+        if dir_only and not is_dir:
+            continue
+        if regex.match(path):
+            ignored = not negate
+    return ignored
+
+
+def _git_root(directory):
+    current = directory
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def publishable_files(package_dir):
+    """返回 [(相对包目录的路径, os.stat_result)]，按路径排序"""
+    package_dir = os.path.abspath(package_dir)
+    top = _git_root(package_dir) or package_dir
+    # 忽略规则统一使用相对 top 的路径
+    rules = []
+    ancestors = []
+    current = package_dir
+    while current != top:
+        current = os.path.dirname(current)
+        ancestors.append(current)
+    for directory in reversed(ancestors):
+        relative = "" if directory == top else os.path.relpath(directory, top).replace(os.sep, "/")
+        rules += _read_rules(directory, relative, (".gitignore",))
+
+    files = []
+    base = os.path.relpath(package_dir, top).replace(os.sep, "/")
+    stack = [(package_dir, "" if base == "." else base, rules)]
+    while stack:
+        directory, relative, inherited = stack.pop()
+        rules = inherited + _read_rules(directory, relative)
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                path = f"{relative}/{entry.name}" if relative else entry.name
+                is_dir = entry.is_dir()
+                if _ignored(rules, path, is_dir):
+                    continue
+                if is_dir:
+                    stack.append((entry.path, path, rules))
+                elif entry.is_file():
+                    files.append((os.path.relpath(entry.path, package_dir).replace(os.sep, "/"), entry.stat()))
+    files.sort(key=lambda item: item[0])
+    return files
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(package_dir):
+    """返回 (内容哈希, 文件数, 重新读取的文件数)；mtime 和 size 都没变的文件直接使用缓存的哈希"""
+    package_dir = os.path.abspath(package_dir)
+    cache_key = hash_key(package_dir)
+    previous = file_cache.get(cache_key) or {}
+    current = {}
+    rehashed = 0
+    total = hashlib.sha256()
+    for path, stat in publishable_files(package_dir):
+        entry = previous.get(path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            mtime = stat.st_mtime_ns
+            digest = entry[2]
+        else:
+            digest = _file_digest(os.path.join(package_dir, path))
+            rehashed += 1
+            # 刚修改过的文件不记录 mtime：同一时间粒度内的再次写入不会改变 mtime，下次仍需重新读取
+            mtime = stat.st_mtime_ns if time.time_ns() - stat.st_mtime_ns > RACY_WINDOW_NS else None
+        current[path] = [mtime, stat.st_size, digest]
+        total.update(f"{path}\0{digest}\n".encode("utf-8"))
+    if current != previous:
+        file_cache.put(cache_key, current)
+    return total.hexdigest(), len(current), rehashed
+
+
+def find_published(digest):
+    """该内容已发布过时返回 {"name", "version", "published"}"""
+    return published_cache.get(digest)
+
+
+def record_published(digest, name, version):
+    published_cache.put(digest, {"name": name, "version": version, "published": time.time()})
@@ -0,0 +1,192 @@
+"""pubspec.yaml 单次扫描、保持原格式的编辑器
+
+文件只被切分一次为行 + 值区间（span）模型，任意数量的修改都记录为区间替换，
+写回时一次遍历完成；未修改的部分逐字节保持不变（包括引号、注释和换行符）。
+"""
+import os
+import re
+
+from _trace import span
+
+DEPENDENCY_SECTIONS = ("dependencies", "dev_dependencies", "dependency_overrides")
+
+KEY_PATTERN = re.compile(r'( *)([^\s#:][^:]*?):(?=\s|$)')
+COMMENT_PATTERN = re.compile(r'\s+#')
+WORKSPACE_SKIP_DIRS = {"build", "ios", "android", "macos", "linux", "windows", "web", "node_modules"}
+
+
+def find_pubspecs(root):
+    """递归查找 root 下所有 pubspec.yaml（跳过隐藏目录、构建产物和平台目录）"""
+    pubspecs = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames
+                             if not d.startswith(".") and d not in WORKSPACE_SKIP_DIRS)
+        if "pubspec.yaml" in filenames:
+            pubspecs.append(os.path.join(dirpath, "pubspec.yaml"))
+    return pubspecs
+
+
+def _value_span(line, start):
+    """返回 line[start:] 中 YAML 标量值的区间（去掉引号、行尾注释和空白），没有值时返回 None"""
+    end = len(line.rstrip())
+    while start < end and line[start] in " \t":
+        start += 1
+    if start >= end or line[start] == "#":
+        return None
+
+    quote = line[start]
+    if quote in "'\"":
+        close = line.find(quote, start + 1)
+        if close != -1:
+            return start + 1, close
+
+    comment = COMMENT_PATTERN.search(line, start, end)
+    if comment:
+        end = comment.start()
+    return start, end
+
+
+class Dependency:
+    """一个依赖条目：name、所在 section，以及 inline 值和子字段的 (行号, key 结束列)"""
+    __slots__ = ("section", "name", "line", "inline", "fields")
+
+    def __init__(self, section, name, line, inline):
+        self.section = section
+        self.name = name
+        self.line = line
+        self.inline = inline
+        self.fields = {}
+
+
+class PubspecDocument:
+    def __init__(self, text):
+        self.text = text
+        self.lines = text.splitlines(keepends=True)
+        self.top_level = {}
+        self.entries = []
+        self.edits = {}
+        self._tokenize()
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            return cls(f.read())
+
+    def _tokenize(self):
+        """只记录 key 的位置，值区间在读取时才计算"""
+        section = None
+        current = None
+        key_match = KEY_PATTERN.match
+        for index, line in enumerate(self.lines):
+            first = line[:1]
+            if first in ("", "\n", "\r", "#"):
+                continue
+            match = key_match(line)
+            if first != " ":
+                current = None
+                if match and not match.end(1):
+                    section = match.group(2)
+                    self.top_level.setdefault(section, (index, match.end()))
+                else:
+                    section = None
+                continue
+            if section not in DEPENDENCY_SECTIONS or not match:
+                continue
+            if match.end(1) == 2:
+                current = Dependency(section, match.group(2), index, (index, match.end()))
+                self.entries.append(current)
+            elif current is not None:
+                current.fields.setdefault(match.group(2), (index, match.end()))
+
+    # ---------- 读取 ----------
+    def span(self, position):
+        """(行号, key 结束列) -> (行号, 值起始列, 值结束列)；没有值时返回 None"""
+        if position is None:
+            return None
+        index, start = position
+        span = _value_span(self.lines[index], start)
+        return (index, *span) if span else None
+
+    def value(self, span):
+        if span is None:
+            return None
+        index, start, end = span
+        return self.lines[index][start:end]
+
+    def _top_level_span(self, key):
+        return self.span(self.top_level.get(key))
+
+    @property
+    def name(self):
+        return self.value(self._top_level_span("name"))
+
+    @property
+    def version(self):
+        return self.value(self._top_level_span("version"))
+
+    def dependencies(self, sections=DEPENDENCY_SECTIONS):
+        return [dep for dep in self.entries if dep.section in sections]
+
+    def dependency_version(self, dep):
+        """block 形式依赖的 version: 字段值；没有时返回 None"""
+        return self.value(self.span(dep.fields.get("version")))
+
+    def constraint(self, dep):
+        """依赖的版本约束：version: 字段或 inline 写法（如 `ap_ui: ^1.0.0`）"""
+        return self.dependency_version(dep) or self.value(self.span(dep.inline))
+
+    # ---------- 修改 ----------
+    def edit(self, span, text):
+        index, start, end = span
+        self.edits.setdefault(index, {})[start] = (end, text)
+
+    def set_version(self, version):
+        span = self._top_level_span("version")
+        if span is None:
+            raise KeyError("version")
+        self.edit(span, version)
+
+    def set_constraint(self, dep, constraint):
+        """修改依赖约束：优先 version: 字段，其次 inline 写法"""
+        span = self.span(dep.fields.get("version")) or self.span(dep.inline)
+        if span is None:
+            raise KeyError(f"{dep.name}.version")
+        self.edit(span, constraint)
+
+    def set_dependency_version(self, dep, version):
+        span = self.span(dep.fields.get("version"))
+        if span is None:
+            raise KeyError(f"{dep.name}.version")
+        self.edit(span, version)
+
+    def dump(self):
+        if not self.edits:
+            return self.text
+        lines = list(self.lines)
+        for index, line_edits in self.edits.items():
+            line = lines[index]
+            parts = []
+            cursor = 0
+            for start in sorted(line_edits):
+                end, text = line_edits[start]
+                parts.append(line[cursor:start])
+                parts.append(text)
+                cursor = end
+            parts.append(line[cursor:])
+            lines[index] = "".join(parts)
+        return "".join(lines)
+
+    def save(self, path):
+        """仅在内容有变化时写回，返回是否写入"""
+        new_text = self.dump()
+        if new_text == self.text:
+            return False
+        # 先写临时文件再替换，并发执行的 flutter pub get 等只会读到完整的旧文件或新文件
+        with span(f"write {os.path.basename(path)}", "file", path=str(path), bytes=len(new_text)):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                f.write(new_text)
+            if os.path.exists(path):
+                os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+            os.replace(tmp_path, path)
+        return True
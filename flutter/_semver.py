@@ -0,0 +1,239 @@
+"""共享的语义化版本库（pub 规则）
+
+- parse(text) 返回 __slots__ 的 Version，同一字符串只解析一次（驻留），比较只比预先计算的 key；
+- 预发布版本排在对应正式版之前；build 元数据参与排序（无 build 的排在前面），与 pub_semver 一致；
+- allows(constraint, version)：any / ^x.y.z / >= > <= < 组合 / 精确版本，约束解析结果同样缓存；
+- VersionIndex：升序版本列表，latest() 用 bisect 在 O(log n) 内回答“满足 X.Y.* / 约束的最新版本”。
+"""
+import re
+from bisect import bisect_left, bisect_right, insort
+
+VERSION_PATTERN = re.compile(r'^(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+([0-9A-Za-z.-]+))?$')
+CONSTRAINT_PATTERN = re.compile(r'(\^|>=|<=|>|<)?\s*([^\s<>=^]+)')
+MAX_INTERNED = 1 << 20
+
+_interned = {}
+_constraints = {}
+
+
+def _identifiers(text):
+    """预发布 / build 标识符：数字按数值比较，且排在字母标识符之前"""
+    return tuple((0, int(part), "") if part.isdigit() else (1, 0, part) for part in text.split("."))
+
+
+class Version:
+    __slots__ = ("major", "minor", "patch", "pre", "build", "text", "key")
+
+    def __init__(self, major, minor=0, patch=0, pre=None, build=None, text=None):
+        self.major = major
+        self.minor = minor
+        self.patch = patch
+        self.pre = pre
+        self.build = build
+        self.text = text or (f"{major}.{minor}.{patch}" + (f"-{pre}" if pre else "") + (f"+{build}" if build else ""))
+        self.key = (major, minor, patch,
+                    (0, _identifiers(pre)) if pre else (1, ()),
+                    _identifiers(build) if build else ())
+
+    @property
+    def release(self):
+        return self.major, self.minor, self.patch
+
+    @property
+    def is_prerelease(self):
+        return self.pre is not None
+
+    def next_minor(self, keep_build=False):
+        return Version(self.major, self.minor + 1, 0, build=self.build if keep_build else None)
+
+    def next_patch(self, keep_build=False):
+        return Version(self.major, self.minor, self.patch + 1, build=self.build if keep_build else None)
+
+    def next_breaking(self):
+        """^ 约束的上界：1.2.3 -> 2.0.0，0.2.3 -> 0.3.0"""
+        return Version(self.major + 1) if self.major > 0 else Version(0, self.minor + 1)
+
+    def first_prerelease(self):
+        """该版本最小的预发布版本（X.Y.Z-0），用作不含上界预发布的开区间上界"""
+        return Version(self.major, self.minor, self.patch, pre="0")
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"Version({self.text!r})"
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return isinstance(other, Version) and self.key == other.key
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+    def __le__(self, other):
+        return self.key <= other.key
+
+    def __gt__(self, other):
+        return self.key > other.key
+
+    def __ge__(self, other):
+        return self.key >= other.key
+
+
+def parse(text):
+    """解析版本号（x / x.y / x.y.z，可带 -pre 和 +build），无效时返回 None；结果按字符串驻留"""
+    if isinstance(text, Version):
+        return text
+    version = _interned.get(text)
+    if version is not None or text is None:
+        return version
+    match = VERSION_PATTERN.match(text.strip())
+    if not match:
+        return None
+    major, minor, patch, pre, build = match.groups()
+    version = Version(int(major), int(minor or 0), int(patch or 0), pre, build, text.strip())
+    if len(_interned) >= MAX_INTERNED:
+        _interned.clear()
+    _interned[text] = version
+    return version
+
+
+def is_valid(text, allow_prerelease=True):
+    version = parse(text)
+    return version is not None and (allow_prerelease or not version.is_prerelease)
+
+
+def compare(a, b):
+    """比较两个版本号（忽略开头的 ^），返回 -1 / 0 / 1；无效版本抛出 ValueError"""
+    left, right = parse(str(a).lstrip("^")), parse(str(b).lstrip("^"))
+    if left is None or right is None:
+        raise ValueError(f"无效的版本号：{a if left is None else b}")
+    return (left.key > right.key) - (left.key < right.key)
+
+
+def sort_key(text):
+    """用于 sorted() 的 key，无效版本排在最前"""
+    version = parse(text)
+    return (1, version.key) if version is not None else (0, str(text))
+
+
+class VersionConstraint:
+    """pub 版本约束，归一化为 [min, max] 区间（可开可闭）"""
+    __slots__ = ("min", "max", "include_min", "include_max", "text", "empty")
+
+    def __init__(self, text):
+        self.text = text
+        self.min = self.max = None
+        self.include_min = self.include_max = True
+        self.empty = False
+
+    @classmethod
+    def parse(cls, text):
+        text = (text or "any").strip()
+        cached = _constraints.get(text)
+        if cached is not None:
+            return cached
+        constraint = cls(text)
+        if text != "any":
+            for operator, bound_text in CONSTRAINT_PATTERN.findall(text):
+                bound = parse(bound_text)
+                if bound is None:
+                    constraint.empty = True
+                    break
+                if operator == "^":
+                    constraint._lower(bound, True)
+                    constraint._upper(bound.next_breaking().first_prerelease(), False)
+                elif operator in (">=", ">"):
+                    constraint._lower(bound, operator == ">=")
+                elif operator == "<=":
+                    constraint._upper(bound, True)
+                elif operator == "<":
+                    # 与 pub 一致：<2.0.0 不包含 2.0.0 的预发布版本
+                    constraint._upper(bound if bound.is_prerelease else bound.first_prerelease(), False)
+                else:
+                    constraint._lower(bound, True)
+                    constraint._upper(bound, True)
+        if len(_constraints) >= MAX_INTERNED:
+            _constraints.clear()
+        _constraints[text] = constraint
+        return constraint
+
+    def _lower(self, bound, inclusive):
+        if self.min is None or bound > self.min or (bound == self.min and not inclusive):
+            self.min, self.include_min = bound, inclusive
+
+    def _upper(self, bound, inclusive):
+        if self.max is None or bound < self.max or (bound == self.max and not inclusive):
+            self.max, self.include_max = bound, inclusive
+
+    def allows(self, version):
+        version = parse(version)
+        if version is None or self.empty:
+            return False
+        if self.min is not None and (version < self.min or (version == self.min and not self.include_min)):
+            return False
+        if self.max is not None and (version > self.max or (version == self.max and not self.include_max)):
+            return False
+        return True
+
+
+def allows(constraint, version):
+    return VersionConstraint.parse(constraint).allows(version)
+
+
+def prefix_constraint(prefix):
+    """"3.21" / "3.21.*" -> 只包含 3.21.x 正式版与预发布的约束"""
+    parts = [int(part) for part in prefix.rstrip(".*").split(".")]
+    lower = Version(*parts)
+    upper = Version(*parts[:-1], parts[-1] + 1) if len(parts) > 1 else Version(parts[0] + 1)
+    return VersionConstraint.parse(f">={lower} <{upper}")
+
+
+class VersionIndex:
+    """升序版本列表；正式版单独保存一份，默认查询不含预发布时同样只需一次 bisect"""
+    __slots__ = ("versions", "keys", "releases", "release_keys")
+
+    def __init__(self, versions=()):
+        parsed = sorted({version for version in map(parse, versions) if version is not None})
+        self.versions = parsed
+        self.keys = [version.key for version in parsed]
+        self.releases = [version for version in parsed if not version.is_prerelease]
+        self.release_keys = [version.key for version in self.releases]
+
+    def __len__(self):
+        return len(self.versions)
+
+    def add(self, version):
+        version = parse(version)
+        if version is None:
+            return
+        index = bisect_left(self.keys, version.key)
+        if index < len(self.keys) and self.keys[index] == version.key:
+            return
+        self.versions.insert(index, version)
+        self.keys.insert(index, version.key)
+        if not version.is_prerelease:
+            insort(self.releases, version)
+            self.release_keys.insert(bisect_left(self.release_keys, version.key), version.key)
+
+    def latest(self, constraint=None, prefix=None, prereleases=False):
+        """满足约束（字符串或 VersionConstraint）和 X.Y 前缀的最新版本，没有时返回 None"""
+        versions, keys = (self.versions, self.keys) if prereleases else (self.releases, self.release_keys)
+        bounds = []
+        if constraint is not None:
+            bounds.append(constraint if isinstance(constraint, VersionConstraint) else VersionConstraint.parse(constraint))
+        if prefix:
+            bounds.append(prefix_constraint(prefix))
+
+        end = len(keys)
+        for bound in bounds:
+            if bound.empty:
+                return None
+            if bound.max is not None:
+                end = min(end, (bisect_right if bound.include_max else bisect_left)(keys, bound.max.key))
+        if end == 0:
+            return None
+        candidate = versions[end - 1]
+        return candidate if all(bound.allows(candidate) for bound in bounds) else None
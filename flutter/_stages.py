@@ -0,0 +1,191 @@
+"""阶段 DAG 调度：互不依赖的阶段并发执行，失败时回滚，结束后打印关键路径
+
+- pipeline.add(name, func, after=...) 声明阶段及其依赖，func(ctx) 的返回值保存在 ctx.results[name]；
+- 阶段在修改文件 / 提交之前用 ctx.snapshot(path) 或 ctx.on_rollback(fn) 登记撤销操作（fn 返回 False 表示无需撤销）；
+- 任一阶段失败（包括 sys.exit）后不再启动新阶段，等正在运行的阶段结束，
+  按登记的逆序执行撤销操作，再把原异常抛出；
+- 阶段抛出 Stop 表示没有后续工作（如没有需要更新的内容）：同样回滚，run() 返回 None；
+- irreversible=True 的阶段（如 push、publish）完成后，它及其所有前置阶段的撤销操作作废，
+  已经推送到远程的内容不会在本地被回滚。
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import _trace
+
+
+class Stop(Exception):
+    """阶段主动结束流水线，不视为失败"""
+
+
+class Stage:
+    __slots__ = ("name", "func", "after", "irreversible", "start", "end")
+
+    def __init__(self, name, func, after, irreversible):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+        self.irreversible = irreversible
+        self.start = None
+        self.end = None
+
+    @property
+    def duration(self):
+        return (self.end or 0.0) - (self.start or 0.0)
+
+
+class StageContext:
+    """传给阶段函数：读取前置阶段的结果，登记撤销操作"""
+
+    def __init__(self, pipeline, stage):
+        self.pipeline = pipeline
+        self.stage = stage
+        self.results = pipeline.results
+
+    def on_rollback(self, undo, label=None):
+        self.pipeline._register(self.stage.name, undo, label)
+
+    def snapshot(self, *paths):
+        """登记文件的当前内容，回滚时恢复（原本不存在的文件会被删除）"""
+        for path in paths:
+            try:
+                with open(path, "rb") as f:
+                    content = f.read()
+            except FileNotFoundError:
+                content = None
+            self.on_rollback(lambda path=path, content=content: _restore(path, content), f"恢复 {path}")
+
+
+def _restore(path, content):
+    """恢复文件内容，内容未变时返回 False"""
+    try:
+        with open(path, "rb") as f:
+            current = f.read()
+    except FileNotFoundError:
+        current = None
+    if current == content:
+        return False
+    if content is None:
+        os.remove(path)
+    else:
+        with open(path, "wb") as f:
+            f.write(content)
+    return True
+
+
+class Pipeline:
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+        self.results = {}
+        self.undo = []  # [(阶段名, 撤销函数, 说明)]，按登记顺序
+        self._undo_lock = threading.Lock()
+        self.start = None
+        self.end = None
+
+    def add(self, name, func, after=(), irreversible=False):
+        for dependency in after:
+            if dependency not in self.stages:
+                raise ValueError(f"阶段 {name} 依赖未声明的阶段 {dependency}")
+        self.stages[name] = Stage(name, func, after, irreversible)
+        return self
+
+    def _register(self, name, undo, label):
+        with self._undo_lock:
+            self.undo.append((name, undo, label))
+
+    def _ancestors(self, name):
+        seen = set()
+        pending = [name]
+        while pending:
+            stage = self.stages[pending.pop()]
+            for dependency in stage.after:
+                if dependency not in seen:
+                    seen.add(dependency)
+                    pending.append(dependency)
+        return seen
+
+    def _run_stage(self, stage):
+        stage.start = time.perf_counter()
+        try:
+            with _trace.span(stage.name):
+                return stage.func(StageContext(self, stage))
+        finally:
+            stage.end = time.perf_counter()
+
+    def run(self):
+        """执行全部阶段，返回 {阶段名: 返回值}；失败时回滚后重新抛出第一个异常，Stop 时返回 None"""
+        self.start = time.perf_counter()
+        remaining = dict(self.stages)
+        done = set()
+        running = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=max(1, len(self.stages))) as pool:
+            while remaining or running:
+                if error is None:
+                    for name, stage in list(remaining.items()):
+                        if all(dependency in done for dependency in stage.after):
+                            running[pool.submit(self._run_stage, stage)] = name
+                            del remaining[name]
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    exception = future.exception()
+                    if exception is not None:
+                        error = error or exception
+                        continue
+                    self.results[name] = future.result()
+                    done.add(name)
+        self.end = time.perf_counter()
+        if error is not None:
+            self.rollback(done)
+            if isinstance(error, Stop):
+                return None
+            raise error
+        return self.results
+
+    def rollback(self, done):
+        """逆序执行撤销操作，跳过已完成的不可逆阶段及其前置阶段"""
+        protected = set()
+        for name in done:
+            if self.stages[name].irreversible:
+                protected |= {name, *self._ancestors(name)}
+        actions = [(name, undo, label) for name, undo, label in self.undo if name not in protected]
+        reverted = []
+        for name, undo, label in reversed(actions):
+            try:
+                if undo() is not False:
+                    reverted.append(label or name)
+            except Exception as e:
+                reverted.append(f"⚠️ 回滚失败（{name}）：{e}")
+        if reverted:
+            print("↩️ 流水线未完成，已回滚：" + "；".join(reverted))
+
+    def critical_path(self):
+        """从最后结束的阶段沿“最晚结束的前置阶段”回溯得到关键路径"""
+        finished = [stage for stage in self.stages.values() if stage.end is not None]
+        if not finished:
+            return []
+        stage = max(finished, key=lambda s: s.end)
+        path = [stage]
+        while stage.after:
+            stage = max((self.stages[name] for name in stage.after), key=lambda s: s.end or 0.0)
+            path.append(stage)
+        return path[::-1]
+
+    def print_report(self):
+        finished = [stage for stage in self.stages.values() if stage.end is not None]
+        if not finished or self.end is None:
+            return
+        wall = self.end - self.start
+        serial = sum(stage.duration for stage in finished)
+        path = self.critical_path()
+        print(f"⏱ 阶段耗时：串行合计 {serial:.2f}s，实际 {wall:.2f}s（并发节省 {max(0.0, serial - wall):.2f}s）")
+        print("   关键路径：" + " → ".join(f"{stage.name} {stage.duration:.2f}s" for stage in path))
+        overlapped = [stage for stage in finished if stage not in path and stage.duration >= 0.005]
+        if overlapped:
+            print("   并行阶段：" + "，".join(f"{stage.name} {stage.duration:.2f}s" for stage in overlapped))
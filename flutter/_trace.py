@@ -0,0 +1,181 @@
+"""阶段级 tracing：记录每个子进程调用和文件写入的耗时
+
+- span(name) 记录墙钟时间、CPU 时间（本线程 + 子进程）、退出码和输出大小；
+- run(command, ...) 通过 _executor 执行命令（流式输出、超时），自动生成 span；
+- run_many(commands, jobs) 并发执行互不依赖的命令，每个命令各记录一个 span；
+- --trace out.json 输出 Chrome trace 格式（chrome://tracing / Perfetto 可直接打开）；
+- 每次运行追加一行到 ~/.script_tool/trace_history.jsonl，--stats 汇总各阶段 p50/p95。
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import _executor
+from _executor import command_label
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HISTORY_FILE = Path(os.environ.get("SCRIPT_TOOL_TRACE_HISTORY",
+                                   Path.home() / ".script_tool" / "trace_history.jsonl"))
+STATS_RUNS = 200
+
+_lock = threading.Lock()
+_state = {"script": None, "trace_path": None, "started": time.time(), "origin": time.perf_counter()}
+events = []
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Span:
+    __slots__ = ("name", "category", "args")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+
+@contextmanager
+def span(name, category="phase", **args):
+    """记录一个阶段；CPU 时间包含期间结束的子进程（并发时子进程 CPU 只能近似归属）"""
+    record = Span(name, category, dict(args))
+    start = time.perf_counter()
+    thread_cpu = time.thread_time()
+    children_cpu = _children_cpu()
+    try:
+        yield record
+    finally:
+        end = time.perf_counter()
+        cpu = (time.thread_time() - thread_cpu) + (_children_cpu() - children_cpu)
+        _append_event(record, start, end, {"cpu_ms": round(cpu * 1000, 3), **record.args})
+
+
+def _append_event(record, start, end, args, tid=None):
+    with _lock:
+        events.append({
+            "name": record.name,
+            "cat": record.category,
+            "ph": "X",
+            "ts": round((start - _state["origin"]) * 1e6),
+            "dur": round((end - start) * 1e6),
+            "pid": os.getpid(),
+            "tid": tid or threading.get_ident(),
+            "args": args,
+        })
+
+
+def _result_args(result):
+    args = {"exit_code": result.returncode, "output_bytes": result.output_bytes}
+    if result.timed_out:
+        args["timed_out"] = True
+    return args
+
+
+def run(command, **kwargs):
+    """执行命令（参数见 _executor.run）：记录耗时、退出码、输出大小和是否超时"""
+    with span(command_label(command), "subprocess", command=" ".join(map(str, command))) as record:
+        result = _executor.run(command, **kwargs)
+        record.args.update(_result_args(result))
+    return result
+
+
+def run_many(commands, jobs=8, **kwargs):
+    """并发执行互不依赖的命令（参数见 _executor.run_many），按输入顺序返回结果"""
+    results = _executor.run_many(commands, jobs, **kwargs)
+    for lane, result in enumerate(results, 1):
+        record = Span(command_label(result.args), "subprocess", {"command": " ".join(map(str, result.args))})
+        # 并发的命令各占一条轨道，避免在 trace 中互相重叠
+        _append_event(record, result.started, result.started + result.duration,
+                      {**record.args, **_result_args(result)}, tid=lane)
+    return results
+
+
+def setup(script, trace_path=None):
+    """注册本次运行：退出时写 Chrome trace（如指定）并追加运行历史"""
+    _state["script"] = script
+    _state["trace_path"] = trace_path
+
+
+def write_chrome_trace(path):
+    with _lock:
+        data = {"traceEvents": list(events), "displayTimeUnit": "ms",
+                "otherData": {"script": _state["script"], "started": _state["started"]}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    print(f"🧭 trace 已写入 {path}")
+
+
+def append_history():
+    phases = {}
+    with _lock:
+        for event in events:
+            phases[event["name"]] = phases.get(event["name"], 0) + event["dur"] / 1e6
+    record = {"script": _state["script"], "started": _state["started"],
+              "total": time.perf_counter() - _state["origin"], "phases": phases}
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def print_stats(script, runs=STATS_RUNS):
+    """汇总最近 runs 次运行中各阶段的耗时分布"""
+    history = []
+    try:
+        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("script") == script:
+                    history.append(record)
+    except FileNotFoundError:
+        pass
+    history = history[-runs:]
+    if not history:
+        print(f"📊 还没有 {script} 的运行记录（{HISTORY_FILE}）")
+        return
+
+    phases = {}
+    for record in history:
+        for name, seconds in record["phases"].items():
+            phases.setdefault(name, []).append(seconds)
+    phases["(总耗时)"] = [record["total"] for record in history]
+
+    print(f"📊 {script} 最近 {len(history)} 次运行的阶段耗时：")
+    print(f"  {'阶段':<32} {'次数':>6} {'p50(s)':>9} {'p95(s)':>9} {'max(s)':>9}")
+    for name, values in sorted(phases.items(), key=lambda item: -_percentile(item[1], 50)):
+        print(f"  {name:<32} {len(values):>6} {_percentile(values, 50):>9.2f} "
+              f"{_percentile(values, 95):>9.2f} {max(values):>9.2f}")
+
+
+def _finish():
+    if _state["script"] is None:
+        return
+    if _state["trace_path"]:
+        write_chrome_trace(_state["trace_path"])
+    try:
+        append_history()
+    except OSError:
+        pass
+
+
+atexit.register(_finish)
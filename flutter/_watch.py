@@ -0,0 +1,132 @@
+"""文件变更监听：Linux 上通过 ctypes 使用 inotify，其他平台退化为 mtime 轮询
+
+watch(target, on_change) 监听单个文件或一个目录（不递归）中的文件，
+编辑器保存时的连续事件在 debounce 秒内合并为一次 on_change(变更路径集合)。
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+EVENT_HEADER = struct.Struct("iIII")
+
+DEBOUNCE = 0.2
+POLL_INTERVAL = 0.5
+
+
+class InotifyWatcher:
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch 失败：{directory}")
+        self.directory = directory
+
+    def wait(self, timeout=None):
+        """等待事件，返回变更的文件路径集合（超时返回空集合）"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if name:
+                    changed.add(os.path.join(self.directory, os.fsdecode(name)))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, directory, interval=POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval if deadline is None else max(0.0, min(self.interval, deadline - time.monotonic())))
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(directory, polling=False):
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directory)
+
+
+def watch(target, on_change, accept=None, debounce=DEBOUNCE, polling=False):
+    """监听 target（文件或目录），accept(path) 过滤关心的文件；Ctrl+C 结束"""
+    target = os.path.abspath(target)
+    directory = target if os.path.isdir(target) else os.path.dirname(target)
+    watcher = create_watcher(directory, polling)
+    print(f"👀 监听 {target}（{'inotify' if isinstance(watcher, InotifyWatcher) else '轮询'}），Ctrl+C 退出")
+
+    def relevant(paths):
+        if directory != target:
+            paths = {path for path in paths if path == target}
+        return {path for path in paths if accept is None or accept(path)}
+
+    try:
+        while True:
+            changed = relevant(watcher.wait())
+            if not changed:
+                continue
+            # 去抖：直到 debounce 秒内没有新事件才处理
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= relevant(more)
+            on_change(changed)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""单一入口：flutter_scripts <子命令> [参数]
+
+子命令模块只在被调用时才导入，启动时只加载本文件；
+也可以打包成 zipapp：flutter_scripts --build-zipapp flutter_scripts.pyz
+"""
+import sys
+
+# 子命令 -> (模块名, 说明)
+COMMANDS = {
+    "pub_upgrade": ("pub_upgrade", "检查并更新 pubspec.yaml 中的私有依赖版本，并提交"),
+    "pub_publish": ("pub_publish", "升级版本号、更新 CHANGELOG 并发布当前包"),
+    "pub_version_upgrade": ("pub_version_upgrade", "升级 pubspec.yaml 的版本号并提交"),
+    "pub_cascade": ("pub_cascade", "按依赖顺序级联发布 ap_* 包"),
+    "pub_fleet": ("pub_fleet", "批量更新多个仓库的 ap_* 依赖"),
+    "riverpod_gen": ("riverpod_gen", "生成 Riverpod Notifier / State 模板文件"),
+}
+
+
+def print_usage():
+    print("用法: flutter_scripts <子命令> [参数]\n\n子命令:")
+    for name, (_, description) in COMMANDS.items():
+        print(f"  {name:<22} {description}")
+    print("\n  --build-zipapp OUT.pyz  把所有脚本打包为单个可执行 zipapp")
+    print("\n查看子命令帮助: flutter_scripts <子命令> --help")
+
+
+def build_zipapp(output):
+    import os
+    import zipapp
+    from pathlib import Path
+
+    source = Path(__file__).resolve().parent
+    zipapp.create_archive(source, output, interpreter="/usr/bin/env python3", main="flutter_scripts:main",
+                          filter=lambda path: path.suffix == ".py" and path.parent == Path("."))
+    print(f"📦 已生成 {output}（{os.path.getsize(output) / 1024:.0f} KB）")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return
+    if argv[0] == "--build-zipapp":
+        if len(argv) != 2:
+            print("❌ 用法: flutter_scripts --build-zipapp OUT.pyz")
+            sys.exit(2)
+        build_zipapp(argv[1])
+        return
+
+    name = argv[0]
+    if name not in COMMANDS:
+        print(f"❌ 未知子命令: {name}\n")
+        print_usage()
+        sys.exit(2)
+
+    import importlib
+
+    module = importlib.import_module(COMMANDS[name][0])
+    sys.argv[0] = name
+    return module.main(argv[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import _git
+import _trace
+import pub_publish
+from _pubspec import PubspecDocument, find_pubspecs
+
+
+class Package:
+    def __init__(self, pubspec_path):
+        self.pubspec_path = pubspec_path
+        self.directory = os.path.dirname(os.path.abspath(pubspec_path))
+        doc = PubspecDocument.load(pubspec_path)
+        self.name = doc.name
+        self.dependencies = {dep.name for dep in doc.dependencies()}
+        self.internal = set()
+
+
+def load_packages(root):
+    """读取 root 下所有包，并计算包之间的内部依赖"""
+    packages = {}
+    for pubspec_path in find_pubspecs(root):
+        package = Package(pubspec_path)
+        if package.name:
+            packages[package.name] = package
+    for package in packages.values():
+        package.internal = {name for name in package.dependencies if name in packages and name != package.name}
+    return packages
+
+
+def affected_packages(packages, seeds):
+    """seeds 以及所有（传递）依赖它们的包"""
+    dependents = {name: set() for name in packages}
+    for package in packages.values():
+        for dep in package.internal:
+            dependents[dep].add(package.name)
+
+    affected = set()
+    stack = list(seeds)
+    while stack:
+        name = stack.pop()
+        if name in affected:
+            continue
+        affected.add(name)
+        stack.extend(dependents[name])
+    return affected
+
+
+def plan_levels(packages, affected):
+    """按依赖关系分层：同一层的包之间没有待发布的依赖，可以并发发布"""
+    pending = {name: packages[name].internal & affected for name in affected}
+    levels = []
+    while pending:
+        level = sorted(name for name, deps in pending.items() if not deps)
+        if not level:
+            print(f"❌ 检测到循环依赖：{', '.join(sorted(pending))}")
+            sys.exit(1)
+        levels.append(level)
+        for name in level:
+            del pending[name]
+        for deps in pending.values():
+            deps.difference_update(level)
+    return levels
+
+
+def bump_dependencies(package, published):
+    """把依赖约束更新为刚发布的版本，返回变更说明"""
+    doc = PubspecDocument.load(package.pubspec_path)
+    bumps = []
+    for dep in doc.dependencies():
+        if dep.name not in published:
+            continue
+        current = doc.constraint(dep)
+        if current is None:
+            continue
+        constraint = f"^{published[dep.name]}" if current.startswith("^") else published[dep.name]
+        if constraint != current:
+            doc.set_constraint(dep, constraint)
+            bumps.append(f"{dep.name} {current} → {constraint}")
+    doc.save(package.pubspec_path)
+    return bumps
+
+
+def publish_package(package, published, msg_text, git_lock, force=False):
+    """复用 pub_publish 的步骤发布单个包，返回新版本号；内容与已发布版本一致时返回 None"""
+    with _trace.span("bump dependencies", package=package.name):
+        bumps = bump_dependencies(package, published)
+    if not force:
+        with _trace.span("content check", package=package.name):
+            if pub_publish.published_unchanged(package.directory):
+                return None
+    new_version, old_version = pub_publish.update_pubspec_preserve_format(package.pubspec_path)
+    if new_version is None:
+        print(f"❌ {package.name}: 无法更新版本号")
+        sys.exit(1)
+
+    changelog_msg = msg_text if not bumps else f"{msg_text}（依赖升级：{', '.join(bumps)}）"
+    pub_publish.update_changelog(os.path.join(package.directory, "CHANGELOG.md"), new_version, changelog_msg)
+    pub_publish.flutter_pub_get(package.directory)
+
+    with git_lock:
+        pub_publish.git_commit("pubspec.yaml", "CHANGELOG.md", package.name, new_version, package.directory)
+
+    pub_publish.flutter_pub_publish(package.directory)
+    pub_publish.record_published(package.directory, package.name, new_version)
+    print(f"✅ {package.name} {old_version} → {new_version}")
+    return new_version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按依赖顺序级联发布 ap_* 包，同一层的包并发发布")
+    parser.add_argument("--root", default=".", help="包含所有包的根目录（默认当前目录）")
+    parser.add_argument("--from", dest="seeds", nargs="+",
+                        help="发生变更的包名，只发布这些包及依赖它们的包（默认全部）")
+    parser.add_argument("--msg", nargs="+", help="更新说明内容（不需要引号）")
+    parser.add_argument("--jobs", type=int, default=min(8, os.cpu_count() or 1), help="每层最大并发数")
+    parser.add_argument("--dry-run", action="store_true", help="只打印发布计划，不执行")
+    parser.add_argument("--force", action="store_true", help="可发布文件与已发布版本完全一致的包也照常发布")
+    parser.add_argument("--trace", metavar="OUT.json", help="记录各阶段耗时并输出 Chrome trace 格式文件")
+    parser.add_argument("--stats", action="store_true", help="打印历史运行中各阶段耗时的 p50/p95 后退出")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        _trace.print_stats("pub_cascade")
+        return
+    if not args.msg:
+        parser.error("缺少参数 --msg")
+    _trace.setup("pub_cascade", args.trace)
+
+    msg_text = " ".join(args.msg)
+    packages = load_packages(args.root)
+    seeds = args.seeds or list(packages)
+    unknown = [name for name in seeds if name not in packages]
+    if unknown:
+        print(f"❌ 未找到包：{', '.join(unknown)}")
+        sys.exit(1)
+
+    levels = plan_levels(packages, affected_packages(packages, seeds))
+    print(f"📋 发布计划（{sum(len(level) for level in levels)} 个包，{len(levels)} 层）：")
+    for index, level in enumerate(levels, 1):
+        print(f"  {index}. {', '.join(level)}")
+    if args.dry_run:
+        return
+
+    repo_of = {name: _git.repo(packages[name].directory).toplevel() for level in levels for name in level}
+    repos = {repo: threading.Lock() for repo in repo_of.values()}
+    print(f"拉取 {len(repos)} 个仓库的最新代码...")
+    # 并发拉取时无法在终端输入凭据：直接失败并提示，而不是等待输入
+    env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+    pulls = _trace.run_many([(["git", "pull"], {"cwd": repo, "env": env}) for repo in repos], max(1, args.jobs))
+    for repo, result in zip(repos, pulls):
+        if result.returncode != 0:
+            print(f"❌ 拉取失败（{repo}）：{result.stderr}")
+            print("   如需输入 HTTPS 凭据或 SSH 密码，请先配置 credential helper / ssh-agent，或在该仓库手动 git pull")
+            sys.exit(1)
+
+    published = {}
+    unchanged = []
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        for index, level in enumerate(levels, 1):
+            print(f"\n🚀 发布第 {index}/{len(levels)} 层：{', '.join(level)}")
+            with _trace.span(f"level {index}", packages=", ".join(level)):
+                futures = {
+                    name: pool.submit(publish_package, packages[name], dict(published), msg_text,
+                                      repos[repo_of[name]], args.force)
+                    for name in level
+                }
+                # 跳过的包不计入 published，依赖它的包也就不需要升级约束
+                for name, future in futures.items():
+                    version = future.result()
+                    if version is None:
+                        unchanged.append(name)
+                    else:
+                        published[name] = version
+
+    print("\n✅ 级联发布完成：")
+    for name, version in published.items():
+        print(f"  {name} → {version}")
+    if unchanged:
+        print(f"⏭ 内容未变化、跳过发布：{', '.join(unchanged)}")
+
+
+if __name__ == "__main__":
+    main()
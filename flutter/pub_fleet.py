@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import _git
+import _pub_hosted
+import _pub_lock
+import _trace
+import pub_upgrade
+
+CREDENTIAL_HINT = "需要输入 HTTPS 凭据或 SSH 密码：请先配置 credential helper / ssh-agent，或先在该仓库手动执行一次 git pull / push"
+CHANGED = "changed"
+CURRENT = "current"
+FAILED = "failed"
+
+
+class RepoResult:
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.status = None
+        self.branch = None
+        self.version_prefix = None
+        self.updates = []
+        self.error = None
+        self.pushed = False
+        self.timings = {}
+
+    def fail(self, error):
+        self.status = FAILED
+        self.error = error.strip() if isinstance(error, str) else str(error)
+        if _git.is_auth_error(self.error):
+            self.error += "\n" + CREDENTIAL_HINT
+        return self
+
+
+@contextmanager
+def stage(result, name):
+    """记录单个仓库某一步的耗时（同时写入 trace）"""
+    start = time.perf_counter()
+    try:
+        with _trace.span(name, repo=result.name):
+            yield
+    finally:
+        result.timings[name] = time.perf_counter() - start
+
+
+def read_repo_list(paths, repos_file):
+    repos = list(paths)
+    if repos_file:
+        with open(repos_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    repos.append(os.path.join(os.path.dirname(os.path.abspath(repos_file)), line))
+    unique = []
+    for repo in repos:
+        repo = os.path.abspath(os.path.expanduser(repo))
+        if repo not in unique:
+            unique.append(repo)
+    return unique
+
+
+def git_repo_for(result):
+    """并发处理多个仓库时无法在终端输入凭据：网络命令不继承终端，需要凭据时直接失败"""
+    git_repo = _git.repo(result.path)
+    git_repo.interactive = False
+    return git_repo
+
+
+def pull_repo(result, strict_release):
+    """拉取远程分支，记录当前分支和 strict 模式下的版本前缀"""
+    if not os.path.isfile(os.path.join(result.path, "pubspec.yaml")):
+        return result.fail("没有 pubspec.yaml")
+    git_repo = git_repo_for(result)
+    with stage(result, "pull"):
+        result.branch = git_repo.current_branch()
+        has_remote = git_repo.has_remote_branch(result.branch)
+        if git_repo.remote_error:
+            return result.fail(f"访问远程仓库失败：{git_repo.remote_error}")
+        if has_remote:
+            process = git_repo.pull()
+            if process.returncode != 0:
+                return result.fail(f"拉取失败：{process.stderr}")
+    if strict_release:
+        result.version_prefix = pub_upgrade.get_release_version_prefix(result.branch)
+    return result
+
+
+def _resolve(group, version_prefix):
+    with _trace.span("resolve versions", resolver=pub_upgrade.resolver, prefix=version_prefix or ""):
+        return pub_upgrade.resolve_workspace_versions(
+            [os.path.join(result.path, "pubspec.yaml") for result in group], version_prefix)
+
+
+def _resolve_error(error):
+    # get_latest_ap_packages 失败时已打印原因并 exit(1)
+    if isinstance(error, SystemExit):
+        return "解析 ap_* 版本失败（详见上方输出）"
+    if isinstance(error, _pub_hosted.HostedError):
+        return str(error)
+    return f"解析 ap_* 版本失败：{error}"
+
+
+def resolve_versions(results):
+    """按版本前缀分组，每组只解析一次 ap_* 最新版本，返回 {仓库路径: 最新版本}
+
+    整组解析失败时逐个仓库重新解析，只把解析失败的仓库标记为失败，其他仓库继续升级。
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault(result.version_prefix, []).append(result)
+    resolved = {}
+    for version_prefix, group in groups.items():
+        label = f"{version_prefix}.*" if version_prefix else "最新"
+        print(f"🔍 解析 {len(group)} 个仓库的 ap_* 版本（{label}）...")
+        try:
+            latest_versions = _resolve(group, version_prefix)
+            resolved.update((result.path, latest_versions) for result in group)
+            continue
+        except (Exception, SystemExit) as e:
+            if len(group) == 1:
+                group[0].fail(_resolve_error(e))
+                continue
+        print("⚠️ 整组解析失败，逐个仓库重新解析...")
+        for result in group:
+            try:
+                resolved[result.path] = _resolve([result], version_prefix)
+            except (Exception, SystemExit) as e:
+                result.fail(_resolve_error(e))
+    return resolved
+
+
+def upgrade_repo(result, latest_versions, commit_message, no_commit):
+    """rewrite → pub get → commit/push，失败时记录错误而不中断其他仓库"""
+    pubspec_file = os.path.join(result.path, "pubspec.yaml")
+    try:
+        with stage(result, "rewrite"):
+            updated = pub_upgrade.update_pubspec(pubspec_file, latest_versions, result.updates)
+        if not updated:
+            result.status = CURRENT
+            return result
+
+        if not pub_upgrade.lock_still_valid(result.path):
+            before = _pub_lock.locked_versions(result.path)
+            with stage(result, "pub get"):
+                process = pub_upgrade.run_pub_get(cwd=result.path)
+            if process.returncode != 0:
+                return result.fail(f"flutter pub get 失败：{process.stderr}")
+            pub_upgrade.print_lock_changes(before, result.path)
+
+        result.status = CHANGED
+        if no_commit:
+            return result
+        git_repo = git_repo_for(result)
+        paths = [path for path in ("pubspec.yaml", "pubspec.lock") if os.path.exists(os.path.join(result.path, path))]
+        paths = [path for path in paths if path not in git_repo.check_ignore(paths)]
+        with stage(result, "commit & push"):
+            result.pushed = git_repo.commit_and_push(paths, commit_message + "\n\n" + "\n".join(result.updates),
+                                                     push=git_repo.has_remote_branch(result.branch))
+    except Exception as e:
+        stderr = getattr(e, "stderr", None)
+        return result.fail(stderr or str(e))
+    return result
+
+
+def print_report(results, elapsed):
+    print(f"\n📊 批量升级结果（{len(results)} 个仓库，用时 {elapsed:.1f}s）：")
+    for status, title in ((CHANGED, "✅ 已更新"), (CURRENT, "⏭ 已是最新"), (FAILED, "❌ 失败")):
+        group = [result for result in results if result.status == status]
+        if not group:
+            continue
+        print(f"\n{title}（{len(group)}）：")
+        for result in group:
+            timings = "  ".join(f"{name} {seconds:.1f}s" for name, seconds in result.timings.items())
+            total = sum(result.timings.values())
+            print(f"  {result.name:<32} {total:>6.1f}s  {timings}")
+            if status == CHANGED:
+                suffix = "" if result.pushed else "（未推送）"
+                for update in result.updates:
+                    print(f"      {update}{suffix}")
+            elif status == FAILED:
+                print(f"      {result.error.splitlines()[-1] if result.error else ''}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="批量更新多个仓库的 ap_* 依赖：统一解析一次最新版本，并发执行 pull → 更新 → pub get → 提交推送")
+    parser.add_argument("repos", nargs="*", help="仓库路径")
+    parser.add_argument("--repos-file", metavar="FILE", help="仓库列表文件，每行一个路径（支持 # 注释）")
+    parser.add_argument("-m", "--message", default="up deps", help="Git 提交信息（默认为 'up deps'）")
+    parser.add_argument("--no-commit", action="store_true", help="只更新依赖但不提交到 Git")
+    parser.add_argument("--strict-release", action="store_true",
+                        help="release-* 分支的仓库仅更新对应次版本（如 3.21.*）依赖")
+    parser.add_argument("--jobs", type=int, default=min(8, os.cpu_count() or 1), help="同时处理的仓库数")
+    parser.add_argument("--resolver", choices=["outdated", "hosted", "offline"], default="outdated",
+                        help="最新版本来源，同 pub_upgrade --resolver")
+    parser.add_argument("--hosted-url", help="--resolver hosted 时覆盖 pubspec.yaml 中的 hosted 地址")
+    parser.add_argument("--refresh", action="store_true", help="忽略 flutter pub outdated 结果缓存")
+    parser.add_argument("--include", metavar="PATTERN", nargs="+", default=list(pub_upgrade.DEFAULT_INCLUDE),
+                        help="需要更新的依赖名通配符（默认 ap_*）")
+    parser.add_argument("--exclude", metavar="PATTERN", nargs="+", default=list(pub_upgrade.DEFAULT_EXCLUDE),
+                        help="排除的依赖名通配符（默认 ap_recaptcha*）")
+    parser.add_argument("--trace", metavar="OUT.json", help="记录各阶段耗时并输出 Chrome trace 格式文件")
+    parser.add_argument("--stats", action="store_true", help="打印历史运行中各阶段耗时的 p50/p95 后退出")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        _trace.print_stats("pub_fleet")
+        return
+    repos = read_repo_list(args.repos, args.repos_file)
+    if not repos:
+        parser.error("请指定仓库路径或 --repos-file")
+    _trace.setup("pub_fleet", args.trace)
+
+    pub_upgrade.jobs = max(1, args.jobs)
+    pub_upgrade.resolver = args.resolver
+    pub_upgrade.hosted_url = args.hosted_url
+    pub_upgrade.refresh = args.refresh
+    pub_upgrade.set_package_patterns(args.include, args.exclude)
+
+    start = time.perf_counter()
+    results = [RepoResult(path) for path in repos]
+    print(f"⬇️ 拉取 {len(results)} 个仓库...")
+    with ThreadPoolExecutor(max_workers=pub_upgrade.jobs) as pool:
+        list(pool.map(lambda result: pull_repo(result, args.strict_release), results))
+
+    pending = [result for result in results if result.status is None]
+    if pending:
+        resolved = resolve_versions(pending)
+        pending = [result for result in pending if result.status is None]
+        with ThreadPoolExecutor(max_workers=pub_upgrade.jobs) as pool:
+            list(pool.map(lambda result: upgrade_repo(result, resolved[result.path], args.message,
+                                                      args.no_commit), pending))
+
+    print_report(results, time.perf_counter() - start)
+    if any(result.status == FAILED for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,63 +5,57 @@ import datetime
 import os
 import subprocess
 
-def run_command(command):
-    """执行命令行命令，遇到错误时报错"""
+import _git
+import _trace
+import _pub_lock
+import _publish_manifest
+import _semver
+import _stages
+from _pubspec import PubspecDocument
+
+PUBSPEC_VERSION_PATTERN = re.compile(r"^(\d+\.\d+\.\d+)(.*)$")
+
+def run_command(command, cwd=None, echo=False, isolate=False):
+    """执行命令行命令，遇到错误（含超时）时报错；echo=True 时实时输出命令的输出，
+    isolate=True 时不继承终端，超时后终止整个进程组"""
+    prefix = f"  [{os.path.basename(os.path.abspath(cwd))}] " if cwd else "  "
     try:
-        subprocess.run(command, check=True, capture_output=True, text=True)
+        _trace.run(command, check=True, cwd=cwd, echo=echo, prefix=prefix, isolate=isolate)
     except subprocess.CalledProcessError as e:
-        print(f"执行命令失败: {' '.join(command)}")
+        print(f"执行命令失败: {' '.join(command)}{f'（{cwd}）' if cwd else ''}")
         print(f"错误信息: {e.stderr}")
         exit(1)
 
-def get_current_branch():
+def run_git(cwd, *args):
+    """通过共享 git 层执行 git 命令，遇到错误时报错"""
+    result = _git.repo(cwd).run(*args)
+    if result.returncode != 0:
+        print(f"执行命令失败: git {' '.join(args)}{f'（{cwd}）' if cwd else ''}")
+        print(f"错误信息: {result.stderr}")
+        exit(1)
+    return result
+
+def get_current_branch(cwd=None):
     """获取当前 Git 分支名称"""
-    result = subprocess.run(["git", "rev-parse", "--abbrev-ref", "HEAD"], capture_output=True, text=True, check=True)
-    return result.stdout.strip()
+    return _git.repo(cwd).current_branch()
 
-def git_pull():
+def git_pull(cwd=None):
     """拉取最新代码"""
     print("拉取最新代码...")
-    run_command(["git", "pull"])
+    run_git(cwd, "pull")
     print("代码已更新。")
 
-def compare_versions(current_version, target_version):
-    """比较两个版本号，返回 -1（小于）、0（等于）、1（大于）"""
-    current_parts = list(map(int, current_version.split('.')))
-    target_parts = list(map(int, target_version.split('.')))
-
-    for i in range(3):  # 比较 MAJOR, MINOR, PATCH
-        if current_parts[i] < target_parts[i]:
-            return -1
-        elif current_parts[i] > target_parts[i]:
-            return 1
-    return 0
-
 def update_version(current_version, branch_version=None):
     """根据分支和当前版本号更新版本号"""
-    if branch_version:
-        # 分支是 release-X.Y.Z 格式
-        if compare_versions(current_version, branch_version) < 0:
-            # 当前版本低于分支版本，直接使用分支版本
-            return branch_version
-        elif compare_versions(current_version, branch_version) == 0:
-            # 当前版本等于分支版本，递增补丁号
-            parts = current_version.split('.')
-            major, minor, patch = map(int, parts)
-            return f"{major}.{minor}.{patch + 1}"
-
-    # 非 release 分支，递增补丁号
-    parts = current_version.split('.')
-    major, minor, patch = map(int, parts)
-    return f"{major}.{minor}.{patch + 1}"
+    current = _semver.parse(current_version)
+    # 分支是 release-X.Y.Z 格式且当前版本低于分支版本时，直接使用分支版本；否则递增补丁号
+    if branch_version and current < _semver.parse(branch_version):
+        return branch_version
+    return str(current.next_patch())
 
 def extract_project_name(pubspec_path):
     """从 pubspec.yaml 提取项目名称"""
-    with open(pubspec_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    match = re.search(r"^\s*name\s*:\s*['\"]?([\w\-\.]+)['\"]?", content, flags=re.MULTILINE)
-    return match.group(1) if match else "unknown"
+    return PubspecDocument.load(pubspec_path).name or "unknown"
 
 def update_pubspec_preserve_format(pubspec_path):
     """更新 pubspec.yaml 版本号，保持原格式"""
@@ -69,29 +63,23 @@ def update_pubspec_preserve_format(pubspec_path):
         print(f"错误：找不到 {pubspec_path}")
         return None, None
 
-    with open(pubspec_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    pattern = r"^(?P<prefix>\s*version\s*:\s*)(?P<quote>['\"]?)(?P<version>\d+\.\d+\.\d+)(?P=quote)"
-    match = re.search(pattern, content, flags=re.MULTILINE)
+    doc = PubspecDocument.load(pubspec_path)
+    match = PUBSPEC_VERSION_PATTERN.match(doc.version or "")
     if not match:
         print("未在 pubspec.yaml 中找到 version 字段。")
         return None, None
 
-    current_version = match.group("version")
+    current_version = match.group(1)
     # 检查当前分支是否为 release-X.Y.Z
-    current_branch = get_current_branch()
+    current_branch = get_current_branch(os.path.dirname(os.path.abspath(pubspec_path)))
     branch_version = None
     branch_match = re.match(r"^release-(\d+\.\d+\.\d+)$", current_branch)
     if branch_match:
         branch_version = branch_match.group(1)
 
     new_version = update_version(current_version, branch_version)
-    replacement = f"{match.group('prefix')}{match.group('quote')}{new_version}{match.group('quote')}"
-    new_content = re.sub(pattern, replacement, content, count=1, flags=re.MULTILINE)
-
-    with open(pubspec_path, 'w', encoding='utf-8') as f:
-        f.write(new_content)
+    doc.set_version(new_version + match.group(2))
+    doc.save(pubspec_path)
 
     print(f"版本号已更新: {current_version} -> {new_version}")
     return new_version, current_version
@@ -101,73 +89,141 @@ def update_changelog(changelog_path, new_version, msg):
     now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
     header = f"## {new_version}\n\n- {now}\n- {msg}\n\n"
 
-    if not os.path.exists(changelog_path):
-        with open(changelog_path, 'w', encoding='utf-8') as f:
-            f.write(header)
-    else:
-        with open(changelog_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        with open(changelog_path, 'w', encoding='utf-8') as f:
-            f.write(header + content)
+    with _trace.span("write CHANGELOG.md", "file", path=changelog_path):
+        if not os.path.exists(changelog_path):
+            with open(changelog_path, 'w', encoding='utf-8') as f:
+                f.write(header)
+        else:
+            with open(changelog_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            with open(changelog_path, 'w', encoding='utf-8') as f:
+                f.write(header + content)
 
     print(f"CHANGELOG.md 已更新: 版本 {new_version}")
 
-def git_commit(pubspec_path, changelog_path, project_name, new_version):
-    """提交更新到 Git"""
+def git_commit(pubspec_path, changelog_path, project_name, new_version, cwd=None, push=True):
+    """提交更新到 Git（push=False 时只提交，稍后用 git_push 推送）"""
     commit_message = f"build: {project_name} + {new_version}"
 
-    run_command(["git", "add", pubspec_path, changelog_path, "pubspec.lock"])
-    run_command(["git", "commit", "-m", commit_message])
+    run_git(cwd, "add", pubspec_path, changelog_path, "pubspec.lock")
+    run_git(cwd, "commit", "-m", commit_message)
     print(f"已提交 Git: {commit_message}")
 
-    run_command(["git", "push"])
+    if push:
+        git_push(cwd)
+
+def git_push(cwd=None):
+    run_git(cwd, "push")
     print("Git 代码已推送。")
 
-def flutter_pub_get():
-    """执行 flutter pub get"""
+def undo_commit(cwd=None):
+    """撤销最近一次本地提交，改动留在工作区（随后由文件快照恢复）"""
+    _git.repo(cwd).run("reset", "-q", "HEAD~1", check=True)
+
+def flutter_pub_get(cwd=None):
+    """执行 flutter pub get；pubspec.lock 仍满足约束时跳过"""
+    package_dir = cwd or "."
+    satisfied, _ = _pub_lock.check_lock(package_dir)
+    if satisfied:
+        print("pubspec.lock 仍满足所有依赖约束，跳过 flutter pub get。")
+        return
+
+    before = _pub_lock.locked_versions(package_dir)
     print("执行 flutter pub get...")
-    run_command(["flutter", "pub", "get"])
+    run_command(["flutter", "pub", "get"], cwd, isolate=True)
     print("flutter pub get 执行成功！")
+    for change in _pub_lock.diff_versions(before, _pub_lock.locked_versions(package_dir)):
+        print(f"  pubspec.lock: {change}")
 
-def flutter_pub_publish():
+def flutter_pub_publish(cwd=None):
     """执行 Flutter 预检查 & 发布"""
     print("发布新版本...")
-    run_command(["flutter", "pub", "publish", "--force"])
+    run_command(["flutter", "pub", "publish", "--force"], cwd, echo=True)
     print("Flutter 发布成功！")
 
-def main():
+def published_unchanged(package_dir):
+    """可发布文件与某次已发布的内容完全一致时返回该次发布记录"""
+    digest, count, rehashed = _publish_manifest.content_hash(package_dir)
+    entry = _publish_manifest.find_published(digest)
+    if entry:
+        print(f"⏭ {count} 个可发布文件（重新读取 {rehashed} 个）与已发布的 {entry['name']} {entry['version']} "
+              f"完全一致，跳过发布（使用 --force 强制发布）")
+    return entry
+
+def record_published(package_dir, project_name, new_version):
+    """发布成功后记录本次发布内容的哈希"""
+    digest, _, _ = _publish_manifest.content_hash(package_dir)
+    _publish_manifest.record_published(digest, project_name, new_version)
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="自动更新版本，提交 Git 并发布 Flutter 包")
     parser.add_argument("--pubspec", default="pubspec.yaml", help="pubspec.yaml 文件路径")
     parser.add_argument("--changelog", default="CHANGELOG.md", help="CHANGELOG.md 文件路径")
-    parser.add_argument("--msg", nargs="+", required=True, help="更新说明内容（不需要引号）")
-    args = parser.parse_args()
+    parser.add_argument("--msg", nargs="+", help="更新说明内容（不需要引号）")
+    parser.add_argument("--force", action="store_true", help="可发布文件与已发布版本完全一致时也照常发布")
+    parser.add_argument("--trace", metavar="OUT.json", help="记录各阶段耗时并输出 Chrome trace 格式文件")
+    parser.add_argument("--stats", action="store_true", help="打印历史运行中各阶段耗时的 p50/p95 后退出")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        _trace.print_stats("pub_publish")
+        return
+    if not args.msg:
+        parser.error("缺少参数 --msg")
+    _trace.setup("pub_publish", args.trace)
 
     msg_text = " ".join(args.msg)
 
-    git_pull()
-
-    # 获取包名
-    project_name = extract_project_name(args.pubspec)
-
-    # 更新 pubspec.yaml
-    new_version, old_version = update_pubspec_preserve_format(args.pubspec)
-    if new_version is None:
+    package_dir = os.path.dirname(os.path.abspath(args.pubspec))
+
+    # pull 之后先比较可发布文件与已发布内容，一致时直接结束；
+    # 之后读取包名、更新版本号 → CHANGELOG、flutter pub get 三条线并发（pub get 不受自身版本号影响），
+    # 全部完成后提交推送、发布；推送前任一步失败都会恢复 pubspec.yaml / CHANGELOG.md / pubspec.lock
+    def check_content(ctx):
+        if not args.force and published_unchanged(package_dir):
+            raise _stages.Stop()
+
+    def bump_version(ctx):
+        ctx.snapshot(args.pubspec)
+        new_version, old_version = update_pubspec_preserve_format(args.pubspec)
+        if new_version is None:
+            raise _stages.Stop()
+        return new_version, old_version
+
+    def write_changelog(ctx):
+        ctx.snapshot(args.changelog)
+        update_changelog(args.changelog, ctx.results["bump version"][0], msg_text)
+
+    def pub_get(ctx):
+        ctx.snapshot("pubspec.lock")
+        flutter_pub_get()
+
+    def commit_and_push(ctx):
+        git_commit(args.pubspec, args.changelog, ctx.results["read name"], ctx.results["bump version"][0], push=False)
+        ctx.on_rollback(undo_commit, "撤销本地提交")
+        git_push()
+
+    def publish(ctx):
+        flutter_pub_publish()
+        record_published(package_dir, ctx.results["read name"], ctx.results["bump version"][0])
+
+    pipeline = _stages.Pipeline("pub_publish")
+    pipeline.add("pull", lambda ctx: git_pull())
+    pipeline.add("content check", check_content, after=["pull"])
+    pipeline.add("read name", lambda ctx: extract_project_name(args.pubspec), after=["content check"])
+    pipeline.add("bump version", bump_version, after=["content check"])
+    pipeline.add("changelog", write_changelog, after=["bump version"])
+    pipeline.add("pub get", pub_get, after=["content check"])
+    pipeline.add("commit & push", commit_and_push, after=["read name", "changelog", "pub get"], irreversible=True)
+    pipeline.add("publish", publish, after=["commit & push"], irreversible=True)
+    results = pipeline.run()
+    if results is None:
         return
-
-    # 更新 CHANGELOG.md
-    update_changelog(args.changelog, new_version, msg_text)
-
-    # 运行 flutter pub get
-    flutter_pub_get()
-
-    # 提交 Git
-    git_commit(args.pubspec, args.changelog, project_name, new_version)
-
-    # 发布 Flutter 包
-    flutter_pub_publish()
+    pipeline.print_report()
 
     # 最终输出信息
-    print(f"✅ 版本升级成功：{project_name} {old_version} → {new_version}")
+    new_version, old_version = results["bump version"]
+    print(f"✅ 版本升级成功：{results['read name']} {old_version} → {new_version}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,71 +1,159 @@
 #!/usr/bin/env python3
 import re
-import subprocess
 import sys
 import threading
-import time
 from itertools import cycle
 import argparse
-import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import _git
+import _trace
+from _cache import ResultCache, hash_files, hash_key
+import _pub_cache_index
+import _pub_hosted
+import _pub_lock
+import _pub_outdated
+import _semver
+import _stages
+from _pubspec import PubspecDocument, find_pubspecs
 
 # =======================
 # Argument Parser
 # =======================
-parser = argparse.ArgumentParser(
-    description="🛠 自动检查并更新 pubspec.yaml 中的私有依赖版本，并执行 Git 提交。",
-    epilog="""
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="🛠 自动检查并更新 pubspec.yaml 中的私有依赖版本，并执行 Git 提交。",
+        epilog="""
 示例：
   python3 update_deps.py "更新依赖版本"
   python3 update_deps.py "更新依赖版本" --no-commit
   python3 update_deps.py "仅更新 release 补丁" --strict-release
-    """,
-    formatter_class=argparse.RawDescriptionHelpFormatter
-)
-parser.add_argument(
-    "commit_message",
-    nargs="?",
-    default="up deps",
-    help="Git 提交信息（默认为 'up deps'）"
-)
-parser.add_argument(
-    "--no-commit",
-    action="store_true",
-    help="只更新依赖但不提交到 Git"
-)
-parser.add_argument(
-    "--strict-release",
-    action="store_true",
-    help="如果当前是 release-* 分支，仅更新对应次版本（如 3.21.*）依赖"
-)
-args = parser.parse_args()
-
-commit_message = args.commit_message
-no_commit = args.no_commit
-strict_release = args.strict_release
+  python3 update_deps.py "批量更新依赖" --workspace packages --jobs 8
+  python3 update_deps.py "更新依赖版本" --refresh
+  python3 update_deps.py "更新依赖版本" --resolver hosted
+  python3 update_deps.py "更新依赖版本" --resolver offline
+  python3 update_deps.py "更新依赖版本" --trace trace.json
+  python3 update_deps.py --stats
+        """,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "commit_message",
+        nargs="?",
+        default="up deps",
+        help="Git 提交信息（默认为 'up deps'）"
+    )
+    parser.add_argument(
+        "--no-commit",
+        action="store_true",
+        help="只更新依赖但不提交到 Git"
+    )
+    parser.add_argument(
+        "--strict-release",
+        action="store_true",
+        help="如果当前是 release-* 分支，仅更新对应次版本（如 3.21.*）依赖"
+    )
+    parser.add_argument(
+        "--workspace",
+        metavar="ROOT",
+        help="批量模式：更新 ROOT 下所有 pubspec.yaml，并合并为一次 Git 提交"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="并发数：--workspace 模式下同时处理的包数量，以及 hosted 查询的连接数（默认 min(8, CPU 数)）"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="忽略 flutter pub outdated 结果缓存，强制重新查询"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=600,
+        help="flutter pub outdated 结果缓存有效期（秒，默认 600，0 表示不使用缓存）"
+    )
+    parser.add_argument(
+        "--resolver",
+        choices=["outdated", "hosted", "offline"],
+        default="outdated",
+        help="最新版本来源：outdated（flutter pub outdated，默认）、hosted（直接并发查询 pub 仓库 API）"
+             "或 offline（仅使用本地 ~/.pub-cache）"
+    )
+    parser.add_argument(
+        "--hosted-url",
+        help="--resolver hosted 时覆盖 pubspec.yaml 中的 hosted 地址"
+    )
+    parser.add_argument(
+        "--include",
+        metavar="PATTERN",
+        nargs="+",
+        default=list(DEFAULT_INCLUDE),
+        help="需要更新的依赖名通配符（默认 ap_*）"
+    )
+    parser.add_argument(
+        "--exclude",
+        metavar="PATTERN",
+        nargs="+",
+        default=list(DEFAULT_EXCLUDE),
+        help="排除的依赖名通配符（默认 ap_recaptcha*）"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="OUT.json",
+        help="记录各阶段耗时并输出 Chrome trace 格式文件"
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="打印历史运行中各阶段耗时的 p50/p95 后退出"
+    )
+    return parser
+
+
+# 运行参数，由 main() 根据命令行设置
+commit_message = "up deps"
+no_commit = False
+strict_release = False
+workspace_root = None
+jobs = 1
+refresh = False
+cache_ttl = 600
+resolver = "outdated"
+hosted_url = None
 commit_updates = []
+pub_cache_index = None
+pub_cache_index_lock = threading.Lock()
+hosted_client = None
+hosted_client_lock = threading.Lock()
+
+DEFAULT_INCLUDE = ("ap_*",)
+DEFAULT_EXCLUDE = ("ap_recaptcha*",)
+OUTDATED_STDERR_LIMIT = 64 * 1024  # pub outdated 的 stdout 边读边解析，只保留少量输出用于报错
+OUTDATED_CACHE_MAX_ENTRIES = 128
+UPGRADE_SECTIONS = ("dependencies", "dependency_overrides")
 
 
 # =======================
 # Git Functions
 # =======================
 def get_current_branch():
-    result = subprocess.run(["git", "rev-parse", "--abbrev-ref", "HEAD"],
-                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    return result.stdout.decode().strip()
+    return _git.repo().current_branch()
 
 
 def has_remote_branch(branch_name):
-    result = subprocess.run(["git", "ls-remote", "--heads", "origin", branch_name],
-                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    return bool(result.stdout)
+    return _git.repo().has_remote_branch(branch_name)
 
 
 def git_pull(branch):
     if has_remote_branch(branch):
         print(f"⬇️ 正在拉取远程分支 {branch}...")
-        result = subprocess.run(["git", "pull"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        result = _git.repo().pull()
         if result.returncode != 0:
-            print(f"❌ 拉取失败：{result.stderr.decode()}")
+            print(f"❌ 拉取失败：{result.stderr}")
             sys.exit(1)
         print("✅ 拉取成功。")
     else:
@@ -82,56 +170,116 @@ def get_release_version_prefix(branch_name: str) -> str | None:
     return None
 
 
-def is_valid_version(version) -> bool:
-    if not isinstance(version, str):
-        return False
-    return bool(re.fullmatch(r"^[0-9.]+$", version.strip()))
-
-
-def compare_versions(v1, v2):
-    parts1, parts2 = [list(map(int, v.replace('^', '').split('.'))) for v in (v1, v2)]
-    while len(parts1) < len(parts2):
-        parts1.append(0)
-    while len(parts2) < len(parts1):
-        parts2.append(0)
-    return (parts1 > parts2) - (parts1 < parts2)
-
-
 # =======================
 # Outdated Dependency Fetcher
 # =======================
-def get_latest_ap_packages(version_prefix: str = None):
-    result = subprocess.run(
-        ["flutter", "pub", "outdated", "--json"],
-        capture_output=True,
-        text=True
+include_patterns = DEFAULT_INCLUDE
+exclude_patterns = DEFAULT_EXCLUDE
+is_ap_package = _pub_outdated.package_filter(include_patterns, exclude_patterns)
+
+
+def set_package_patterns(include, exclude):
+    global include_patterns, exclude_patterns, is_ap_package
+    include_patterns = tuple(include)
+    exclude_patterns = tuple(exclude)
+    is_ap_package = _pub_outdated.package_filter(include_patterns, exclude_patterns)
+
+
+def get_latest_ap_packages(version_prefix: str = None, cwd=None, only_outdated=True):
+    if resolver == "hosted":
+        return _pub_hosted.get_latest_packages(os.path.join(cwd or ".", "pubspec.yaml"), is_ap_package,
+                                               version_prefix, hosted_url, only_outdated, jobs, get_hosted_client())
+    if resolver == "offline":
+        return _pub_cache_index.get_latest_packages(os.path.join(cwd or ".", "pubspec.yaml"), is_ap_package,
+                                                    version_prefix, only_outdated, load_pub_cache_index())
+
+    cache = ResultCache("pub_outdated", ttl=cache_ttl, max_entries=OUTDATED_CACHE_MAX_ENTRIES)
+    package_dir = cwd or "."
+    cache_key = hash_key(
+        hash_files(os.path.join(package_dir, "pubspec.yaml"), os.path.join(package_dir, "pubspec.lock")),
+        version_prefix,
+        str(only_outdated),
+        "\0".join(include_patterns),
+        "\0".join(exclude_patterns),
     )
-    if result.returncode != 0:
-        print("❌ flutter pub outdated 失败")
-        print(result.stderr)
-        exit(1)
+    if cache_ttl > 0 and not refresh:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print(f"⚡️ 使用缓存的 flutter pub outdated 结果{f'（{cwd}）' if cwd else ''}")
+            return cached
+
+    outdated = fetch_latest_ap_packages(version_prefix, cwd, only_outdated)
+    if cache_ttl > 0:
+        cache.put(cache_key, outdated)
+    return outdated
+
 
-    data = json.loads(result.stdout)
+def load_pub_cache_index():
+    global pub_cache_index
+    with pub_cache_index_lock:
+        if pub_cache_index is None:
+            pub_cache_index = _pub_cache_index.PubCacheIndex()
+            rescanned = pub_cache_index.load()
+            print(f"📚 已加载本地 pub 缓存索引（{len(pub_cache_index.packages)} 个包，重新扫描 {rescanned} 个目录）")
+    return pub_cache_index
+
+
+def get_hosted_client():
+    """整个运行共用一个 HostedClient，预取的结果在正式解析时复用"""
+    global hosted_client
+    with hosted_client_lock:
+        if hosted_client is None:
+            hosted_client = _pub_hosted.HostedClient(workers=jobs)
+    return hosted_client
+
+
+def prefetch_versions(pubspec_file="pubspec.yaml"):
+    """与拉取并发执行、不依赖工作区内容的准备工作：offline 加载 pub 缓存索引，
+    hosted 按拉取前的 pubspec 预先查询版本（拉取后依赖有变化时解析阶段会补查）"""
+    if resolver == "offline":
+        load_pub_cache_index()
+    elif resolver == "hosted":
+        try:
+            dependencies = _pub_hosted.read_hosted_dependencies(pubspec_file, is_ap_package)
+        except Exception:  # 可能读到了拉取中的文件，预取只是优化
+            return
+        get_hosted_client().prefetch(_pub_hosted.query_urls(dependencies, hosted_url))
+
+
+def fetch_latest_ap_packages(version_prefix: str = None, cwd=None, only_outdated=True):
+    """边读取 flutter pub outdated --json 边解析，只处理匹配 include / exclude 的包"""
     outdated = {}
 
-    for pkg_info in data.get("packages", []):
-        pkg_name = pkg_info.get("package")
-        if not pkg_name.startswith("ap_"):
-            continue
-        if pkg_name.startswith("ap_recaptcha"):
-            continue
+    def on_package(pkg_info):
+        current = (pkg_info.get("current") or {}).get("version")
+        latest = (pkg_info.get("latest") or {}).get("version")
 
-        current = pkg_info.get("current", {}).get("version")
-        latest = pkg_info.get("latest", {}).get("version")
-
-        if not (is_valid_version(current) and is_valid_version(latest)):
-            continue
+        if not all(_semver.is_valid(version, allow_prerelease=False) for version in (current, latest)):
+            return
 
         if version_prefix and not latest.startswith(version_prefix + "."):
-            continue
+            return
+
+        if not only_outdated or _semver.compare(latest, current) > 0:
+            outdated[pkg_info["package"]] = latest
 
-        if compare_versions(latest, current) > 0:
-            outdated[pkg_name] = latest
+    stream = _pub_outdated.OutdatedStream(is_ap_package, on_package)
+
+    def on_line(name, line):
+        if name == "stdout":
+            stream.feed(line + "\n")
+
+    result = _trace.run(["flutter", "pub", "outdated", "--json"], cwd=cwd, max_output=OUTDATED_STDERR_LIMIT,
+                        on_line=on_line, isolate=True)
+    if result.returncode != 0:
+        print(f"❌ flutter pub outdated 失败{f'（{cwd}）' if cwd else ''}")
+        print(result.stderr)
+        exit(1)
+    try:
+        stream.close()
+    except ValueError as e:
+        print(f"❌ {e}{f'（{cwd}）' if cwd else ''}")
+        exit(1)
 
     return outdated
 
@@ -139,172 +287,272 @@ def get_latest_ap_packages(version_prefix: str = None):
 # =======================
 # pubspec.yaml Modifier
 # =======================
-def process_dependency_block(dep_block, latest_versions):
-    dep_name = None
-    version_line_idx = -1
-    updated = False
-
-    for line in dep_block:
-        match = re.match(r'^\s{2}(\S+):', line)
-        if match:
-            dep_name = match.group(1)
-            break
-
-    if dep_name is None or dep_name not in latest_versions:
-        return dep_block, updated
-
-    new_version = latest_versions[dep_name]
-
-    for idx, line in enumerate(dep_block):
-        if re.match(r'^\s*version:\s*\S+', line):
-            version_line_idx = idx
-            break
-
-    if version_line_idx == -1:
-        return dep_block, updated
-
-    match = re.match(r'(\s*version:\s*)(\S+)', dep_block[version_line_idx])
-    if match:
-        current_version = match.group(2)
-        if compare_versions(current_version, new_version) == -1:
-            if current_version.startswith('^'):
-                new_version = f"^{new_version}"
-            print(f"🔄 升级 {dep_name}: {current_version} -> {new_version}")
-            commit_updates.append(f"🔄 {dep_name}: {current_version} → {new_version}")
-            dep_block[version_line_idx] = f"{match.group(1)}{new_version}\n"
-            updated = True
-
-    return dep_block, updated
-
-
-def update_pubspec(pubspec_file, latest_versions):
-    with open(pubspec_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    new_lines = []
-    in_dependencies = False
-    dep_block = []
+def update_pubspec(pubspec_file, latest_versions, updates=None):
+    if updates is None:
+        updates = commit_updates
+    doc = PubspecDocument.load(pubspec_file)
     any_update = False
 
-    for line in lines:
-        if re.match(r'^(dependencies|dependency_overrides):\s*$', line):
-            in_dependencies = True
-            new_lines.append(line)
-            continue
-
-        if not in_dependencies:
-            new_lines.append(line)
-            continue
-
-        if line.strip() == "":
-            if dep_block:
-                updated_block, updated = process_dependency_block(dep_block, latest_versions)
-                new_lines.extend(updated_block)
-                dep_block = []
-                if updated:
-                    any_update = True
-            new_lines.append(line)
+    for dep in doc.dependencies(UPGRADE_SECTIONS):
+        new_version = latest_versions.get(dep.name)
+        current_version = doc.dependency_version(dep)
+        if new_version is None or not _semver.is_valid((current_version or "").lstrip("^"), allow_prerelease=False):
             continue
-
-        if in_dependencies and not re.match(r'^ {2}', line):
-            if dep_block:
-                updated_block, updated = process_dependency_block(dep_block, latest_versions)
-                new_lines.extend(updated_block)
-                dep_block = []
-                if updated:
-                    any_update = True
-            in_dependencies = False
-            new_lines.append(line)
-            continue
-
-        if re.match(r'^ {2}\S+:', line):
-            if dep_block:
-                updated_block, updated = process_dependency_block(dep_block, latest_versions)
-                new_lines.extend(updated_block)
-                dep_block = []
-                if updated:
-                    any_update = True
-            dep_block.append(line)
-        else:
-            if dep_block:
-                dep_block.append(line)
-            else:
-                new_lines.append(line)
-
-    if dep_block:
-        updated_block, updated = process_dependency_block(dep_block, latest_versions)
-        new_lines.extend(updated_block)
-        if updated:
+        if _semver.compare(current_version, new_version) < 0:
+            if current_version.startswith('^'):
+                new_version = f"^{new_version}"
+            print(f"🔄 升级 {dep.name}: {current_version} -> {new_version}")
+            updates.append(f"🔄 {dep.name}: {current_version} → {new_version}")
+            doc.set_dependency_version(dep, new_version)
             any_update = True
 
-    with open(pubspec_file, 'w', encoding='utf-8') as f:
-        f.writelines(new_lines)
-
+    doc.save(pubspec_file)
     return any_update
 
 
 # =======================
 # flutter pub get
 # =======================
-def loading_animation(stop_event):
+def pub_get_progress():
+    """flutter pub get 的进度显示：随输出推进 spinner，并显示最新一行输出"""
     spinner = cycle(["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"])
-    while not stop_event.is_set():
-        sys.stdout.write(f"\r{next(spinner)} 正在执行 flutter pub get... ")
-        sys.stdout.flush()
-        time.sleep(0.1)
-    sys.stdout.write("\r✅ flutter pub get 执行成功！    \n")
-    sys.stdout.flush()
 
+    def on_line(stream, line):
+        line = line.strip()
+        if line:
+            sys.stdout.write(f"\r\033[K{next(spinner)} 正在执行 flutter pub get... {line[:60]}")
+            sys.stdout.flush()
+    return on_line
+
+
+def run_pub_get(cwd=None, on_line=None):
+    return _trace.run(["flutter", "pub", "get"], cwd=cwd, on_line=on_line, isolate=True)
 
-def flutter_pub_get():
-    stop_event = threading.Event()
-    loader_thread = threading.Thread(target=loading_animation, args=(stop_event,))
-    loader_thread.start()
 
-    process = subprocess.run(["flutter", "pub", "get"], stdout=subprocess.PIPE,
-                             stderr=subprocess.PIPE, text=True)
-    stop_event.set()
-    loader_thread.join()
+def lock_still_valid(cwd=None):
+    satisfied, _ = _pub_lock.check_lock(cwd or ".")
+    if satisfied:
+        print(f"⚡️ pubspec.lock 仍满足新的依赖约束，跳过 flutter pub get{f'（{cwd}）' if cwd else ''}")
+    return satisfied
 
+
+def print_lock_changes(before, cwd=None):
+    changes = _pub_lock.diff_versions(before, _pub_lock.locked_versions(cwd or "."))
+    if changes:
+        print(f"📝 pubspec.lock 变更{f'（{cwd}）' if cwd else ''}：")
+        for change in changes:
+            print(f"    {change}")
+
+
+def flutter_pub_get():
+    if lock_still_valid():
+        return
+    before = _pub_lock.locked_versions(".")
+    print("⠋ 正在执行 flutter pub get... ", end="", flush=True)
+    process = run_pub_get(on_line=pub_get_progress())
     if process.returncode != 0:
-        print(f"\n❌ flutter pub get 失败：{process.stderr}")
+        print(f"\r\033[K❌ flutter pub get 失败：{process.stderr}")
         sys.exit(1)
+    print("\r\033[K✅ flutter pub get 执行成功！")
+    print_lock_changes(before)
 
 
 # =======================
 # Git Commit & Push
 # =======================
-def git_commit_and_push(branch):
+def git_commit_and_push(branch, paths=("pubspec.yaml", "pubspec.lock"), on_commit=None):
+    """on_commit 在本地提交成功、推送之前调用（用于登记回滚）"""
     if commit_updates:
         full_commit_msg = commit_message + "\n\n" + "\n".join(commit_updates)
-        subprocess.run(["git", "add", "pubspec.yaml", "pubspec.lock"], check=True)
-        subprocess.run(["git", "commit", "-m", full_commit_msg], check=True)
+        git_repo = _git.repo()
+        git_repo.add(*paths)
+        git_repo.commit(full_commit_msg)
+        if on_commit is not None:
+            on_commit()
         if has_remote_branch(branch):
-            subprocess.run(["git", "push"], check=True)
+            git_repo.push()
             print("✅ 提交并推送成功！")
         else:
             print("✅ 已提交到本地（未推送）。")
 
 
 # =======================
-# Main Execution
+# Workspace Mode
 # =======================
-def main():
+def collect_ap_dependencies(pubspec_file):
+    doc = PubspecDocument.load(pubspec_file)
+    return {dep.name for dep in doc.dependencies(UPGRADE_SECTIONS) if is_ap_package(dep.name)}
+
+
+def resolve_workspace_versions(pubspecs, version_prefix):
+    """选出覆盖所有 ap_* 依赖的最少包集合，并发执行 pub outdated 后合并最新版本"""
+    if resolver == "hosted":
+        dependencies = {}
+        for pubspec_file in pubspecs:
+            dependencies.update(_pub_hosted.query_urls(
+                _pub_hosted.read_hosted_dependencies(pubspec_file, is_ap_package), hosted_url))
+        print(f"🔍 并发查询 {len(dependencies)} 个 ap_* 依赖的最新版本...")
+        return get_hosted_client().latest_versions(dependencies, version_prefix)
+    if resolver == "offline":
+        names = set().union(*(_pub_hosted.read_hosted_dependencies(p, is_ap_package) for p in pubspecs))
+        return load_pub_cache_index().latest_versions(names, version_prefix)
+
+    deps = {p: collect_ap_dependencies(p) for p in pubspecs}
+    remaining = set().union(*deps.values()) if deps else set()
+    selected = []
+    while remaining:
+        best = max(deps, key=lambda p: len(deps[p] & remaining))
+        selected.append(best)
+        remaining -= deps[best]
+
+    print(f"🔍 通过 {len(selected)} 个包解析 ap_* 最新版本...")
+    latest_versions = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(lambda p: get_latest_ap_packages(version_prefix, cwd=os.path.dirname(p),
+                                                            only_outdated=False), selected)
+        for result in results:
+            for name, version in result.items():
+                if name not in latest_versions or _semver.compare(version, latest_versions[name]) > 0:
+                    latest_versions[name] = version
+    return latest_versions
+
+
+def upgrade_workspace_package(pubspec_file, latest_versions):
+    updates = []
+    package_dir = os.path.dirname(pubspec_file)
+    if not update_pubspec(pubspec_file, latest_versions, updates) or lock_still_valid(package_dir):
+        return updates, None
+    before = _pub_lock.locked_versions(package_dir)
+    process = run_pub_get(cwd=package_dir)
+    if process.returncode == 0:
+        print_lock_changes(before, package_dir)
+    return updates, process
+
+
+def run_workspace(branch, version_prefix):
+    pubspecs = find_pubspecs(workspace_root)
+    if not pubspecs:
+        print(f"❌ {workspace_root} 下没有找到 pubspec.yaml")
+        sys.exit(1)
+    print(f"📂 在 {workspace_root} 中找到 {len(pubspecs)} 个包")
+
+    latest_versions = resolve_workspace_versions(pubspecs, version_prefix)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(lambda p: upgrade_workspace_package(p, latest_versions), pubspecs))
+
+    changed_paths = []
+    failed = []
+    for pubspec_file, (updates, process) in zip(pubspecs, results):
+        if not updates:
+            continue
+        package_dir = os.path.dirname(pubspec_file)
+        if process is not None and process.returncode != 0:
+            failed.append((package_dir, process.stderr))
+            continue
+        commit_updates.append(f"📦 {os.path.relpath(package_dir)}")
+        commit_updates.extend(f"  {update}" for update in updates)
+        changed_paths.append(pubspec_file)
+        lock_file = os.path.join(package_dir, "pubspec.lock")
+        if os.path.exists(lock_file):
+            changed_paths.append(lock_file)
+
+    for package_dir, stderr in failed:
+        print(f"❌ flutter pub get 失败（{package_dir}）：{stderr}")
+    if failed:
+        sys.exit(1)
+
+    if not changed_paths:
+        print("❌ 没有更新任何依赖。")
+        return
+
+    print(f"✅ 已更新 {sum(1 for p in changed_paths if p.endswith('pubspec.yaml'))} 个包")
+    if no_commit:
+        print("📦 已更新依赖，但未提交到 Git（--no-commit）。")
+        return
+
+    ignored_paths = _git.repo().check_ignore(changed_paths)
+    git_commit_and_push(branch, [p for p in changed_paths if p not in ignored_paths])
+
+
+# =======================
+# Pipeline
+# =======================
+def build_pipeline(branch, version_prefix):
+    """remote check → pull 与 prefetch（hosted / offline 的版本预取）并发，汇合后
+    resolve versions → update pubspec → pub get → commit & push；
+    flutter pub outdated 会改写 pubspec.lock 和 .dart_tool，必须在拉取结束后才能运行，默认 resolver 下没有可并发的阶段"""
+    def rewrite(ctx):
+        ctx.snapshot("pubspec.yaml")
+        return update_pubspec("pubspec.yaml", ctx.results["resolve versions"])
+
+    def pub_get(ctx):
+        if ctx.results["update pubspec"]:
+            ctx.snapshot("pubspec.lock")
+            flutter_pub_get()
+
+    def commit_and_push(ctx):
+        if ctx.results["update pubspec"]:
+            git_commit_and_push(branch, on_commit=lambda: ctx.on_rollback(
+                lambda: _git.repo().run("reset", "-q", "HEAD~1", check=True), "撤销本地提交"))
+
+    pipeline = _stages.Pipeline("pub_upgrade")
+    pipeline.add("remote check", lambda ctx: has_remote_branch(branch))
+    pipeline.add("pull", lambda ctx: git_pull(branch), after=["remote check"])
+    after_pull = ["pull"]
+    if resolver in ("hosted", "offline"):
+        pipeline.add("prefetch", lambda ctx: prefetch_versions())
+        after_pull.append("prefetch")
+    pipeline.add("resolve versions", lambda ctx: get_latest_ap_packages(version_prefix), after=after_pull)
+    pipeline.add("update pubspec", rewrite, after=["resolve versions"])
+    pipeline.add("pub get", pub_get, after=["update pubspec"])
+    if not no_commit:
+        pipeline.add("commit & push", commit_and_push, after=["pub get", "remote check"], irreversible=True)
+    return pipeline
+
+
+def main(argv=None):
+    global commit_message, no_commit, strict_release, workspace_root, jobs, refresh, cache_ttl, resolver, hosted_url
+    args = build_parser().parse_args(argv)
+    commit_message = args.commit_message
+    no_commit = args.no_commit
+    strict_release = args.strict_release
+    workspace_root = args.workspace
+    jobs = max(1, args.jobs)
+    refresh = args.refresh
+    cache_ttl = args.cache_ttl
+    resolver = args.resolver
+    hosted_url = args.hosted_url
+    set_package_patterns(args.include, args.exclude)
+
+    if args.stats:
+        _trace.print_stats("pub_upgrade")
+        return
+    _trace.setup("pub_upgrade", args.trace)
+
     branch = get_current_branch()
-    git_pull(branch)
     version_prefix = get_release_version_prefix(branch) if strict_release else None
     if version_prefix:
         print(f"📦 开启 strict 模式：当前为 release 分支，仅更新 {version_prefix}.* 范围依赖")
 
-    latest_versions = get_latest_ap_packages(version_prefix)
-    if update_pubspec("pubspec.yaml", latest_versions):
-        flutter_pub_get()
-        if not no_commit:
-            git_commit_and_push(branch)
-        else:
+    try:
+        if workspace_root:
+            with _trace.span("pull"):
+                git_pull(branch)
+            with _trace.span("workspace"):
+                run_workspace(branch, version_prefix)
+            return
+
+        pipeline = build_pipeline(branch, version_prefix)
+        results = pipeline.run()
+    except _pub_hosted.HostedError as e:
+        print(e)
+        sys.exit(1)
+    if results["update pubspec"]:
+        if no_commit:
             print("📦 已更新依赖，但未提交到 Git（--no-commit）。")
     else:
         print("❌ 没有更新任何依赖。")
+    pipeline.print_report()
 
 
 if __name__ == "__main__":
@@ -1,106 +1,89 @@
 #!/usr/bin/env python3
-import re
+import argparse
 import subprocess
 from pathlib import Path
-import sys
 
+import _git
+import _semver
+import _trace
+from _pubspec import PubspecDocument
 
-def parse_version_string(version_str):
-    match = re.match(r'^(\d+)\.(\d+)\.(\d+)(?:\+([^\s]+))?$', version_str.strip())
-    if not match:
-        raise ValueError("版本号格式不正确，应为 x.y.z 或 x.y.z+build")
-    major, minor, patch = map(int, match.group(1, 2, 3))
-    build = match.group(4)
-    return [major, minor, patch], build
-
-
-def upgrade_version(version_parts, level):
-    major, minor, patch = version_parts
-    if level == 1:
-        minor += 1
-        patch = 0
-    elif level == 2:
-        patch += 1
-    else:
-        raise ValueError("升级级别只能为 1（minor）或 2（patch）")
-    return [major, minor, patch]
-
-
-def format_version(version_parts, build=None):
-    version = f"{version_parts[0]}.{version_parts[1]}.{version_parts[2]}"
-    return f"{version}+{build}" if build else version
+LEVELS = {"1": "next_minor", "2": "next_patch"}
 
 
 def git_commit_and_push(new_version_str):
     """
     执行 git add + commit + push
     """
+    git_repo = _git.repo()
     try:
-        subprocess.run(["git", "add", "pubspec.yaml"], check=True)
-        subprocess.run(["git", "commit", "-m", f"chore: bump version to {new_version_str}"],
-                       check=True)
+        git_repo.add("pubspec.yaml")
+        git_repo.commit(f"chore: bump version to {new_version_str}")
         print(f"✅ Git commit 成功，提交信息: chore: bump version to {new_version_str}")
     except subprocess.CalledProcessError as e:
-        print("❌ Git 提交失败:", e)
+        print("❌ Git 提交失败:", e.stderr or e)
         return False
 
     try:
-        subprocess.run(["git", "push"], check=True)
+        git_repo.push()
         print("✅ Git push 成功")
         return True
     except subprocess.CalledProcessError as e:
-        print("❌ Git push 失败:", e)
+        print("❌ Git push 失败:", e.stderr or e)
         return False
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="升级 pubspec.yaml 版本号并提交推送")
+    parser.add_argument("level", nargs="?", choices=["1", "2"], help="1 - 次版本号（minor），2 - 补丁号（patch）")
+    parser.add_argument("--trace", metavar="OUT.json", help="记录各阶段耗时并输出 Chrome trace 格式文件")
+    parser.add_argument("--stats", action="store_true", help="打印历史运行中各阶段耗时的 p50/p95 后退出")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        _trace.print_stats("pub_version_upgrade")
+        return
+    _trace.setup("pub_version_upgrade", args.trace)
+
     pubspec = Path("pubspec.yaml")
     if not pubspec.exists():
         print("❌ 找不到 pubspec.yaml 文件")
         return
 
-    content = pubspec.read_text(encoding="utf-8")
-
-    match = re.search(r'^version:\s*([0-9]+\.[0-9]+\.[0-9]+(?:\+[^\s]+)?)', content, re.MULTILINE)
-    if not match:
+    doc = PubspecDocument.load(pubspec)
+    old_version_str = doc.version
+    version = _semver.parse(old_version_str or "")
+    if version is None:
         print("❌ pubspec.yaml 中未找到 version 字段")
         return
 
-    old_version_str = match.group(1)
-    version_parts, build = parse_version_string(old_version_str)
-
     print(f"📦 当前版本: {old_version_str}")
     print("请选择升级级别：")
     print("1 - 次版本号（minor）升级 → X.*Y*.0")
     print("2 - 补丁号（patch）升级 → X.Y.*Z*")
 
     # 新增：支持命令行参数
-    if len(sys.argv) > 1 and sys.argv[1] in ("1", "2"):
-        level = sys.argv[1]
+    if args.level:
+        level = args.level
         print(f"已通过参数输入升级级别: {level}")
     else:
         level = input("请输入 1 或 2: ").strip()
-    if level not in ("1", "2"):
+    if level not in LEVELS:
         print("❌ 无效输入")
         return
 
-    new_version_parts = upgrade_version(version_parts, int(level))
-    new_version_str = format_version(new_version_parts, build)
+    # 预发布标识在升级后去掉，+build 保留
+    new_version_str = str(getattr(version, LEVELS[level])(keep_build=True))
 
     print(f"✅ 版本将从 {old_version_str} 升级为 {new_version_str}")
 
-    new_content = re.sub(
-        r'^(version:\s*)([0-9]+\.[0-9]+\.[0-9]+(?:\+[^\s]+)?)',
-        rf'\g<1>{new_version_str}',
-        content,
-        flags=re.MULTILINE
-    )
-
-    pubspec.write_text(new_content, encoding="utf-8")
+    doc.set_version(new_version_str)
+    doc.save(pubspec)
     print("✅ pubspec.yaml 已更新")
 
     # 提交并推送
-    git_commit_and_push(new_version_str)
+    with _trace.span("commit & push"):
+        git_commit_and_push(new_version_str)
 
 
 if __name__ == "__main__":
@@ -1,29 +1,15 @@
+import argparse
+import hashlib
+import json
 import os
 import re
+import string
+from concurrent.futures import ThreadPoolExecutor
 
-def camel_to_snake(s):
-    return re.sub(r'(?<!^)(?=[A-Z])', '_', s).lower()
-
-def snake_to_pascal(s: str) -> str:
-    return ''.join(word.title() for word in s.split('_'))
-
-def main():
-    # 获取用户输入
-    base_name = input("Enter the class name (e.g., Product): ").strip()
-
-    # 生成类名和文件名
-    class_name = snake_to_pascal(base_name)
-    file_base = camel_to_snake(class_name)
-    lower_class = class_name[0].lower() + class_name[1:]
-
-    # 默认输出目录为当前目录，可以手动修改
-    output_dir = input("Enter output directory (leave empty for current directory): ").strip() or os.getcwd()
-
-    # 创建输出目录
-    os.makedirs(output_dir, exist_ok=True)
+SPEC_SUFFIXES = (".json", ".yaml", ".yml")
 
-    # 生成 Notifier 文件内容
-    notifier_content = f"""import 'package:ap_ui/ap_ui.dart';
+# Notifier 文件模板
+NOTIFIER_TEMPLATE = """import 'package:ap_ui/ap_ui.dart';
 
 import '{file_base}_state.c.dart';
 
@@ -41,8 +27,8 @@ class {class_name}NotifierImpl extends {class_name}Notifier {{
 }}
 """
 
-    # 生成 State 文件内容
-    state_content = f"""import 'package:copy_with_extension/copy_with_extension.dart';
+# State 文件模板
+STATE_TEMPLATE = """import 'package:copy_with_extension/copy_with_extension.dart';
 
 part '{file_base}_state.c.g.dart';
 
@@ -60,17 +46,167 @@ class {class_name}State {{
 }}
 """
 
-    # 构建完整文件路径
-    notifier_path = os.path.join(output_dir, f"{file_base}_notifier.dart")
-    state_path = os.path.join(output_dir, f"{file_base}_state.c.dart")
+def compile_template(template):
+    """把模板预先切分为 [(字面量, 字段名)]，渲染时只做拼接"""
+    return [(literal, field) for literal, field, _, _ in string.Formatter().parse(template)]
 
-    # 写入文件
-    for path, content in [(notifier_path, notifier_content),
-                          (state_path, state_content)]:
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
+def render(compiled, values):
+    return "".join(literal + (values[field] if field else "") for literal, field in compiled)
 
-    print(f"Generated files at:\n{notifier_path}\n{state_path}")
+# 模板只编译一次：(文件名后缀, 编译后的模板)
+TEMPLATES = [
+    ("_notifier.dart", compile_template(NOTIFIER_TEMPLATE)),
+    ("_state.c.dart", compile_template(STATE_TEMPLATE)),
+]
+
+def camel_to_snake(s):
+    return re.sub(r'(?<!^)(?=[A-Z])', '_', s).lower()
+
+def snake_to_pascal(s: str) -> str:
+    return ''.join(word.title() for word in s.split('_'))
+
+def render_entry(base_name, output_dir):
+    """返回 [(文件路径, 内容)]"""
+    class_name = snake_to_pascal(base_name)
+    file_base = camel_to_snake(class_name)
+    values = {
+        "class_name": class_name,
+        "file_base": file_base,
+        "lower_class": class_name[0].lower() + class_name[1:],
+    }
+    return [(os.path.join(output_dir, file_base + suffix), render(compiled, values))
+            for suffix, compiled in TEMPLATES]
+
+def load_spec(spec_path):
+    """读取 spec（JSON，或安装了 PyYAML 时的 YAML），返回 [(名称, 输出目录)]
+
+    格式：{"output_dir": "lib/features", "entries": ["Product", {"name": "Order", "dir": "order"}]}
+    也可以直接是 entries 列表；相对目录以 spec 文件所在目录为基准。
+    """
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if spec_path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise SystemExit("❌ 读取 YAML spec 需要 PyYAML（pip install pyyaml），或改用 JSON")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+
+    if isinstance(data, list):
+        data = {"entries": data}
+    base_dir = os.path.join(os.path.dirname(os.path.abspath(spec_path)), data.get("output_dir") or "")
+    entries = []
+    for entry in data.get("entries") or []:
+        if isinstance(entry, str):
+            entry = {"name": entry}
+        entries.append((entry["name"], os.path.normpath(os.path.join(base_dir, entry.get("dir") or ""))))
+    return entries
+
+def content_hash(data):
+    return hashlib.sha256(data).digest()
+
+def write_if_changed(path, content, force=False):
+    """内容与磁盘上相同时跳过，返回是否写入"""
+    data = content.encode('utf-8')
+    if not force:
+        try:
+            if os.path.getsize(path) == len(data):
+                with open(path, 'rb') as f:
+                    if content_hash(f.read()) == content_hash(data):
+                        return False
+        except FileNotFoundError:
+            pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+def generate(entries, jobs=8, force=False):
+    """并发渲染并写入所有条目，返回 (写入的文件, 未变化的文件数)"""
+    files = [item for name, output_dir in entries for item in render_entry(name, output_dir)]
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        results = list(pool.map(lambda item: write_if_changed(*item, force=force), files))
+    written = [path for (path, _), changed in zip(files, results) if changed]
+    return written, len(files) - len(written)
+
+def run_spec(spec_path, jobs, force):
+    entries = load_spec(spec_path)
+    written, unchanged = generate(entries, jobs, force)
+    for path in written:
+        print(f"  ✍️ {path}")
+    print(f"✅ {len(entries)} 个条目：写入 {len(written)} 个文件，{unchanged} 个未变化已跳过")
+
+def spec_files(target):
+    """返回绝对路径，与监听器回调中的路径一致"""
+    target = os.path.abspath(target)
+    if os.path.isdir(target):
+        return sorted(os.path.join(target, name) for name in os.listdir(target) if name.endswith(SPEC_SUFFIXES))
+    return [target]
+
+def run_watch(target, jobs, force, polling):
+    """监听 spec 文件或目录：与上次解析结果比较，只重新生成新增或修改的条目"""
+    from _watch import watch
+
+    parsed = {}
+
+    def refresh(paths):
+        for path in sorted(map(os.path.abspath, paths)):
+            name = os.path.basename(path)
+            if not os.path.exists(path):
+                if parsed.pop(path, None) is not None:
+                    print(f"🗑 {name} 已删除（已生成的文件保留）")
+                continue
+            try:
+                entries = load_spec(path)
+            except (Exception, SystemExit) as e:
+                print(f"❌ 解析 {name} 失败：{e}")
+                continue
+            previous = set(parsed.get(path, ()))
+            changed = [entry for entry in entries if entry not in previous]
+            parsed[path] = entries
+            if not changed:
+                print(f"⏭ {name}：没有新增或修改的条目")
+                continue
+            written, unchanged = generate(changed, jobs, force)
+            for written_path in written:
+                print(f"  ✍️ {written_path}")
+            print(f"🔁 {name}：{len(changed)} 个条目变化，写入 {len(written)} 个文件，{unchanged} 个未变化")
+
+    refresh(spec_files(target))
+    watch(target, refresh, accept=lambda path: path.endswith(SPEC_SUFFIXES), polling=polling)
+
+def run_interactive():
+    # 获取用户输入
+    base_name = input("Enter the class name (e.g., Product): ").strip()
+
+    # 默认输出目录为当前目录，可以手动修改
+    output_dir = input("Enter output directory (leave empty for current directory): ").strip() or os.getcwd()
+
+    # 创建输出目录并写入文件
+    os.makedirs(output_dir, exist_ok=True)
+    files = render_entry(base_name, output_dir)
+    for path, content in files:
+        write_if_changed(path, content, force=True)
+
+    print("Generated files at:\n" + "\n".join(path for path, _ in files))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成 Riverpod Notifier / State 模板文件（不带参数时交互输入）")
+    parser.add_argument("--spec", help="批量模式：JSON / YAML spec 文件，列出类名和输出目录")
+    parser.add_argument("--jobs", type=int, default=min(8, os.cpu_count() or 1), help="并发写入数")
+    parser.add_argument("--force", action="store_true", help="即使内容未变化也重写文件")
+    parser.add_argument("--watch", metavar="PATH", help="持续监听 spec 文件或 spec 目录，只重新生成新增或修改的条目")
+    parser.add_argument("--poll", action="store_true", help="--watch 时强制使用 mtime 轮询（不使用 inotify）")
+    args = parser.parse_args(argv)
+
+    if args.watch:
+        run_watch(args.watch, args.jobs, args.force, args.poll)
+    elif args.spec:
+        run_spec(args.spec, args.jobs, args.force)
+    else:
+        run_interactive()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,119 @@
+"""_pub_lock.check_lock：git / hosted 依赖的来源描述变化时不能跳过 flutter pub get
+
+    python3 -m unittest discover tests
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+CACHE_DIR = tempfile.mkdtemp(prefix="test_pub_lock_")
+os.environ["SCRIPT_TOOL_CACHE_DIR"] = CACHE_DIR  # 不污染 ~/.script_tool/cache
+atexit.register(shutil.rmtree, CACHE_DIR, True)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flutter"))
+
+import _pub_lock  # noqa: E402
+
+LOCK = """# Generated by pub
+packages:
+  ap_git:
+    dependency: "direct main"
+    description:
+      path: "packages/ap_git"
+      ref: main
+      resolved-ref: "0123456789abcdef0123456789abcdef01234567"
+      url: "https://github.com/org/ap_git.git"
+    source: git
+    version: "1.0.0"
+  ap_hosted:
+    dependency: "direct main"
+    description:
+      name: ap_hosted
+      sha256: "0000000000000000000000000000000000000000000000000000000000000000"
+      url: "https://dart.cloudsmith.io/org/app"
+    source: hosted
+    version: "1.2.0"
+  flutter:
+    dependency: "direct main"
+    description: flutter
+    source: sdk
+    version: "0.0.0"
+sdks:
+  dart: ">=3.0.0 <4.0.0"
+"""
+
+GIT = """    git:
+      url: https://github.com/org/ap_git.git
+      ref: main
+      path: packages/ap_git
+"""
+HOSTED = """    hosted: https://dart.cloudsmith.io/org/app/
+    version: ^1.0.0
+"""
+
+
+def pubspec(git=GIT, hosted=HOSTED):
+    return ("name: app\nversion: 1.0.0\n\ndependencies:\n  flutter:\n    sdk: flutter\n"
+            f"  ap_git:\n{git}  ap_hosted:\n{hosted}")
+
+
+class CheckLockTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        os.makedirs(os.path.join(self.root, ".dart_tool"))
+        with open(os.path.join(self.root, ".dart_tool", "package_config.json"), "w", encoding="utf-8") as f:
+            f.write("{}")
+        with open(os.path.join(self.root, "pubspec.lock"), "w", encoding="utf-8") as f:
+            f.write(LOCK)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check(self, text):
+        with open(os.path.join(self.root, "pubspec.yaml"), "w", encoding="utf-8") as f:
+            f.write(text)
+        return _pub_lock.check_lock(self.root)
+
+    def test_unchanged(self):
+        satisfied, reason = self.check(pubspec())
+        self.assertTrue(satisfied, reason)
+
+    def test_git_url_changed(self):
+        satisfied, reason = self.check(pubspec(git=GIT.replace("org/ap_git", "fork/ap_git")))
+        self.assertFalse(satisfied)
+        self.assertIn("url", reason)
+
+    def test_git_ref_changed(self):
+        satisfied, reason = self.check(pubspec(git=GIT.replace("ref: main", "ref: release-1.2")))
+        self.assertFalse(satisfied)
+        self.assertIn("ref", reason)
+
+    def test_git_path_changed(self):
+        satisfied, reason = self.check(pubspec(git=GIT.replace("path: packages/ap_git", "path: ap_git")))
+        self.assertFalse(satisfied)
+        self.assertIn("path", reason)
+
+    def test_git_shorthand_defaults(self):
+        """`git: URL` 简写对应 lock 中的 ref: HEAD、path: "."，与上面的 lock 不一致"""
+        satisfied, reason = self.check(pubspec(git="    git: https://github.com/org/ap_git.git\n"))
+        self.assertFalse(satisfied)
+        self.assertIn("ref/path", reason)
+
+    def test_hosted_url_changed(self):
+        satisfied, reason = self.check(pubspec(hosted=HOSTED.replace("org/app", "org/other")))
+        self.assertFalse(satisfied)
+        self.assertIn("url", reason)
+
+    def test_hosted_url_block_form(self):
+        hosted = "    hosted:\n      name: ap_hosted\n      url: https://dart.cloudsmith.io/org/app\n    version: ^1.0.0\n"
+        satisfied, reason = self.check(pubspec(hosted=hosted))
+        self.assertTrue(satisfied, reason)
+        satisfied, _ = self.check(pubspec(hosted=hosted.replace("org/app", "org/other")))
+        self.assertFalse(satisfied)
+
+
+if __name__ == "__main__":
+    unittest.main()
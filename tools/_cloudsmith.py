@@ -0,0 +1,233 @@
+"""Cloudsmith REST API 客户端（替代逐页调用 cloudsmith CLI + jq）
+
+- 读取与 cloudsmith CLI 相同的 config.ini / credentials.ini（[default] 与 [profile:xxx]）；
+- 连接池 requests.Session，分页列表并发预取、按页序返回；
+- 遇到 429 / 5xx 时按 Retry-After / X-RateLimit-Reset 退避，所有线程共享同一个暂停时间点。
+"""
+import configparser
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+DEFAULT_API_HOST = "https://api.cloudsmith.io"
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def config_dirs(config_dir=None):
+    """按优先级返回查找 config.ini / credentials.ini 的目录"""
+    dirs = [Path(config_dir)] if config_dir else []
+    dirs += [Path.cwd(), Path(__file__).resolve().parent, Path.home() / ".cloudsmith"]
+    if sys.platform == "darwin":
+        dirs.append(Path.home() / "Library" / "Application Support" / "cloudsmith")
+    dirs.append(Path(os.environ.get("XDG_CONFIG_HOME", Path.home() / ".config")) / "cloudsmith")
+    return dirs
+
+
+def _read_profile(filename, profile, config_dir=None):
+    """读取第一个存在的 filename 中 [default] 与 [profile:xxx] 合并后的配置"""
+    for directory in config_dirs(config_dir):
+        path = directory / filename
+        if not path.is_file():
+            continue
+        parser = configparser.ConfigParser(interpolation=None)
+        parser.read(path, encoding="utf-8")
+        values = {key: value for key, value in parser.items("default")} if parser.has_section("default") else {}
+        section = f"profile:{profile}"
+        if profile and parser.has_section(section):
+            values.update({key: value for key, value in parser.items(section) if value})
+        return {key: value.strip() for key, value in values.items()}
+    return {}
+
+
+def load_settings(profile=None, config_dir=None, api_host=None, api_key=None):
+    """合并配置文件、环境变量和命令行参数（后者优先）"""
+    profile = profile or os.environ.get("CLOUDSMITH_PROFILE")
+    config = _read_profile("config.ini", profile, config_dir)
+    credentials = _read_profile("credentials.ini", profile, config_dir)
+    host = api_host or os.environ.get("CLOUDSMITH_API_HOST") or config.get("api_host") or DEFAULT_API_HOST
+    if "://" not in host:
+        host = f"https://{host}"
+    return {
+        "api_host": host.rstrip("/"),
+        "api_key": api_key or os.environ.get("CLOUDSMITH_API_KEY") or credentials.get("api_key") or "",
+        "api_proxy": config.get("api_proxy") or None,
+        "api_ssl_verify": config.get("api_ssl_verify", "true").lower() not in ("false", "0", "no"),
+        "api_user_agent": config.get("api_user_agent") or "script_tools-cloudsmith",
+    }
+
+
+def parse_timestamp(value):
+    """ISO 8601（支持 Z 后缀）-> aware datetime；没有时区时按 UTC 处理"""
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def normalize_timestamp(value):
+    """ISO 8601 -> UTC `YYYY-MM-DDTHH:MM:SS.ffffffZ`，规范化后可直接按字符串比较"""
+    return parse_timestamp(value).astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+class CloudsmithClient:
+    def __init__(self, settings, workers=8, timeout=60):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_host = settings["api_host"]
+        self.workers = workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.verify = settings["api_ssl_verify"]
+        self.session.headers["User-Agent"] = settings["api_user_agent"]
+        self.session.headers["Accept"] = "application/json"
+        if settings["api_key"]:
+            self.session.headers["X-Api-Key"] = settings["api_key"]
+        if settings["api_proxy"]:
+            self.session.proxies = {"http": settings["api_proxy"], "https": settings["api_proxy"]}
+
+        self._pause_lock = threading.Lock()
+        self._pause_until = 0.0
+        self.retries = 0
+
+    # ---------- 请求与退避 ----------
+    def _wait_for_rate_limit(self):
+        with self._pause_lock:
+            delay = self._pause_until - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _retry_delay(self, response, attempt):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(BACKOFF_MAX, float(retry_after))
+            except ValueError:
+                pass
+        reset = response.headers.get("X-RateLimit-Reset") if response is not None else None
+        if reset:
+            try:
+                return min(BACKOFF_MAX, max(0.0, float(reset) - time.time()))
+            except ValueError:
+                pass
+        return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * (0.5 + random.random() / 2)
+
+    def request(self, method, path, **kwargs):
+        """发送请求；429 / 5xx / 连接错误时退避重试，超过 MAX_RETRIES 后抛出异常"""
+        import requests
+
+        url = f"{self.api_host}{path}"
+        for attempt in range(MAX_RETRIES + 1):
+            self._wait_for_rate_limit()
+            response = None
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == MAX_RETRIES:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS or attempt == MAX_RETRIES:
+                    return response
+
+            delay = self._retry_delay(response, attempt)
+            with self._pause_lock:
+                self.retries += 1
+                if response is not None and response.status_code == 429:
+                    self._pause_until = max(self._pause_until, time.time() + delay)
+            if response is None or response.status_code != 429:
+                time.sleep(delay)
+        return response
+
+    # ---------- 包列表 ----------
+    def list_page(self, owner, repo, page, page_size=100, query=None, sort=None):
+        """返回 (packages, page_total)；page_total 取自 X-Pagination-PageTotal，缺失时为 None"""
+        params = {"page": page, "page_size": page_size}
+        if query:
+            params["query"] = query
+        if sort:
+            params["sort"] = sort
+        response = self.request("GET", f"/v1/packages/{owner}/{repo}/", params=params)
+        if response.status_code == 404 and page > 1:
+            return [], None
+        response.raise_for_status()
+        total = response.headers.get("X-Pagination-PageTotal")
+        return response.json(), int(total) if total else None
+
+    def count_packages(self, owner, repo):
+        """远端包总数，取自 X-Pagination-Count，缺失时为 None"""
+        response = self.request("GET", f"/v1/packages/{owner}/{repo}/", params={"page": 1, "page_size": 1})
+        response.raise_for_status()
+        count = response.headers.get("X-Pagination-Count")
+        return int(count) if count else None
+
+    def iter_pages(self, owner, repo, page_size=100, start_page=1, query=None, sort=None):
+        """按页序逐页返回 (page, packages)；首页确定总页数后，其余页在线程池中预取"""
+        packages, page_total = self.list_page(owner, repo, start_page, page_size, query, sort)
+        yield start_page, packages
+        if not packages:
+            return
+        if page_total is None:
+            page = start_page + 1
+            while packages:
+                packages, _ = self.list_page(owner, repo, page, page_size, query, sort)
+                if packages:
+                    yield page, packages
+                page += 1
+            return
+
+        pages = iter(range(start_page + 1, page_total + 1))
+        window = max(1, self.workers * 2)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = []
+            for page in pages:
+                pending.append((page, pool.submit(self.list_page, owner, repo, page, page_size, query, sort)))
+                if len(pending) >= window:
+                    break
+            while pending:
+                page, future = pending.pop(0)
+                next_page = next(pages, None)
+                if next_page is not None:
+                    pending.append((next_page, pool.submit(self.list_page, owner, repo, next_page,
+                                                           page_size, query, sort)))
+                yield page, future.result()[0]
+
+    # ---------- 删除 ----------
+    def delete_package(self, owner, repo, identifier):
+        """删除单个包，返回 (是否成功, 错误信息, 是否值得重试)；404 视为已删除"""
+        try:
+            response = self.request("DELETE", f"/v1/packages/{owner}/{repo}/{identifier}/")
+        except Exception as e:
+            return False, str(e), True
+        if response.status_code in (200, 202, 204, 404):
+            return True, None, False
+        # 429 / 5xx 已在 request() 中重试过，仍失败时下次运行再试；其他 4xx（如 403）重试也不会成功
+        return False, f"HTTP {response.status_code}: {response.text[:200]}", response.status_code in RETRY_STATUS
+
+    def delete_packages(self, owner, repo, identifiers, on_result=None):
+        """并发删除（并发数为 workers），返回 {identifier: (是否成功, 错误信息, 是否值得重试)}"""
+        results = {}
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = {pool.submit(self.delete_package, owner, repo, identifier): identifier
+                       for identifier in identifiers}
+            for future in as_completed(futures):
+                identifier = futures[future]
+                results[identifier] = future.result()
+                if on_result:
+                    on_result(identifier, *results[identifier])
+        except BaseException:
+            # 中断时不再执行排队中的删除，只等待正在进行的请求
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        pool.shutdown()
+        return results
@@ -0,0 +1,178 @@
+"""Cloudsmith 包的本地 SQLite 清单
+
+- 每个仓库一个数据库（~/.script_tool/cloudsmith/OWNER__REPO.sqlite3），索引 (name, version, uploaded_at)；
+- 增量同步：按上传时间倒序翻页，遇到早于上次同步水位线的包即停止；
+  远端总数与本地不一致（有包被删除）时补一次全量同步，保证保留策略不会把已删除的版本算作保留；
+- 可导入 `cloudsmith ls packages --output-format=json` 导出的 packages.json；
+- uploaded_at 统一保存为 UTC `YYYY-MM-DDTHH:MM:SS.ffffffZ`，可直接按字符串比较。
+"""
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from _cloudsmith import normalize_timestamp
+
+INVENTORY_DIR = Path.home() / ".script_tool" / "cloudsmith"
+SYNC_SORT = "-date"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    slug_perm   TEXT PRIMARY KEY,
+    name        TEXT NOT NULL,
+    version     TEXT NOT NULL,
+    slug        TEXT,
+    uploaded_at TEXT NOT NULL,
+    size        INTEGER,
+    format      TEXT,
+    data        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_packages_name_version_uploaded ON packages (name, version, uploaded_at);
+CREATE INDEX IF NOT EXISTS idx_packages_uploaded ON packages (uploaded_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def default_path(owner, repo):
+    return INVENTORY_DIR / f"{owner}__{repo}.sqlite3"
+
+
+def _row(package):
+    return (
+        package["slug_perm"],
+        package.get("name") or package.get("slug", ""),
+        package.get("version") or "",
+        package.get("slug"),
+        normalize_timestamp(package["uploaded_at"]),
+        package.get("size"),
+        package.get("format"),
+        json.dumps(package, ensure_ascii=False, separators=(",", ":")),
+    )
+
+
+class Inventory:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # ---------- 元数据 ----------
+    def get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @property
+    def watermark(self):
+        """上次完整同步时最新包的 uploaded_at"""
+        return self.get_meta("watermark")
+
+    # ---------- 写入 ----------
+    def upsert(self, packages):
+        rows = [_row(package) for package in packages if package.get("slug_perm") and package.get("uploaded_at")]
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def remove(self, identifiers):
+        with self.db:
+            self.db.executemany("DELETE FROM packages WHERE slug_perm = ?", [(i,) for i in identifiers])
+
+    def import_json(self, path):
+        """导入 packages.json（{"data": [...]} 或包列表），返回导入数量"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return self.upsert(data.get("data", []) if isinstance(data, dict) else data)
+
+    def sync(self, client, owner, repo, page_size=100, full=False, on_page=None):
+        """从 API 同步；增量模式遇到早于水位线的页即停止，之后比对远端包总数，
+        不一致（远端有包被删除）或无法获取总数时再做一次全量同步，删除远端已不存在的包。
+        返回 (获取页数, 写入包数)"""
+        watermark = None if full else self.watermark
+        newest = self.watermark
+        pages = written = 0
+        reconciled = False
+
+        if watermark:
+            page = 1
+            while True:
+                packages, page_total = client.list_page(owner, repo, page, page_size, sort=SYNC_SORT)
+                pages += 1
+                written += self.upsert(packages)
+                if on_page:
+                    on_page(page, len(packages))
+                if packages:
+                    newest = max(newest, normalize_timestamp(packages[0]["uploaded_at"]))
+                oldest = min((normalize_timestamp(p["uploaded_at"]) for p in packages), default=None)
+                if not packages or oldest < watermark or (page_total and page >= page_total):
+                    break
+                page += 1
+            # 新包都已写入，本地是远端的超集：总数相等即说明没有包被删除
+            reconciled = client.count_packages(owner, repo) == self.count()
+
+        if not reconciled:
+            full_pages, full_written, newest = self._sync_all(client, owner, repo, page_size, newest, on_page)
+            pages += full_pages
+            written += full_written
+
+        with self.db:
+            if newest:
+                self.set_meta("watermark", newest)
+            self.set_meta("last_sync", str(time.time()))
+        return pages, written
+
+    def _sync_all(self, client, owner, repo, page_size, newest, on_page):
+        """翻完所有页并删除远端已不存在的包，返回 (获取页数, 写入包数, 最新上传时间)"""
+        seen = set()
+        pages = written = 0
+        for page, packages in client.iter_pages(owner, repo, page_size, sort=SYNC_SORT):
+            pages += 1
+            written += self.upsert(packages)
+            seen.update(package["slug_perm"] for package in packages)
+            if on_page:
+                on_page(page, len(packages))
+            for package in packages:
+                uploaded = normalize_timestamp(package["uploaded_at"])
+                newest = max(newest, uploaded) if newest else uploaded
+        stale = [row[0] for row in self.db.execute("SELECT slug_perm FROM packages")
+                 if row[0] not in seen]
+        self.remove(stale)
+        return pages, written, newest
+
+    # ---------- 查询 ----------
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM packages").fetchone()[0]
+
+    def expired(self, cutoff):
+        """上传时间早于 cutoff 的包（dict 列表，按上传时间升序）"""
+        rows = self.db.execute("SELECT data FROM packages WHERE uploaded_at < ? ORDER BY uploaded_at",
+                               (normalize_timestamp(cutoff),))
+        return [json.loads(row[0]) for row in rows]
+
+    def summary(self):
+        """每个包名的 (版本数, 总大小, 最早上传, 最近上传)"""
+        return self.db.execute(
+            "SELECT name, COUNT(*), COALESCE(SUM(size), 0), MIN(uploaded_at), MAX(uploaded_at) "
+            "FROM packages GROUP BY name ORDER BY COUNT(*) DESC, name"
+        ).fetchall()
+
+    def versions(self, name):
+        return self.db.execute(
+            "SELECT version, uploaded_at, slug_perm FROM packages WHERE name = ? ORDER BY uploaded_at DESC",
+            (name,),
+        ).fetchall()
+
+    def rows(self):
+        """(slug_perm, name, version, uploaded_at) 游标，供保留策略装入列式表"""
+        return self.db.execute("SELECT slug_perm, name, version, uploaded_at FROM packages")
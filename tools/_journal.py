@@ -0,0 +1,142 @@
+"""追加写入的 JSONL 任务日志：先写入计划，再逐项记录状态，中断后可从日志继续
+
+每行一条记录：
+    {"type": "plan", ...}                       计划头（任务参数）
+    {"type": "item", "id": ..., "item": {...}}  计划中的一项
+    {"type": "state", "id": ..., "state": "done" | "failed" | "rejected", "error": ...}
+
+failed 的项重新运行时会重试；rejected 表示不会再成功（如 403）或已失败 MAX_ATTEMPTS 次，
+与 done 一样视为已结束，日志可以完成，下次运行会重新规划。
+
+状态记录每 FSYNC_EVERY 条或 FSYNC_INTERVAL 秒批量 fsync 一次；
+读取时忽略损坏的最后一行（写入中途被杀）。
+"""
+import json
+import os
+import threading
+import time
+
+FSYNC_EVERY = 500
+FSYNC_INTERVAL = 1.0
+MAX_ATTEMPTS = 3
+FINAL_STATES = ("done", "rejected")
+
+
+class Journal:
+    def __init__(self, path, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL):
+        self.path = str(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.header = None
+        self.items = {}
+        self.states = {}
+        self.failures = {}  # {id: 已失败次数}
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._load()
+
+    def _load(self):
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                kind = record.get("type")
+                if kind == "plan":
+                    self.header, self.items, self.states, self.failures = record, {}, {}, {}
+                elif kind == "item":
+                    self.items[record["id"]] = record.get("item")
+                elif kind == "state":
+                    self.states[record["id"]] = (record["state"], record.get("error"))
+                    if record["state"] == "failed":
+                        self.failures[record["id"]] = self.failures.get(record["id"], 0) + 1
+
+    # ---------- 查询 ----------
+    def counts(self):
+        """{"done": n, "failed": n, "rejected": n, "pending": n}"""
+        counts = {"done": 0, "failed": 0, "rejected": 0, "pending": 0}
+        for identifier in self.items:
+            counts[self.states.get(identifier, ("pending",))[0]] += 1
+        return counts
+
+    def unfinished(self):
+        """未结束（待执行或可重试的失败）的 [(id, item)]，按计划顺序"""
+        return [(identifier, item) for identifier, item in self.items.items()
+                if self.states.get(identifier, ("pending",))[0] not in FINAL_STATES]
+
+    def is_complete(self):
+        return self.header is not None and not self.unfinished()
+
+    # ---------- 写入 ----------
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._unsynced += 1
+
+    def _sync(self, force=False):
+        if not self._unsynced:
+            return
+        now = time.monotonic()
+        if force or self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._last_sync = now
+
+    def _open(self, mode):
+        if self._file is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, mode, encoding="utf-8")
+
+    def plan(self, header, items):
+        """开始新计划（覆盖旧日志）；items: [(id, item)]"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._open("w")
+            self.header = {"type": "plan", "created": time.time(), **header}
+            self.items = {}
+            self.states = {}
+            self.failures = {}
+            self._write(self.header)
+            for identifier, item in items:
+                self.items[identifier] = item
+                self._write({"type": "item", "id": identifier, "item": item})
+            self._sync(force=True)
+
+    def record(self, identifier, state, error=None):
+        """记录一项的结果；线程安全。失败次数达到 MAX_ATTEMPTS 时记为 rejected，返回实际记录的状态"""
+        with self._lock:
+            self._open("a")
+            if state == "failed":
+                self.failures[identifier] = self.failures.get(identifier, 0) + 1
+                if self.failures[identifier] >= MAX_ATTEMPTS:
+                    state = "rejected"
+            self.states[identifier] = (state, error)
+            record = {"type": "state", "id": identifier, "state": state}
+            if error:
+                record["error"] = error
+            self._write(record)
+            self._sync()
+            return state
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync(force=True)
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,200 @@
+"""保留策略引擎：把包列表装入列式数组，按规则批量计算保留 / 删除
+
+规则（先由删除规则选出候选，再由保留规则豁免）：
+- max_age:   [{"pattern": "ap_*", "cutoff": "2024-06-06T00:00:00Z"} 或 {"pattern": "*", "days": 180}]
+             每个包名使用第一条匹配的规则，上传时间早于 cutoff 的成为删除候选；
+- keep_last: 每个包名保留版本号最高的 N 个版本；
+- keep_release_heads: 每个包名的每个 X.Y 保留最高版本（对应 release-X.Y 分支的最新发布）；
+- keep_locked: pubspec.lock 文件或目录（递归查找），其中引用的 name@version 一律保留。
+
+按列计算：模式匹配只对不重复的包名做一次，再通过 name_codes 列映射到每一行；
+每条规则得到一列 0/1 mask（map / compress 整列处理，没有逐行的 Python 循环体），
+mask 之间转成整数按位与 / 非合并，命中数用 bytes.count 统计。
+keep_last / keep_release_heads 按 (包名, 版本) 共用一次排序，只在包名分组的边界上取行。
+"""
+import fnmatch
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from itertools import compress, repeat
+from operator import add, lt, mul, ne
+
+from _cloudsmith import TIMESTAMP_FORMAT, normalize_timestamp
+
+VERSION_PATTERN = re.compile(r'^(\d+)\.(\d+)\.(\d+)(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+LOCK_PACKAGE_PATTERN = re.compile(r'^ {2}(\S+):\s*$')
+LOCK_VERSION_PATTERN = re.compile(r'^ {4}version:\s*"?([^"\s]+)"?\s*$')
+UNPARSED_VERSION = (-1, -1, -1, 0, "")
+
+
+def version_key(version):
+    match = VERSION_PATTERN.match(version or "")
+    if not match:
+        return UNPARSED_VERSION
+    major, minor, patch, pre = match.groups()
+    return int(major), int(minor), int(patch), 0 if pre else 1, pre or ""
+
+
+def _is_normalized(value):
+    return len(value) == 27 and value[10] == "T" and value[-1] == "Z"
+
+
+class PackageTable:
+    """列式包表：ids / name_codes / versions / uploaded 等长，names[code] 为包名"""
+    __slots__ = ("ids", "names", "name_codes", "versions", "uploaded")
+
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.name_codes = []
+        self.versions = []
+        self.uploaded = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows: 可迭代的 (slug_perm, name, version, uploaded_at)"""
+        table = cls()
+        codes = {}
+        for identifier, name, version, uploaded in rows:
+            code = codes.get(name)
+            if code is None:
+                code = codes[name] = len(table.names)
+                table.names.append(name)
+            table.ids.append(identifier)
+            table.name_codes.append(code)
+            table.versions.append(version or "")
+            table.uploaded.append(uploaded if _is_normalized(uploaded) else normalize_timestamp(uploaded))
+        return table
+
+    @classmethod
+    def from_packages(cls, packages):
+        return cls.from_rows((p["slug_perm"], p.get("name") or p.get("slug", ""), p.get("version"),
+                              p["uploaded_at"]) for p in packages if p.get("uploaded_at"))
+
+
+def read_locked_versions(paths):
+    """读取 pubspec.lock（文件或目录下递归查找），返回 {(name, version)}"""
+    lock_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".") and d != "build"]
+                if "pubspec.lock" in filenames:
+                    lock_files.append(os.path.join(dirpath, "pubspec.lock"))
+        else:
+            lock_files.append(path)
+
+    locked = set()
+    for lock_file in lock_files:
+        current = None
+        with open(lock_file, "r", encoding="utf-8") as f:
+            for line in f:
+                match = LOCK_PACKAGE_PATTERN.match(line)
+                if match:
+                    current = match.group(1)
+                    continue
+                match = LOCK_VERSION_PATTERN.match(line)
+                if match and current:
+                    locked.add((current, match.group(1)))
+    return locked
+
+
+class Policy:
+    def __init__(self, max_age=None, keep_last=0, keep_release_heads=False, keep_locked=None, now=None):
+        self.max_age = list(max_age or [])
+        self.keep_last = keep_last
+        self.keep_release_heads = keep_release_heads
+        self.keep_locked = list(keep_locked or [])
+        self.now = now or datetime.now(timezone.utc)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("max_age"), data.get("keep_last", 0), data.get("keep_release_heads", False),
+                   data.get("keep_locked"))
+
+    def add_age_rule(self, pattern, cutoff=None, days=None):
+        rule = {"pattern": pattern}
+        rule.update({"cutoff": cutoff} if cutoff else {"days": days})
+        self.max_age.append(rule)
+
+    def describe(self):
+        return {"max_age": self.max_age, "keep_last": self.keep_last,
+                "keep_release_heads": self.keep_release_heads, "keep_locked": self.keep_locked}
+
+    def _age_cutoffs(self):
+        """[(label, pattern, 规范化 cutoff)]"""
+        cutoffs = []
+        for rule in self.max_age:
+            if rule.get("cutoff"):
+                cutoff = normalize_timestamp(rule["cutoff"])
+                label = f"max_age {rule['pattern']} < {rule['cutoff']}"
+            else:
+                cutoff = (self.now - timedelta(days=float(rule["days"]))).strftime(TIMESTAMP_FORMAT)
+                label = f"max_age {rule['pattern']} > {rule['days']}d"
+            cutoffs.append((label, rule["pattern"], cutoff))
+        return cutoffs
+
+    def evaluate(self, table):
+        """返回 (删除 mask, [(规则, 命中数, 说明)])；mask 为 bytearray，1 表示删除"""
+        size = len(table)
+        codes = table.name_codes
+        report = []
+
+        # 删除候选：每个包名只做一次模式匹配，得到该包名适用的规则和 cutoff，再按 name_codes 展开成列
+        age_rules = self._age_cutoffs()
+        rule_of_name = [next((i for i, (_, pattern, _) in enumerate(age_rules)
+                              if fnmatch.fnmatchcase(name, pattern)), None) for name in table.names]
+        cutoff_of_name = [age_rules[i][2] if i is not None else "" for i in rule_of_name]
+        candidate = bytearray(map(lt, table.uploaded, map(cutoff_of_name.__getitem__, codes)))
+        matched = Counter(compress(map(rule_of_name.__getitem__, codes), candidate))
+        for index, (label, _, _) in enumerate(age_rules):
+            report.append((label, matched[index], "删除候选"))
+
+        # 保留规则：按 (包名, 版本) 降序排好一次，keep_last 与 release 头共用
+        keep_masks = []
+        if self.keep_last or self.keep_release_heads:
+            # 版本 key 只对不重复的版本计算；排序用整数 包名编号 × 版本数 + 版本名次，避免逐行比较元组
+            key_of = {version: version_key(version) for version in set(table.versions)}
+            rank_of_key = {key: rank for rank, key in enumerate(sorted(set(key_of.values())))}
+            rank_of = {version: rank_of_key[key] for version, key in key_of.items()}
+            ranks = len(rank_of_key)
+            sort_keys = list(map(add, map(mul, codes, repeat(ranks)), map(rank_of.__getitem__, table.versions)))
+            order = sorted(range(size), key=sort_keys.__getitem__, reverse=True)
+            if self.keep_last:
+                # 每个包名分组的起点，取分组内前 keep_last 行
+                sorted_codes = list(map(codes.__getitem__, order))
+                starts = list(compress(range(size), map(ne, sorted_codes, [None] + sorted_codes[:-1])))
+                kept = set()
+                for start, end in zip(starts, starts[1:] + [size]):
+                    kept.update(order[start:min(end, start + self.keep_last)])
+                keep_masks.append((f"keep_last {self.keep_last}", bytearray(map(kept.__contains__, range(size)))))
+            if self.keep_release_heads:
+                # 只看正式版本：每个 (包名, X, Y) 分组中的第一行即最高版本
+                release_of = {version: key[3] for version, key in key_of.items()}
+                minor_of = {version: key[:2] for version, key in key_of.items()}
+                versions = table.versions
+                releases = list(compress(order, map(release_of.__getitem__, map(versions.__getitem__, order))))
+                heads = list(zip(map(codes.__getitem__, releases),
+                                 map(minor_of.__getitem__, map(versions.__getitem__, releases))))
+                kept = set(compress(releases, map(ne, heads, [None] + heads[:-1])))
+                keep_masks.append(("keep_release_heads", bytearray(map(kept.__contains__, range(size)))))
+        if self.keep_locked:
+            locked = read_locked_versions(self.keep_locked)
+            keep = bytearray(map(locked.__contains__, zip(map(table.names.__getitem__, codes), table.versions)))
+            keep_masks.append((f"keep_locked（{len(locked)} 个 name@version）", keep))
+
+        # 每行一个字节（0/1），转成整数后按位合并，逐字节对应关系不变
+        delete = int.from_bytes(candidate, "little")
+        for label, keep in keep_masks:
+            kept = int.from_bytes(keep, "little")
+            rescued = (delete & kept).bit_count()
+            delete &= ~kept
+            report.append((label, keep.count(1), f"其中豁免 {rescued} 个删除候选"))
+        return bytearray(delete.to_bytes(size, "little")), report
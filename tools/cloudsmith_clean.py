@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""按保留策略清理 Cloudsmith 仓库（默认：删除上传时间早于 --cutoff 的包）
+
+先并发预取全部分页（边删边翻页会让后续页内容前移而漏删），
+再以有限并发删除，遇到限流时自动退避。
+--keep-last / --keep-release-heads / --keep-locked / --max-age / --policy 见 _retention.py，
+删除前会打印每条规则命中的数量。
+使用 --journal 时删除计划和每项结果写入 JSONL 日志，中断后重新运行只处理未完成的项。
+"""
+import argparse
+import json
+import sys
+import time
+
+from _cloudsmith import CloudsmithClient, load_settings
+from _cloudsmith_inventory import INVENTORY_DIR, Inventory, default_path
+from _journal import Journal
+from _retention import PackageTable, Policy
+
+
+def build_policy(args, parser):
+    """命令行 --max-age 优先于策略文件中的规则，--cutoff 作为兜底的 '*' 规则放在最后"""
+    file_policy = Policy.load(args.policy) if args.policy else Policy()
+    policy = Policy(keep_last=file_policy.keep_last, keep_release_heads=file_policy.keep_release_heads,
+                    keep_locked=file_policy.keep_locked)
+    for rule in args.max_age:
+        pattern, _, limit = rule.partition("=")
+        if not limit:
+            parser.error(f"--max-age 格式应为 PATTERN=DAYS 或 PATTERN=ISO时间：{rule}")
+        if limit.replace(".", "", 1).isdigit():
+            policy.add_age_rule(pattern, days=float(limit))
+        else:
+            policy.add_age_rule(pattern, cutoff=limit)
+    policy.max_age += file_policy.max_age
+    if args.cutoff:
+        policy.add_age_rule("*", cutoff=args.cutoff)
+    policy.keep_last = args.keep_last or policy.keep_last
+    policy.keep_release_heads = args.keep_release_heads or policy.keep_release_heads
+    policy.keep_locked += args.keep_locked
+    if not policy.max_age:
+        parser.error("需要 --cutoff、--max-age 或策略文件中的 max_age 规则")
+    return policy
+
+
+def select_expired(table, policy):
+    """按策略计算，返回 (待删除, 保留) 两个列表；每项为 {slug_perm, name, version, uploaded_at}"""
+    delete, report = policy.evaluate(table)
+    print("📐 策略规则命中：")
+    for label, count, note in report:
+        print(f"  {label:<44} {count:>8}  {note}")
+
+    expired, kept = [], []
+    for i in range(len(table)):
+        package = {"slug_perm": table.ids[i], "name": table.names[table.name_codes[i]],
+                   "version": table.versions[i], "uploaded_at": table.uploaded[i]}
+        (expired if delete[i] else kept).append(package)
+    return expired, kept
+
+
+def default_journal_path(owner, repo):
+    return INVENTORY_DIR / f"{owner}__{repo}.journal.jsonl"
+
+
+def load_journal(args, owner, repo, policy):
+    """打开日志；存在同一仓库未完成的计划时返回 (journal, 待处理项)，否则 (journal, None)"""
+    journal = Journal(args.journal or default_journal_path(owner, repo))
+    if args.replan or journal.header is None or journal.is_complete():
+        return journal, None
+    if journal.header.get("repository") != f"{owner}/{repo}":
+        print(f"❌ 日志 {journal.path} 属于 {journal.header.get('repository')}，请使用 --replan 或指定其他日志")
+        sys.exit(1)
+    # 未完成的计划是按当时的 cutoff / 策略算出来的，参数变化后继续执行会删除不该删的包
+    if journal.header.get("cutoff") != args.cutoff or \
+            journal.header.get("policy") != json.loads(json.dumps(policy.describe())):
+        print(f"⚠️ 日志 {journal.path} 中未完成的计划使用的 cutoff / 策略与本次参数不同"
+              f"（cutoff {journal.header.get('cutoff')} → {args.cutoff}），丢弃旧计划并重新规划")
+        return journal, None
+    counts = journal.counts()
+    print(f"♻️ 从日志继续 {journal.path}（cutoff {journal.header.get('cutoff')}）："
+          f"已完成 {counts['done']}，失败 {counts['failed']}，放弃 {counts['rejected']}，待执行 {counts['pending']}")
+    return journal, journal.unfinished()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="删除 Cloudsmith 仓库中上传时间早于 --cutoff 的包")
+    parser.add_argument("repository", help="OWNER/REPO，例如 apex-dao-llc/app")
+    parser.add_argument("--cutoff", help="删除上传时间早于此时间的包，例如 2024-06-06T00:00:00Z")
+    parser.add_argument("--max-age", action="append", default=[], metavar="PATTERN=DAYS|ISO",
+                        help="按包名模式的删除规则，如 'ap_demo_*=90' 或 'ap_*=2024-06-06T00:00:00Z'（可重复）")
+    parser.add_argument("--keep-last", type=int, default=0, help="每个包保留版本号最高的 N 个版本")
+    parser.add_argument("--keep-release-heads", action="store_true", help="每个包的每个 X.Y 保留最高版本")
+    parser.add_argument("--keep-locked", action="append", default=[], metavar="PATH",
+                        help="保留 pubspec.lock（文件或目录下递归查找）引用的版本（可重复）")
+    parser.add_argument("--policy", help="JSON 策略文件（字段见 _retention.py）")
+    parser.add_argument("--dry-run", action="store_true", help="仅打印不执行删除")
+    parser.add_argument("-P", "--profile", help="config.ini / credentials.ini 中的 profile 名")
+    parser.add_argument("--config-dir", help="config.ini / credentials.ini 所在目录")
+    parser.add_argument("--api-host", help="API 地址（默认读取配置，或 https://api.cloudsmith.io）")
+    parser.add_argument("--jobs", type=int, default=8, help="并发请求数（默认 8）")
+    parser.add_argument("--page-size", type=int, default=100, help="每页包数量（默认 100）")
+    parser.add_argument("--start-page", type=int, default=1, help="从第几页开始（默认 1）")
+    parser.add_argument("--inventory", nargs="?", const="", metavar="DB",
+                        help="先增量同步本地 SQLite 清单，再从清单中选择待删除的包（可指定数据库路径）")
+    parser.add_argument("--journal", nargs="?", const="", metavar="PATH",
+                        help="把删除计划和结果写入 JSONL 日志，中断后重跑只处理未完成的项"
+                             "（默认 ~/.script_tool/cloudsmith/OWNER__REPO.journal.jsonl）")
+    parser.add_argument("--replan", action="store_true", help="忽略日志中未完成的计划，重新获取并规划")
+    parser.add_argument("-v", "--verbose", action="store_true", help="同时打印保留的包")
+    args = parser.parse_args()
+
+    owner, _, repo = args.repository.partition("/")
+    if not owner or not repo:
+        parser.error("repository 格式应为 OWNER/REPO")
+    policy = build_policy(args, parser)
+
+    settings = load_settings(args.profile, args.config_dir, args.api_host)
+    if not settings["api_key"]:
+        print("⚠️ 未找到 api_key（credentials.ini 或 CLOUDSMITH_API_KEY），将以匿名方式请求")
+    client = CloudsmithClient(settings, workers=max(1, args.jobs))
+
+    print(f"🧹 开始清理 Cloudsmith 仓库: {owner}/{repo}")
+    if args.cutoff:
+        print(f"📅 删除上传时间早于 {args.cutoff} 的包...")
+    print(f"🧪 Dry-Run 模式: {'true' if args.dry_run else 'false'}")
+
+    journal, resumed = load_journal(args, owner, repo, policy) if args.journal is not None else (None, None)
+    inventory = Inventory(args.inventory or default_path(owner, repo)) if args.inventory is not None else None
+    if resumed is not None:
+        expired = [item for _, item in resumed]
+        kept = []
+    else:
+        start = time.perf_counter()
+        if inventory is not None:
+            pages, written = inventory.sync(client, owner, repo, args.page_size)
+            table = PackageTable.from_rows(inventory.rows())
+            print(f"🔍 清单同步 {pages} 页（写入 {written} 个），共 {len(table)} 个包，"
+                  f"用时 {time.perf_counter() - start:.1f}s")
+        else:
+            packages = []
+            for page, page_packages in client.iter_pages(owner, repo, args.page_size, args.start_page):
+                if not page_packages:
+                    print("🚫 当前页无数据，停止分页。")
+                    break
+                print(f"📄 第 {page} 页：{len(page_packages)} 个包")
+                packages.extend(page_packages)
+            print(f"🔍 共获取 {len(packages)} 个包，用时 {time.perf_counter() - start:.1f}s")
+            table = PackageTable.from_packages(packages)
+        expired, kept = select_expired(table, policy)
+
+    if args.verbose:
+        for package in kept:
+            print(f"✅ 保留包: {package.get('name')}@{package.get('version')} 上传于 {package.get('uploaded_at')}")
+    for package in expired:
+        print(f"🗑 准备删除包: {package.get('name')}@{package.get('version')} "
+              f"(ID: {package.get('slug_perm')}) 上传于 {package.get('uploaded_at')}")
+
+    if args.dry_run:
+        print(f"⚠️ Dry-Run 模式，仅打印不删除：{len(expired)} 个包将被删除，保留 {len(kept)} 个")
+        return
+    if not expired:
+        print("✅ 没有需要删除的包")
+        return
+
+    if journal is not None and resumed is None:
+        journal.plan({"repository": f"{owner}/{repo}", "cutoff": args.cutoff, "policy": policy.describe()},
+                     [(package["slug_perm"], package) for package in expired])
+        print(f"📝 删除计划已写入 {journal.path}（{len(expired)} 项）")
+
+    def report(identifier, ok, error, retryable):
+        state = "done" if ok else ("failed" if retryable else "rejected")
+        if journal is not None:
+            state = journal.record(identifier, state, error)
+        if not ok:
+            note = "，不再重试" if state == "rejected" else ""
+            print(f"❌ 删除失败: {owner}/{repo}/{identifier} {error}{note}")
+
+    start = time.perf_counter()
+    try:
+        results = client.delete_packages(owner, repo, [package["slug_perm"] for package in expired], report)
+    finally:
+        if journal is not None:
+            journal.close()
+    failed = [identifier for identifier, (ok, _, _) in results.items() if not ok]
+    if inventory is not None:
+        inventory.remove([identifier for identifier, (ok, _, _) in results.items() if ok])
+    print(f"\n✅ 清理完成！删除 {len(results) - len(failed)} 个，失败 {len(failed)} 个，"
+          f"保留 {len(kept)} 个，用时 {time.perf_counter() - start:.1f}s（重试 {client.retries} 次）")
+    if failed:
+        if journal is not None and not journal.is_complete():
+            print(f"👉 重新运行同一命令即可只重试失败的 {len(journal.unfinished())} 项")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""维护 Cloudsmith 包的本地 SQLite 清单，并基于清单做本地查询
+
+    cloudsmith_inventory apex-dao-llc/app sync            # 增量同步（首次为全量）
+    cloudsmith_inventory apex-dao-llc/app import packages.json
+    cloudsmith_inventory apex-dao-llc/app report --cutoff 2024-06-06T00:00:00Z
+"""
+import argparse
+import sys
+import time
+
+from _cloudsmith import CloudsmithClient, load_settings
+from _cloudsmith_inventory import Inventory, default_path
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
+def command_sync(args, inventory, owner, repo):
+    settings = load_settings(args.profile, args.config_dir, args.api_host)
+    client = CloudsmithClient(settings, workers=max(1, args.jobs))
+    mode = "全量" if args.full or not inventory.watermark else f"增量（水位线 {inventory.watermark}）"
+    print(f"🔄 同步 {owner}/{repo}：{mode}")
+    start = time.perf_counter()
+    pages, written = inventory.sync(client, owner, repo, args.page_size, full=args.full,
+                                    on_page=lambda page, count: print(f"  📄 第 {page} 页：{count} 个包"))
+    print(f"✅ 同步完成：{pages} 页，写入 {written} 个包，清单共 {inventory.count()} 个，"
+          f"用时 {time.perf_counter() - start:.1f}s")
+
+
+def command_import(args, inventory, owner, repo):
+    for path in args.files:
+        count = inventory.import_json(path)
+        print(f"📥 {path}：导入 {count} 个包")
+    print(f"✅ 清单共 {inventory.count()} 个包")
+
+
+def command_report(args, inventory, owner, repo):
+    print(f"📊 {owner}/{repo}：{inventory.count()} 个包，水位线 {inventory.watermark or '无'}")
+    if args.name:
+        for version, uploaded, identifier in inventory.versions(args.name)[:args.limit or None]:
+            print(f"  {version:<20} {uploaded}  {identifier}")
+        return
+    if args.cutoff:
+        expired = inventory.expired(args.cutoff)
+        print(f"🗑 上传时间早于 {args.cutoff} 的包：{len(expired)} 个，"
+              f"共 {format_size(sum(package.get('size') or 0 for package in expired))}")
+        for package in expired[:args.limit or None]:
+            print(f"  {package.get('slug')}@{package.get('version')}  {package.get('uploaded_at')}")
+        return
+    print(f"  {'包名':<32} {'版本数':>8} {'大小':>8}  {'最早上传':<27} 最近上传")
+    for name, count, size, oldest, newest in inventory.summary()[:args.limit or None]:
+        print(f"  {name:<32} {count:>8} {format_size(size):>8}  {oldest:<27} {newest}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cloudsmith 包的本地 SQLite 清单（增量同步 / 导入 / 查询）")
+    parser.add_argument("repository", help="OWNER/REPO，例如 apex-dao-llc/app")
+    parser.add_argument("--db", help="数据库路径（默认 ~/.script_tool/cloudsmith/OWNER__REPO.sqlite3）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = subparsers.add_parser("sync", help="从 API 同步（已有水位线时只获取新上传的包）")
+    sync_parser.add_argument("--full", action="store_true", help="全量同步，并删除远端已不存在的包")
+    sync_parser.add_argument("-P", "--profile", help="config.ini / credentials.ini 中的 profile 名")
+    sync_parser.add_argument("--config-dir", help="config.ini / credentials.ini 所在目录")
+    sync_parser.add_argument("--api-host", help="API 地址（默认读取配置，或 https://api.cloudsmith.io）")
+    sync_parser.add_argument("--jobs", type=int, default=8, help="并发请求数（默认 8）")
+    sync_parser.add_argument("--page-size", type=int, default=100, help="每页包数量（默认 100）")
+
+    import_parser = subparsers.add_parser("import", help="导入 cloudsmith ls packages 导出的 JSON")
+    import_parser.add_argument("files", nargs="+")
+
+    report_parser = subparsers.add_parser("report", help="本地查询：按包名汇总 / 将被删除的包 / 某个包的版本")
+    report_parser.add_argument("--cutoff", help="列出上传时间早于此时间的包")
+    report_parser.add_argument("--name", help="列出该包的所有版本")
+    report_parser.add_argument("--limit", type=int, default=0, help="最多打印的行数（0 表示不限）")
+    args = parser.parse_args()
+
+    owner, _, repo = args.repository.partition("/")
+    if not owner or not repo:
+        parser.error("repository 格式应为 OWNER/REPO")
+
+    inventory = Inventory(args.db or default_path(owner, repo))
+    try:
+        {"sync": command_sync, "import": command_import, "report": command_report}[args.command](
+            args, inventory, owner, repo)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        inventory.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,104 +1,262 @@
 #!/usr/bin/env python3
+import argparse
+import hashlib
+import io
+import json
 import os
 import sys
 import shutil
+import tarfile
 from pathlib import Path
-from subprocess import run, PIPE
+from subprocess import run, PIPE, TimeoutExpired
 
 # 配置参数
 REPO_OWNER = "flywithbug"
 REPO_NAME = "scripts"
-REPO_URL = f"https://github.com/{REPO_OWNER}/{REPO_NAME}.git"
+REPO_URL = os.environ.get("SCRIPT_TOOL_REPO_URL", f"https://github.com/{REPO_OWNER}/{REPO_NAME}.git")
+REPO_BRANCH = os.environ.get("SCRIPT_TOOL_REPO_BRANCH", "master")
 
 INSTALL_DIR = Path.home() / ".script_tool"
-REPO_DIR = INSTALL_DIR / "repo"
+REPO_DIR = INSTALL_DIR / "repo"            # 指向 versions/<commit> 的符号链接，wrapper 都经由它调用
+VERSIONS_DIR = INSTALL_DIR / "versions"
+CACHE_GIT_DIR = INSTALL_DIR / "cache.git"  # 浅克隆的 bare 仓库，更新时只拉取增量
 VERSION_FILE = INSTALL_DIR / ".version"
+MANIFEST_FILE = INSTALL_DIR / "manifest.json"  # 已创建的 wrapper：{命令: {path, target, hash}}
 BIN_DIR = Path.home() / ".local/bin"
 PLATFORM = sys.platform
+TOOL_DIRS = ["flutter", "tools"]
+GIT_TIMEOUT = 900  # clone / fetch / archive 的超时（秒）
+
+def load_executor():
+    """已安装时复用仓库中的 flutter/_executor.py（超时后终止进程组）；
+    通过 curl | python3 运行时没有该文件，退化为 subprocess.run"""
+    script = globals().get("__file__")
+    if not script:
+        return None
+    flutter_dir = Path(script).resolve().parent.parent / "flutter"
+    if not (flutter_dir / "_executor.py").exists():
+        return None
+    sys.path.insert(0, str(flutter_dir))
+    try:
+        import _executor
+    except ImportError:
+        return None
+    finally:
+        sys.path.remove(str(flutter_dir))
+    return _executor
+
+executor = load_executor()
+
+def execute(command, text=False):
+    """执行命令并捕获完整输出（git archive 是二进制内容，不截断），超时即失败退出"""
+    if executor is not None:
+        result = executor.run(command, timeout=GIT_TIMEOUT, text=text, max_output=None, isolate=True)
+        if result.timed_out:
+            print(f"❌ 命令超时：{' '.join(command)}")
+            sys.exit(1)
+        return result
+    try:
+        return run(command, stdout=PIPE, stderr=PIPE, text=text, timeout=GIT_TIMEOUT)
+    except TimeoutExpired:
+        print(f"❌ 命令超时：{' '.join(command)}")
+        sys.exit(1)
 
 def setup_environment():
     """创建安装目录和二进制目录"""
     INSTALL_DIR.mkdir(parents=True, exist_ok=True)
+    VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
     BIN_DIR.mkdir(parents=True, exist_ok=True)
 
-def clone_repo():
-    """克隆仓库到临时目录并返回路径"""
-    temp_dir = INSTALL_DIR / "temp_repo"
+def git(*args, check=True):
+    result = execute(["git", "--git-dir", str(CACHE_GIT_DIR), *args])
+    if check and result.returncode != 0:
+        print(f"❌ git {args[0]} 失败：", result.stderr.decode("utf-8", "replace"))
+        sys.exit(1)
+    return result
+
+def read_installed_version():
+    return VERSION_FILE.read_text().strip() if VERSION_FILE.exists() else None
+
+def fetch_latest():
+    """更新本地 bare 缓存并返回远程分支最新 commit
+
+    - 已有缓存：只 fetch 增量；
+    - 旧版安装（repo 是完整 clone）：先从本地仓库生成缓存，再 fetch 增量；
+    - 全新安装：浅克隆（--depth 1）。
+    """
+    if not CACHE_GIT_DIR.exists():
+        legacy = REPO_DIR / ".git"
+        if legacy.exists() and not REPO_DIR.is_symlink():
+            print("🔄 从现有安装生成本地缓存...")
+            source = [str(REPO_DIR)]
+        else:
+            print("🔄 浅克隆工具仓库...")
+            source = ["--depth", "1", "--branch", REPO_BRANCH, REPO_URL]
+        result = execute(["git", "clone", "--bare", "--quiet", *source, str(CACHE_GIT_DIR)], text=True)
+        if result.returncode != 0:
+            print("❌ 仓库克隆失败：", result.stderr)
+            sys.exit(1)
+        git("remote", "set-url", "origin", REPO_URL)
+
+    print("🔄 获取更新...")
+    git("fetch", "--quiet", "--depth", "1", "origin", f"+refs/heads/{REPO_BRANCH}:refs/heads/{REPO_BRANCH}")
+    commit = git("rev-parse", f"refs/heads/{REPO_BRANCH}").stdout.decode().strip()
+    print(f"✅ 远程最新版本: {commit}")
+    return commit
+
+def materialize(commit):
+    """把 commit 展开到 versions/<commit>（先写临时目录再 rename，不会出现半成品）"""
+    target = VERSIONS_DIR / commit
+    if target.exists():
+        return target
+    temp_dir = VERSIONS_DIR / f".tmp-{commit}-{os.getpid()}"
     if temp_dir.exists():
         shutil.rmtree(temp_dir)
+    archive = git("archive", "--format=tar", commit).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(temp_dir, filter="data")
+        else:
+            tar.extractall(temp_dir)
+    temp_dir.rename(target)
+    return target
 
-    print("🔄 克隆工具仓库...")
-    result = run(["git", "clone", REPO_URL, str(temp_dir)], stdout=PIPE, stderr=PIPE, text=True)
-    if result.returncode != 0:
-        print("❌ 仓库克隆失败：", result.stderr)
-        sys.exit(1)
-    print("✅ 仓库克隆成功！")
-    return temp_dir
-
-def clean_old_installation():
-    """清理旧的安装文件和链接"""
-    print("🧹 清理旧的安装文件...")
-    # 删除旧的 repo 目录
-    if REPO_DIR.exists():
-        shutil.rmtree(REPO_DIR)
-
-    # 删除旧的版本文件
-    if VERSION_FILE.exists():
-        VERSION_FILE.unlink()
-
-    # 删除旧的 wrapper 脚本
-    tool_dirs = ["flutter", "tools"]
-    for cmd in BIN_DIR.glob("*"):
-        # 检查是否是本工具生成的 wrapper
-        cmd_name = cmd.stem if PLATFORM == "win32" else cmd.name
-        if any(cmd_name in (p.stem for p in (REPO_DIR / d).glob("*.py") if not p.name.startswith('_')) for d in tool_dirs):
-            cmd.unlink()
-            print(f"    🗑️ 已删除旧链接: {cmd}")
-
-def update_installation(temp_dir):
-    """更新安装：移动仓库、记录版本、创建 wrapper"""
-    # 移动临时仓库到正式目录
-    print("📂 更新仓库目录...")
-    temp_dir.rename(REPO_DIR)
-
-    # 获取 commit hash
-    os.chdir(REPO_DIR)
-    result = run(["git", "rev-parse", "HEAD"], stdout=PIPE, text=True)
-    commit_hash = result.stdout.strip()
-    VERSION_FILE.write_text(commit_hash)
-    print(f"📦 当前版本: {commit_hash}")
-
-def create_wrapper(script_path):
-    """为脚本创建 wrapper"""
-    cmd_name = script_path.stem
+def swap_repo(version_dir, previous=None):
+    """原子切换 REPO_DIR 符号链接；不支持符号链接时（如 Windows 无权限）退化为复制目录"""
+    if REPO_DIR.exists() and not REPO_DIR.is_symlink():
+        # 旧版安装：把完整 clone 移到 versions 下，之后 REPO_DIR 统一为符号链接
+        legacy = VERSIONS_DIR / (previous or f"legacy-{os.getpid()}")
+        if not legacy.exists():
+            REPO_DIR.rename(legacy)
+
+    temp_link = INSTALL_DIR / f".repo-{os.getpid()}"
+    try:
+        if temp_link.is_symlink():
+            temp_link.unlink()
+        temp_link.symlink_to(version_dir, target_is_directory=True)
+    except OSError:
+        if REPO_DIR.exists():
+            shutil.rmtree(REPO_DIR)
+        shutil.copytree(version_dir, REPO_DIR)
+        return
+    os.replace(temp_link, REPO_DIR)
+
+def prune_versions(keep):
+    """删除不再使用的版本目录（保留当前和上一个版本，正在运行的旧命令不受影响）"""
+    for entry in VERSIONS_DIR.iterdir():
+        if entry.name not in keep:
+            shutil.rmtree(entry, ignore_errors=True)
+
+def list_commands(repo_dir):
+    """{命令名: 脚本路径}（经由 REPO_DIR 的路径，切换版本后 wrapper 无需改写）"""
+    commands = {}
+    for d in TOOL_DIRS:
+        tool_dir = repo_dir / d
+        if not tool_dir.exists():
+            continue
+        for py_script in tool_dir.glob("*.py"):
+            if not py_script.name.startswith('_'):
+                commands[py_script.stem] = REPO_DIR / d / py_script.name
+    return commands
+
+def wrapper_path(cmd_name):
     wrapper = BIN_DIR / cmd_name
+    return wrapper.with_suffix('.bat') if PLATFORM == "win32" else wrapper
 
+def wrapper_content(script_path):
     if PLATFORM == "win32":
-        wrapper = wrapper.with_suffix('.bat')
-        content = f'@python "{script_path}" %*\n'
-    else:
-        content = f"""#!/bin/sh
+        return f'@python "{script_path}" %*\n'
+    return f"""#!/bin/sh
 exec python3 "{script_path}" "$@"
 """
+
+def content_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def file_hash(path):
+    try:
+        return content_hash(path.read_text())
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def load_manifest(old_commands):
+    """读取 wrapper 清单；旧版安装没有清单时，用旧版本的命令列表和现有 wrapper 生成"""
+    try:
+        return json.loads(MANIFEST_FILE.read_text()).get("wrappers", {})
+    except (OSError, ValueError):
+        pass
+    manifest = {}
+    for cmd_name, script_path in old_commands.items():
+        wrapper = wrapper_path(cmd_name)
+        digest = file_hash(wrapper)
+        if digest == content_hash(wrapper_content(script_path)):
+            manifest[cmd_name] = {"path": str(wrapper), "target": str(script_path), "hash": digest}
+    return manifest
+
+def save_manifest(manifest):
+    temp_file = MANIFEST_FILE.with_name(f".manifest-{os.getpid()}.json")
+    temp_file.write_text(json.dumps({"wrappers": manifest}, indent=2, ensure_ascii=False, sort_keys=True))
+    os.replace(temp_file, MANIFEST_FILE)
+
+def remove_wrapper(entry):
+    """只删除内容与清单一致的 wrapper（用户修改过的文件保留）"""
+    wrapper = Path(entry["path"])
+    if file_hash(wrapper) == entry["hash"]:
+        wrapper.unlink()
+        print(f"    🗑️ 已删除旧链接: {wrapper}")
+
+def create_wrapper(script_path, content):
+    """为脚本创建 wrapper"""
+    wrapper = wrapper_path(script_path.stem)
     wrapper.write_text(content)
 
     if PLATFORM != "win32":
         wrapper.chmod(0o755)
 
     print(f"    🔗 已连接: {wrapper} -> {script_path}")
+    return wrapper
 
-def install_commands():
-    """安装命令"""
-    tool_dirs = [REPO_DIR / "flutter", REPO_DIR / "tools"]
-    for tool_dir in tool_dirs:
-        if not tool_dir.exists():
+def install_commands(manifest, new_commands):
+    """按清单一次遍历：内容未变的 wrapper 跳过，新增 / 变化的重写，已移除的命令删除 wrapper"""
+    updated = {}
+    changed = 0
+    for cmd_name, script_path in sorted(new_commands.items()):
+        content = wrapper_content(script_path)
+        digest = content_hash(content)
+        entry = manifest.get(cmd_name)
+        wrapper = wrapper_path(cmd_name)
+        if entry and entry["hash"] == digest and entry["path"] == str(wrapper) and wrapper.exists():
+            updated[cmd_name] = entry
             continue
-        print(f"🚀 安装目录: {tool_dir.name}")
-        for py_script in tool_dir.glob("*.py"):
-            if py_script.name.startswith('_'):
-                continue
-            print(f"  ➜ 命令: {py_script.stem}")
-            create_wrapper(py_script)
+        print(f"  ➜ 命令: {cmd_name}")
+        create_wrapper(script_path, content)
+        updated[cmd_name] = {"path": str(wrapper), "target": str(script_path), "hash": digest}
+        changed += 1
+
+    for cmd_name, entry in manifest.items():
+        if cmd_name not in updated:
+            remove_wrapper(entry)
+            changed += 1
+
+    save_manifest(updated)
+    if not changed:
+        print("  ✅ 所有 wrapper 均为最新")
+
+def uninstall():
+    """按清单删除 wrapper，并删除安装的仓库、缓存和版本信息"""
+    manifest = load_manifest(list_commands(REPO_DIR) if REPO_DIR.exists() else {})
+    print("🧹 卸载脚本工具...")
+    for entry in manifest.values():
+        remove_wrapper(entry)
+    if REPO_DIR.is_symlink():
+        REPO_DIR.unlink()
+    for path in (REPO_DIR, VERSIONS_DIR, CACHE_GIT_DIR):
+        if path.exists():
+            shutil.rmtree(path, ignore_errors=True)
+    for path in (VERSION_FILE, MANIFEST_FILE):
+        if path.exists():
+            path.unlink()
+    print("✅ 卸载完成")
 
 def check_path():
     """检查 PATH 环境变量"""
@@ -114,27 +272,40 @@ def check_path():
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="安装 / 更新 / 卸载脚本工具")
+    parser.add_argument("--uninstall", action="store_true", help="删除已安装的命令和仓库")
+    args = parser.parse_args()
+    if args.uninstall:
+        uninstall()
+        return
+
     setup_environment()
 
-    # 先克隆仓库
-    temp_dir = clone_repo()
+    previous = read_installed_version()
+    old_commands = list_commands(REPO_DIR) if REPO_DIR.exists() else {}
 
-    # 清理旧安装
-    clean_old_installation()
+    # 获取最新版本（增量 fetch / 浅克隆）
+    commit = fetch_latest()
+    if commit == previous and REPO_DIR.exists():
+        print(f"📦 已是最新版本: {commit}")
+    else:
+        print("📂 更新仓库目录...")
+        swap_repo(materialize(commit), previous)
+        VERSION_FILE.write_text(commit)
+        print(f"📦 当前版本: {previous or '无'} -> {commit}")
+        prune_versions({commit, previous})
 
-    # 更新安装
-    update_installation(temp_dir)
     print("🔧 安装脚本工具中...")
-    install_commands()
+    new_commands = list_commands(REPO_DIR)
+    install_commands(load_manifest(old_commands), new_commands)
 
     # 列出可用命令
     print("\n📌 当前可用命令:")
-    for cmd in sorted(BIN_DIR.glob("*")):
-        if not cmd.name.startswith('.'):
-            print(f"  {cmd.name}")
+    for cmd_name in sorted(new_commands):
+        print(f"  {cmd_name}")
 
     # 检查 PATH
     check_path()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()